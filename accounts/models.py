@@ -1,5 +1,23 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models
+from django.db.models.functions import Upper
 
 
 class User(AbstractUser):
-    pass
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Trigram indexes serve both icontains filters and similarity ranking in user search
+            GinIndex(fields=['username'], opclasses=['gin_trgm_ops'], name='user_username_trgm_idx'),
+            GinIndex(fields=['first_name'], opclasses=['gin_trgm_ops'], name='user_first_name_trgm_idx'),
+            GinIndex(fields=['last_name'], opclasses=['gin_trgm_ops'], name='user_last_name_trgm_idx'),
+            # Serves username__istartswith, which compares UPPER(username) with LIKE
+            models.Index(OpClass(Upper('username'), name='text_pattern_ops'), name='user_username_prefix_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so that a rename can invalidate the cache entry for the old username
+        instance._saved_username = instance.__dict__.get('username')
+        return instance
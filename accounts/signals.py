@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts import user_cache
+from accounts.models import User
+
+
+def _invalidate(*usernames):
+    """
+    Invalidates straight away, so lookups in the writer's own transaction see the change, and again once it commits,
+    as a concurrent lookup in between would cache the old row for SHARED_TIMEOUT
+    """
+    user_cache.invalidate(*usernames)
+    transaction.on_commit(lambda: user_cache.invalidate(*usernames))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance: User, **kwargs):
+    """Invalidates the old and new usernames, the latter clearing any cached miss for a newly registered user"""
+    _invalidate(getattr(instance, '_saved_username', None), instance.username)
+    instance._saved_username = instance.username
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance: User, **kwargs):
+    _invalidate(getattr(instance, '_saved_username', None), instance.username)
@@ -0,0 +1,107 @@
+"""
+A username to User cache for profile and list pages. Lookups go through a small per-process LRU, then the shared
+Django cache, then the database. Unknown usernames are cached too, briefly, so that requests for random profiles don't
+each cost a query. Saving or deleting a User invalidates the shared cache, then again once the change commits, but
+other processes may serve their local copy for up to LOCAL_TIMEOUT seconds
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from accounts.models import User
+
+LOCAL_SIZE = 1024
+LOCAL_TIMEOUT = 5
+SHARED_TIMEOUT = 60 * 60
+MISSING_TIMEOUT = 60
+# Cached in place of a User for usernames that don't exist
+MISSING = 'missing'
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _cache_key(username: str) -> str:
+    return f"accounts:user:{hashlib.md5(username.encode()).hexdigest()}"
+
+
+def _get_local(key):
+    with _local_lock:
+        item = _local.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires < time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return value
+
+
+def _set_local(key, value):
+    with _local_lock:
+        _local[key] = (value, time.monotonic() + LOCAL_TIMEOUT)
+        _local.move_to_end(key)
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+
+
+def get_user(username: str) -> User:
+    """
+    Gets the User with the given username, raising User.DoesNotExist if there isn't one. The password hash is deferred
+    so that it never leaves the database in a cache entry. Users are read from the primary, as a lagging replica
+    could cache a just registered user as missing
+    """
+    key = _cache_key(username)
+    user = _get_local(key)
+    if user is None:
+        user = cache.get(key)
+        if user is None:
+            user = _user_query(username).first() or MISSING
+            cache.set(key, user, _timeout(user))
+        _set_local(key, user)
+    return _found(user, username)
+
+
+async def aget_user(username: str) -> User:
+    """get_user for async views"""
+    key = _cache_key(username)
+    user = _get_local(key)
+    if user is None:
+        user = await cache.aget(key)
+        if user is None:
+            user = await _user_query(username).afirst() or MISSING
+            await cache.aset(key, user, _timeout(user))
+        _set_local(key, user)
+    return _found(user, username)
+
+
+def _user_query(username: str):
+    return User.objects.using(DEFAULT_DB_ALIAS).defer('password').filter(username=username)
+
+
+def _timeout(user) -> int:
+    return MISSING_TIMEOUT if user == MISSING else SHARED_TIMEOUT
+
+
+def _found(user, username: str) -> User:
+    if user == MISSING:
+        raise User.DoesNotExist(f"No user with username {username!r}")
+    return user
+
+
+def invalidate(*usernames: str):
+    keys = [_cache_key(username) for username in usernames if username]
+    with _local_lock:
+        for key in keys:
+            _local.pop(key, None)
+    cache.delete_many(keys)
+
+
+def clear_local():
+    with _local_lock:
+        _local.clear()
@@ -0,0 +1,8 @@
+"""
+Benchmarks of the main pages and model methods against deterministic synthetic data. Run with
+
+    python -m benchmarks --scale 100000 --output report.json [--compare previous-report.json]
+
+which builds the data in a throwaway test database, times each case and writes a JSON report. See
+python -m benchmarks --help
+"""
@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Times every page and the main Media methods against synthetic data in a throwaway test database")
+    parser.add_argument('--scale', type=int, default=100_000, help="About how many list entries to create")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=20, help="How many timed runs of each case")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--case', action='append', dest='cases', help="Only run this case, may be repeated")
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    parser.add_argument('--compare', help="A previous report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="The fraction a timing or peak memory may grow by before it counts as a regression")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Exit with status 1 if anything regressed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_media_list.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from .cases import build_cases
+    from .factories import build_dataset
+    from .runner import compare, environment, run_cases
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    try:
+        start = time.perf_counter()
+        dataset = build_dataset(args.scale, args.seed, args.batch_size)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        print(f"Built {dataset.sizes} in {time.perf_counter() - start:.1f}s")
+
+        cases = [case for case in build_cases(dataset) if not args.cases or case.name in args.cases]
+        print(f"{'case':<22} {'p50 ms':>10} {'p95 ms':>10} {'queries':>8} {'peak kB':>10}")
+        results = run_cases(cases, args.iterations, lambda name, result: print(
+            f"{name:<22} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['queries']:>8} "
+            f"{result['peak_memory_kb']:>10.1f}"))
+        report = {
+            'environment': environment(),
+            'dataset': {'scale': args.scale, 'seed': args.seed, 'iterations': args.iterations, **dataset.sizes},
+            'results': results,
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    if baseline is None:
+        return 0
+    if baseline.get('dataset', {}).get('scale') != args.scale or baseline.get('dataset', {}).get('seed') != args.seed:
+        print("Warning: the baseline was run with a different scale or seed, so the results are not comparable")
+    regressions = compare(report, baseline, args.threshold)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
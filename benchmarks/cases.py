@@ -0,0 +1,74 @@
+"""
+The benchmarked cases: every page a visitor can load and the Media methods behind them. Pages are requested by a
+logged in user, so each request does the full work rather than being served from the public page cache
+"""
+from typing import Callable, List, NamedTuple
+
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+from .factories import BENCHMARK_USER, Dataset
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[], object]
+
+
+def get_page(client: Client, url: str, data=None) -> Callable[[], int]:
+    def run():
+        response = client.get(url, data)
+        if response.status_code != 200:
+            raise AssertionError(f"GET {url} returned {response.status_code}")
+        # Streamed responses only do their work as they are consumed
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
+    return run
+
+
+def uncached(run: Callable[[], object]) -> Callable[[], object]:
+    def run_uncached():
+        cache.clear()
+        return run()
+    return run_uncached
+
+
+def create_film():
+    return Media._create_media(Film, title="Benchmark film", release_status=Film.RELEASED)
+
+
+def build_cases(dataset: Dataset) -> List[Case]:
+    user = User.objects.get(username=BENCHMARK_USER)
+    client = Client()
+    client.force_login(user)
+
+    other_username = User.objects.exclude(pk=user.pk).order_by('pk').values_list('username', flat=True)[0]
+    title = Media.objects.order_by('pk').values_list('title', flat=True)[0]
+    entry_media_id = ListEntry.objects.filter(user=user).order_by('pk').values_list('media', flat=True)[0]
+    chain_head = Media.objects.get(pk=dataset.chain_heads[0])
+    related = Media.objects.get(pk=dataset.related_media[0])
+
+    return [
+        Case('home', get_page(client, reverse('home:index'))),
+        Case('profile', get_page(client, reverse('profiles:profile', args=[BENCHMARK_USER]))),
+        Case('film_list', get_page(client, reverse('media_list:film-list', args=[BENCHMARK_USER]))),
+        Case('series_list', get_page(client, reverse('media_list:series-list', args=[BENCHMARK_USER]))),
+        Case('book_list', get_page(client, reverse('media_list:book-list', args=[BENCHMARK_USER]))),
+        Case('all_lists', get_page(client, reverse('media_list:all-lists', args=[BENCHMARK_USER]))),
+        Case('list_export', get_page(client, reverse('media_list:list-export', args=['films', BENCHMARK_USER]))),
+        Case('user_search', get_page(client, reverse('search:users'), {'query': other_username[:5]})),
+        Case('media_search', get_page(client, reverse('search:media'),
+                                      {'query': " ".join(title.split()[:2]).ljust(3, 'e')})),
+        Case('autocomplete', get_page(client, reverse('search:autocomplete'), {'query': title[:4]})),
+        Case('autocomplete_uncached', uncached(get_page(client, reverse('search:autocomplete'), {'query': title[:4]}))),
+        Case('media_sequels', lambda: list(chain_head.get_sequels())),
+        Case('media_franchise', lambda: list(chain_head.get_franchise())),
+        Case('media_related', lambda: list(related.get_related_media())),
+        Case('media_relations', lambda: Media.objects.get(pk=entry_media_id).get_relations()),
+        Case('create_film', create_film),
+    ]
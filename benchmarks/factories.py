@@ -0,0 +1,123 @@
+"""
+Deterministic synthetic data. The same scale and seed always produce the same rows in the same order, so benchmark
+runs on different commits time the same work. Rows are generated lazily and written with the bulk APIs, batch_size
+at a time, so that building even the largest scales uses little memory
+"""
+import random
+from itertools import islice
+from typing import Dict, Iterator, List
+
+from accounts.models import User
+from media.models import Media, Book, Film, Series
+from media_list.models import ListEntry, ListRow, UserListStats
+
+MODELS = {Media.FILM: Film, Media.SERIES: Series, Media.BOOK: Book}
+# The user whose pages are benchmarked, who has a far longer list than everyone else
+BENCHMARK_USER = 'benchmark_user'
+# Word parts for names and titles that look real enough for trigram search to behave as it would on real data
+SYLLABLES = ['ka', 'ri', 'to', 'mon', 'el', 'sha', 'dor', 'vin', 'lu', 'ste', 'ar', 'qui', 'ben', 'zo', 'fla', 'nor']
+TITLE_WORDS = ['the', 'last', 'night', 'of', 'river', 'crown', 'shadow', 'empire', 'garden', 'winter', 'storm',
+               'secret', 'house', 'city', 'star', 'war', 'return', 'kingdom', 'silent', 'blue', 'iron', 'glass']
+
+
+def synthetic_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_title(rng: random.Random) -> str:
+    return " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 5))).capitalize()
+
+
+class Dataset:
+    def __init__(self, scale: int, seed: int):
+        self.scale = scale
+        self.seed = seed
+        self.users = max(10, scale // 100)
+        # Split evenly between the media types
+        self.media = max(10, scale // 10 // len(MODELS)) * len(MODELS)
+        self.media_ids: Dict[str, List[int]] = {}
+        self.chain_heads: List[int] = []
+        self.related_media: List[int] = []
+        self.entries = 0
+
+    @property
+    def sizes(self) -> dict:
+        return {'users': self.users, 'media': self.media, 'list_entries': self.entries,
+                'chains': len(self.chain_heads)}
+
+
+def user_rows(dataset: Dataset, rng: random.Random) -> Iterator[User]:
+    # Hashing passwords would dominate building, and benchmarks log in with force_login
+    yield User(username=BENCHMARK_USER, password='!')
+    for i in range(1, dataset.users):
+        yield User(username=f"{synthetic_name(rng)}{i}", first_name=synthetic_name(rng).title(),
+                   last_name=synthetic_name(rng).title(), password='!')
+
+
+def media_rows(media_type: str, count: int, rng: random.Random) -> Iterator[dict]:
+    for _ in range(count):
+        row = {'title': synthetic_title(rng), 'description': " ".join(synthetic_title(rng) for _ in range(8))}
+        if media_type == Media.FILM:
+            row.update(runtime=rng.randint(80, 180), release_status=Film.RELEASED)
+        elif media_type == Media.SERIES:
+            row.update(episodes=rng.randint(6, 100), airing_status=Series.FINISHED_AIRING)
+        else:
+            row.update(chapters=rng.randint(10, 60), release_status=Book.PUBLISHED)
+        yield row
+
+
+def relation_edges(dataset: Dataset, rng: random.Random) -> Iterator[tuple]:
+    """Chains of two to six sequels within each media type, then random RELATED pairs for a quarter of the media"""
+    for media_ids in dataset.media_ids.values():
+        position = 0
+        while position < len(media_ids) - 1:
+            chain = media_ids[position:position + rng.randint(2, 6)]
+            dataset.chain_heads.append(chain[0])
+            for prequel, sequel in zip(chain, chain[1:]):
+                yield sequel, prequel, Media.SEQUEL
+            position += len(chain)
+    all_ids = [media_id for media_ids in dataset.media_ids.values() for media_id in media_ids]
+    for _ in range(dataset.media // 4):
+        media1, media2 = rng.sample(all_ids, 2)
+        dataset.related_media.append(media1)
+        yield media1, media2, Media.RELATED
+
+
+def list_entries(dataset: Dataset, user_ids: List[int], rng: random.Random) -> Iterator[ListEntry]:
+    """About scale entries in all, a hundred per user, except the benchmark user who has ten times as many"""
+    all_ids = [media_id for media_ids in dataset.media_ids.values() for media_id in media_ids]
+    per_user = max(1, dataset.scale // dataset.users)
+    for user_id in user_ids:
+        count = min(len(all_ids), per_user * 10 if user_id == user_ids[0] else per_user)
+        for media_id in rng.sample(all_ids, count):
+            score = rng.randint(1, 10) if rng.random() < 0.8 else None
+            yield ListEntry(user_id=user_id, media_id=media_id, score=score, progress=rng.randint(0, 50))
+
+
+def bulk_create(model, objects: Iterator, batch_size: int) -> int:
+    created = 0
+    while batch := list(islice(objects, batch_size)):
+        model.objects.bulk_create(batch)
+        created += len(batch)
+    return created
+
+
+def build_dataset(scale: int, seed=0, batch_size=5000) -> Dataset:
+    """Fills the database with about scale list entries, and users and media in proportion"""
+    rng = random.Random(seed)
+    dataset = Dataset(scale, seed)
+
+    bulk_create(User, user_rows(dataset, rng), batch_size)
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    for media_type, model in MODELS.items():
+        Media.bulk_create_media(model, media_rows(media_type, dataset.media // len(MODELS), rng), batch_size)
+        dataset.media_ids[media_type] = list(
+            Media.objects.filter(media_type=media_type).order_by('pk').values_list('pk', flat=True))
+    Media.bulk_add_related_media(relation_edges(dataset, rng), batch_size)
+    dataset.entries = bulk_create(ListEntry, list_entries(dataset, user_ids, rng), batch_size)
+
+    # Bulk inserts skip the signals that keep these totals up to date
+    UserListStats.rebuild_all()
+    ListEntry.recompute_media_stats()
+    ListRow.refresh()
+    return dataset
@@ -0,0 +1,96 @@
+"""Times benchmark cases and compares reports"""
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Dict, Iterable, List
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .cases import Case
+
+# Measured values where a higher number in the current report than in the baseline is a regression
+COMPARED = ['p50_ms', 'p95_ms', 'queries', 'peak_memory_kb']
+
+
+def measure(case: Case, iterations: int) -> Dict[str, float]:
+    """
+    Runs a case once to warm caches, then iterations times for timings and query counts, then once more under
+    tracemalloc for peak memory, which is left out of the timings as tracing slows everything down
+    """
+    case.run()
+    timings = []
+    query_counts = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            case.run()
+            timings.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(queries))
+
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    percentiles = statistics.quantiles(timings, n=20, method='inclusive') if len(timings) > 1 else timings * 19
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentiles[18], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': statistics.median_low(query_counts),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_cases(cases: Iterable[Case], iterations: int, progress=None) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for case in cases:
+        results[case.name] = measure(case, iterations)
+        if progress:
+            progress(case.name, results[case.name])
+    return results
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with connection.cursor() as cursor:
+        cursor.execute("SHOW server_version")
+        database_version = cursor.fetchone()[0]
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'postgres': database_version,
+        'platform': platform.platform(),
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Gets a line describing each regression of report against baseline, where a timing or peak memory grew by more than
+    the threshold fraction, or a query count grew at all. Cases missing from either report are not compared
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        for key in COMPARED:
+            if key not in previous:
+                continue
+            if key == 'queries':
+                regressed = result[key] > previous[key]
+            else:
+                regressed = result[key] > previous[key] * (1 + threshold)
+            if regressed:
+                regressions.append(f"{name}: {key} {previous[key]} -> {result[key]}")
+    return regressions
@@ -0,0 +1,83 @@
+"""
+Compares the throughput of the site served over WSGI by gunicorn, and over ASGI by uvicorn with both the sync views
+and the async views that ASYNC_VIEWS=1 turns on. Each server is started in turn with one worker process against the
+configured database, load tested with dev/load_test.py at each concurrency, then stopped. Needs gunicorn and uvicorn:
+
+    pip install gunicorn uvicorn
+    python dev/compare_servers.py --user <username> --concurrency 1 8 32
+
+Run it against a database with realistic data, such as one filled by benchmarks.factories.build_dataset()
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from load_test import get_paths, run
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def server_commands(port, threads):
+    """The command to start each server, and whether it serves async views"""
+    gunicorn = [sys.executable, '-m', 'gunicorn', 'my_media_list.wsgi', '--bind', f'127.0.0.1:{port}',
+                '--workers', '1', '--threads', str(threads)]
+    uvicorn = [sys.executable, '-m', 'uvicorn', 'my_media_list.asgi:application', '--port', str(port),
+               '--workers', '1', '--no-access-log']
+    return {
+        'wsgi': (gunicorn, False),
+        'asgi sync': (uvicorn, False),
+        'asgi async': (uvicorn, True),
+    }
+
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(base_url):
+                return
+        except URLError:
+            time.sleep(0.2)
+    raise RuntimeError(f"The server at {base_url} didn't start within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--user', help="A username whose profile and lists to include")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per page and concurrency")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn's threads per worker")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    paths = get_paths(args.user)
+    results = {}
+    servers = server_commands(args.port, args.threads)
+    for server, (command, async_views) in servers.items():
+        env = {**os.environ, 'ASYNC_VIEWS': '1' if async_views else '0'}
+        process = subprocess.Popen(command, cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(base_url)
+            for concurrency in args.concurrency:
+                print(f"{server} with {concurrency} concurrent requests")
+                for path in paths:
+                    results[server, concurrency, path] = run(base_url, path, args.requests, concurrency, False)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"\n{'req/s':<40} {'concurrency':>11}" + "".join(f"{server:>12}" for server in servers))
+    for concurrency in args.concurrency:
+        for path in paths:
+            print(f"{path:<40} {concurrency:>11}" + "".join(
+                f"{results[server, concurrency, path]['throughput']:>12.1f}" for server in servers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+A small HTTP load test for comparing database connection settings. Start the server with each setting, for example
+
+    POSTGRES_CONN_MAX_AGE=0 python manage.py runserver --noreload
+    POSTGRES_CONN_MAX_AGE=60 python manage.py runserver --noreload
+    POSTGRES_PORT=6432 POSTGRES_POOLER=pgbouncer python manage.py runserver --noreload
+
+then run `python dev/load_test.py --user <username>` against it and compare the latencies. Public pages are cached
+whole for anonymous visitors, so each request adds a unique query parameter to miss the page cache and reach the
+database, unless --allow-cache is given. Only the standard library is used, so it can run from any Python 3
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+
+def get_paths(username):
+    paths = ['/', '/search/users/?query=smith', '/search/autocomplete/?query=the']
+    if username:
+        paths += [f'/profile/{username}/', f'/list/films/{username}/', f'/list/series/{username}/']
+    return paths
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    try:
+        with urlopen(url) as response:
+            response.read()
+            status = response.status
+    except HTTPError as e:
+        status = e.code
+    return (time.perf_counter() - start) * 1000, status
+
+
+def run(base_url, path, requests, concurrency, allow_cache):
+    url = base_url.rstrip('/') + path
+    if allow_cache:
+        urls = [url] * requests
+    else:
+        separator = '&' if '?' in url else '?'
+        urls = [f"{url}{separator}load-test={i}" for i in range(requests)]
+    timed_get(url)  # Warm up, so that one-off startup costs aren't counted
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed_get, urls))
+    elapsed = time.perf_counter() - start
+    timings = [timing for timing, _ in results]
+    errors = sum(1 for _, status in results if status >= 400)
+    percentiles = statistics.quantiles(timings, n=100)
+    result = {'p50': percentiles[49], 'p95': percentiles[94], 'throughput': requests / elapsed, 'errors': errors}
+    print(f"{path:<40} p50 {result['p50']:7.1f}ms  p95 {result['p95']:7.1f}ms  "
+          f"{result['throughput']:7.1f} req/s  {errors} errors")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--user', help="A username whose profile and lists to include")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per page")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--allow-cache', action='store_true', help="Let anonymous page cache hits be measured")
+    args = parser.parse_args()
+    for path in get_paths(args.user):
+        run(args.base_url, path, args.requests, args.concurrency, args.allow_cache)
+
+
+if __name__ == '__main__':
+    main()
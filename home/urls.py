@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import path
 
 from home import views
 
 app_name = 'home'
+
+home = views.AsyncHome if settings.ASYNC_VIEWS else views.Home
+
 urlpatterns = [
-    path('', views.Home.as_view(), name='index')
+    path('', home.as_view(), name='index')
 ]
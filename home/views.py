@@ -1,6 +1,13 @@
+from utils.page_cache import PublicPageCacheMixin
 from utils.views import BaseTemplateView
 
 
-class Home(BaseTemplateView):
+class Home(PublicPageCacheMixin, BaseTemplateView):
     page_title = "Home"
     template_name = "home/index.html"
+
+
+class AsyncHome(Home):
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(self.get_context_data(**kwargs))
@@ -0,0 +1,28 @@
+import time
+
+from media.models import Media, Film, Series, Book
+from utils.commands import RowsImportCommand
+
+MODELS = {
+    'film': Film,
+    'series': Series,
+    'book': Book
+}
+
+
+class Command(RowsImportCommand):
+    help = "Bulk imports Media of a single type from a CSV or JSON lines file, one row per Media"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--type', required=True, choices=MODELS.keys(), dest='media_type')
+
+    def handle(self, *args, path, media_type, file_format, batch_size, **options):
+        start = time.perf_counter()
+        with self.open_rows(path, file_format) as rows:
+            created = Media.bulk_create_media(MODELS[media_type], rows, batch_size)
+        elapsed = time.perf_counter() - start
+
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} {media_type} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management import CommandError
+
+from media.models import Media
+from utils.commands import RowsImportCommand
+
+RELATIONSHIPS = {
+    'S': Media.SEQUEL,
+    'SEQUEL': Media.SEQUEL,
+    'R': Media.RELATED,
+    'RELATED': Media.RELATED
+}
+
+
+def parse_edges(rows):
+    for line_number, row in enumerate(rows, start=1):
+        relationship = RELATIONSHIPS.get(str(row.get('relationship') or "").upper())
+        if relationship is None:
+            raise CommandError(f"Row {line_number}: invalid relationship {row.get('relationship')!r}")
+        try:
+            yield int(row['media1']), int(row['media2']), relationship
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f"Row {line_number}: media1 and media2 must be Media IDs")
+
+
+class Command(RowsImportCommand):
+    help = "Bulk imports RelatedMedia from a CSV or JSON lines file of media1, media2 and relationship rows, " \
+           "where media1 is the SEQUEL to media2 for sequel relationships"
+
+    def handle(self, *args, path, file_format, batch_size, **options):
+        start = time.perf_counter()
+        with self.open_rows(path, file_format) as rows:
+            added = Media.bulk_add_related_media(parse_edges(rows), batch_size)
+        elapsed = time.perf_counter() - start
+
+        rate = added / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {added} related media in {elapsed:.2f}s ({rate:.0f} rows/sec)"))
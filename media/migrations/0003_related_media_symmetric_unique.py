@@ -0,0 +1,30 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:00
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_alter_relatedmedia_relationship'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='relatedmedia',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='relatedmedia',
+            index=models.Index(fields=['media1', 'relationship'], name='related_media1_relation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relatedmedia',
+            index=models.Index(fields=['media2', 'relationship'], name='related_media2_relation_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedmedia',
+            constraint=models.UniqueConstraint(django.db.models.functions.comparison.Least('media1', 'media2'), django.db.models.functions.comparison.Greatest('media1', 'media2'), name='unique_related_media_pair'),
+        ),
+    ]
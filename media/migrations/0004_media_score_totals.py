@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0003_related_media_symmetric_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='score_total',
+            field=models.DecimalField(decimal_places=1, default=0, help_text="The sum of all members' scores, the numerator of score", max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='scored_members',
+            field=models.IntegerField(default=0, help_text='The number of members who have scored this media'),
+        ),
+    ]
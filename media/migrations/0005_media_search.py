@@ -0,0 +1,59 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:05
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0004_media_score_totals'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='media',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Weighted full text of the titles and description, kept up to date by a database trigger', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='media_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['title'], name='media_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['local_title'], name='media_local_title_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(
+            sql=[
+                """
+                CREATE FUNCTION media_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector :=
+                        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.local_title, '')), 'A') ||
+                        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+                """,
+                """
+                CREATE TRIGGER media_search_vector_trigger
+                BEFORE INSERT OR UPDATE OF title, local_title, description, search_vector ON media_media
+                FOR EACH ROW EXECUTE FUNCTION media_search_vector_update()
+                """,
+                "UPDATE media_media SET search_vector = NULL",
+            ],
+            reverse_sql=[
+                "DROP TRIGGER media_search_vector_trigger ON media_media",
+                "DROP FUNCTION media_search_vector_update()",
+            ],
+        ),
+    ]
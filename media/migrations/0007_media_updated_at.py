@@ -0,0 +1,20 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0006_media_title_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text="When the media was last edited, which doesn't include changes to the running list totals above"),
+            preserve_default=False,
+        ),
+    ]
@@ -1,7 +1,13 @@
-from typing import Dict
+from decimal import Decimal
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, List, FrozenSet
 
-from django.db import models, transaction, IntegrityError
-from django.db.models import Q
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, connection, transaction, IntegrityError
+from django.db.models import Q, F, Value, ExpressionWrapper
+from django.db.models.functions import Least, Greatest, NullIf, Coalesce, Round, Upper
 
 BBFC_RATINGS = [
     ('TBC', "Not yet rated"),
@@ -26,6 +32,15 @@ class Media(models.Model):
     ]
     SEQUEL = 'S'
     RELATED = 'R'
+    SEQUELS = 'sequels'
+    PREQUELS = 'prequels'
+    RELATED_MEDIA = 'related'
+    MAX_CHAIN_DEPTH = 100
+    SUBTYPE_FIELDS = {
+        FILM: 'film',
+        SERIES: 'series',
+        BOOK: 'book'
+    }
 
     media_type = models.CharField(max_length=1, choices=MEDIA_TYPES, blank=False, default=None)
     title = models.CharField(max_length=250, default=None)
@@ -34,9 +49,26 @@ class Media(models.Model):
     description = models.TextField(null=True, blank=True)
     score = models.DecimalField(max_digits=4, decimal_places=2, default=0)
     members = models.IntegerField(default=0)
+    scored_members = models.IntegerField(default=0, help_text="The number of members who have scored this media")
+    score_total = models.DecimalField(max_digits=14, decimal_places=1, default=0,
+                                      help_text="The sum of all members' scores, the numerator of score")
     related_media = models.ManyToManyField('self', blank=True,
                                            through='RelatedMedia', through_fields=('media1', 'media2'),
                                            help_text="Any media related to this but not before or after it")
+    search_vector = SearchVectorField(null=True, editable=False,
+                                      help_text="Weighted full text of the titles and description, kept up to date "
+                                                "by a database trigger")
+    updated_at = models.DateTimeField(auto_now=True, help_text="When the media was last edited, which doesn't include "
+                                                               "changes to the running list totals above")
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='media_search_vector_idx'),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='media_title_trgm_idx'),
+            GinIndex(fields=['local_title'], opclasses=['gin_trgm_ops'], name='media_local_title_trgm_idx'),
+            # Serves title__istartswith, which compares UPPER(title) with LIKE
+            models.Index(OpClass(Upper('title'), name='text_pattern_ops'), name='media_title_prefix_idx')
+        ]
 
     @staticmethod
     def create_film(**kwargs):
@@ -50,6 +82,20 @@ class Media(models.Model):
     def create_book(**kwargs):
         return Media._create_media(Book, **kwargs)
 
+    @staticmethod
+    def apply_list_change(pk, *, members=0, scored_members=0, score_total=0):
+        """Adds the given deltas to the running totals of a Media, and recomputes its mean score from them"""
+        new_scored_members = F('scored_members') + scored_members
+        new_score_total = F('score_total') + score_total
+        mean_score = ExpressionWrapper(new_score_total / NullIf(new_scored_members, 0),
+                                       output_field=models.DecimalField())
+        Media.objects.filter(pk=pk).update(
+            members=F('members') + members,
+            scored_members=new_scored_members,
+            score_total=new_score_total,
+            score=Coalesce(Round(mean_score, 2), Value(Decimal(0)))
+        )
+
     def add_sequel(self, sequel):
         self.add_related_media(sequel, relationship=Media.SEQUEL)
 
@@ -59,12 +105,61 @@ class Media(models.Model):
     def add_related_media(self, media1, *, relationship=RELATED, media2=None):
         if media2 is None:
             media2 = self
-        if RelatedMedia.objects.filter(Q(media1=media1) & Q(media2=media2) | Q(media2=media1) & Q(media1=media2)):
-            raise IntegrityError(f"Key pair ({media1.pk}, {media2.pk}) already exists, remove it first")
-        RelatedMedia.objects.create(media1=media1, media2=media2, relationship=relationship)
+        try:
+            with transaction.atomic():
+                RelatedMedia.objects.create(media1=media1, media2=media2, relationship=relationship)
+        except IntegrityError as e:
+            if RelatedMedia.UNIQUE_PAIR_CONSTRAINT in str(e):
+                raise IntegrityError(f"Key pair ({media1.pk}, {media2.pk}) already exists, remove it first") from e
+            raise
+        self.__dict__.pop('_relations_cache', None)
+
+    @staticmethod
+    def bulk_add_related_media(edges, batch_size=1000) -> int:
+        """
+        Adds RelatedMedia from an iterable of (media1, media2, relationship) tuples, where media1 and media2 are Media
+        or primary keys, batch_size at a time. Like add_related_media a pair of Media may only be related once in
+        either direction, so pairs seen earlier in the stream or already in the table are skipped. RELATED pairs have
+        no direction and are stored with the lower primary key as media1. Returns the number of RelatedMedia added
+        """
+        edges = iter(edges)
+        seen = set()
+        added = 0
+        while batch := list(islice(edges, batch_size)):
+            added += Media._bulk_add_related_batch(batch, seen)
+        return added
+
+    @staticmethod
+    def _bulk_add_related_batch(edges, seen) -> int:
+        rows = []
+        for media1, media2, relationship in edges:
+            media1_id = getattr(media1, 'pk', media1)
+            media2_id = getattr(media2, 'pk', media2)
+            if media1_id == media2_id:
+                continue
+            if relationship == Media.RELATED and media1_id > media2_id:
+                media1_id, media2_id = media2_id, media1_id
+            key = (min(media1_id, media2_id), max(media1_id, media2_id))
+            if key not in seen:
+                seen.add(key)
+                rows.append((media1_id, media2_id, relationship))
+        if not rows:
+            return 0
+
+        # Pairs already in the table conflict on RELATED_MEDIA_UNIQUE_PAIR and are skipped, and the row count is
+        # what was actually inserted, which bulk_create(ignore_conflicts=True) doesn't report
+        placeholders = ', '.join(['(%s, %s, %s)'] * len(rows))
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {RelatedMedia._meta.db_table} (media1_id, media2_id, relationship)
+                VALUES {placeholders}
+                ON CONFLICT DO NOTHING
+            """, [value for row in rows for value in row])
+            return cursor.rowcount
 
     def delete_related_media(self, media):
         RelatedMedia.objects.get(Q(media1=self) & Q(media2=media) | Q(media2=self) & Q(media1=media)).delete()
+        self.__dict__.pop('_relations_cache', None)
 
     def get_sequels(self):
         """Gets a QuerySet of Media objects to which self is a prequel, or which are sequel to self"""
@@ -82,24 +177,136 @@ class Media(models.Model):
             (Q(media1=self) | Q(media2=self)) & Q(relationship=Media.RELATED))
         return self._get_related_from_qs(qs)
 
+    def get_relations(self) -> Dict[str, List['Media']]:
+        """Gets the sequels, prequels and related media of self grouped by relationship, using a single query"""
+        if not hasattr(self, '_relations_cache'):
+            Media.prefetch_relations([self])
+        return self._relations_cache
+
+    @staticmethod
+    def prefetch_relations(media_items) -> List['Media']:
+        """Fetches the relations of every Media in media_items with one query, caching them for get_relations"""
+        media_items = list(media_items)
+        media_by_pk = {media.pk: media for media in media_items}
+        for media in media_items:
+            media._relations_cache = {Media.SEQUELS: [], Media.PREQUELS: [], Media.RELATED_MEDIA: []}
+        if not media_by_pk:
+            return media_items
+
+        relations = RelatedMedia.objects \
+            .filter(Q(media1__in=media_by_pk.keys()) | Q(media2__in=media_by_pk.keys())) \
+            .select_related('media1', 'media2') \
+            .order_by('pk')
+        for relation in relations:
+            if relation.media1_id == relation.media2_id:
+                continue
+            is_sequel = relation.relationship == Media.SEQUEL
+            if relation.media2_id in media_by_pk:
+                key = Media.SEQUELS if is_sequel else Media.RELATED_MEDIA
+                media_by_pk[relation.media2_id]._relations_cache[key].append(relation.media1)
+            if relation.media1_id in media_by_pk:
+                key = Media.PREQUELS if is_sequel else Media.RELATED_MEDIA
+                media_by_pk[relation.media1_id]._relations_cache[key].append(relation.media2)
+        return media_items
+
+    def get_chain(self, direction=SEQUELS, max_depth=MAX_CHAIN_DEPTH):
+        """
+        Gets every Media reachable from self by following SEQUEL relationships in a single direction, in one query,
+        nearest first. Each Media has a `distance` attribute holding its hops from self, negative for prequels
+        """
+        steps = {Media.SEQUELS: 1, Media.PREQUELS: -1}
+        if direction not in steps:
+            raise ValueError(f"Invalid chain direction {direction!r}")
+        return self._get_chain([steps[direction]], max_depth, order=steps[direction])
+
+    def get_franchise(self, max_depth=MAX_CHAIN_DEPTH):
+        """
+        Gets the whole SEQUEL chain containing self in one query, ordered from the first prequel to the last sequel.
+        Each Media has a `distance` attribute, negative for prequels, 0 for self and positive for sequels
+        """
+        return self._get_chain([-1, 1], max_depth, include_self=True)
+
+    def _get_chain(self, steps, max_depth, include_self=False, order=1):
+        """
+        Walks the SEQUEL graph from self with a recursive CTE. A step of 1 follows sequels and -1 follows prequels,
+        paths which revisit a Media are cut off to protect against cycles, and each Media is kept at its shortest
+        distance
+        """
+        media_table = Media._meta.db_table
+        related_table = RelatedMedia._meta.db_table
+        seeds = " UNION ALL ".join("SELECT %s::bigint, 0, %s, ARRAY[%s::bigint]" for _ in steps)
+        seed_params = [param for step in steps for param in (self.pk, step, self.pk)]
+        sql = f"""
+            WITH RECURSIVE chain(media_id, distance, step, path) AS (
+                {seeds}
+              UNION ALL
+                SELECT next.media_id, chain.distance + chain.step, chain.step, chain.path || next.media_id
+                FROM chain
+                JOIN {related_table} relation ON relation.relationship = %s AND (
+                    (chain.step = 1 AND relation.media2_id = chain.media_id) OR
+                    (chain.step = -1 AND relation.media1_id = chain.media_id))
+                CROSS JOIN LATERAL (SELECT CASE WHEN chain.step = 1 THEN relation.media1_id
+                                                ELSE relation.media2_id END AS media_id) next
+                WHERE abs(chain.distance) < %s AND NOT next.media_id = ANY(chain.path)
+            ), shortest AS (
+                SELECT DISTINCT ON (media_id) media_id, distance
+                FROM chain
+                ORDER BY media_id, abs(distance), distance
+            )
+            SELECT media.*, shortest.distance
+            FROM shortest
+            JOIN {media_table} media ON media.id = shortest.media_id
+            WHERE shortest.distance <> 0 OR %s
+            ORDER BY shortest.distance * %s, media.id
+        """
+        return Media.objects.raw(sql, [*seed_params, Media.SEQUEL, max_depth, include_self, order])
+
     def _get_related_from_qs(self, qs):
         """Gets a QuerySet of Media objects from a QuerySet of RelatedMedia objects, excluding the current object"""
-        ids = set(qs.values_list('media1', flat=True)).union(set(qs.values_list('media2', flat=True)))
-        return Media.objects.filter(pk__in=ids).exclude(pk=self.pk)
+        return Media.objects \
+            .filter(Q(pk__in=qs.values('media1')) | Q(pk__in=qs.values('media2'))) \
+            .exclude(pk=self.pk)
+
+    @staticmethod
+    def bulk_create_media(model, rows, batch_size=1000) -> int:
+        """
+        Creates Media and their Film/Series/Book rows from an iterable of keyword argument dicts, as accepted by
+        create_film/create_series/create_book. Rows are consumed lazily and inserted batch_size at a time, each batch in
+        its own transaction. Returns the number of Media created
+        """
+        rows = iter(rows)
+        created = 0
+        while batch := list(islice(rows, batch_size)):
+            Media._bulk_create_batch(model, batch)
+            created += len(batch)
+        return created
+
+    @staticmethod
+    @transaction.atomic
+    def _bulk_create_batch(model, rows):
+        media_type = Media._get_media_type(model)
+        split_rows = [Media._split_args(model, **row) for row in rows]
+        media_items = Media.objects.bulk_create(
+            [Media(media_type=media_type, **media_args) for media_args, _ in split_rows])
+        model.objects.bulk_create(
+            [model(media=media, **model_args) for media, (_, model_args) in zip(media_items, split_rows)])
 
     @staticmethod
     @transaction.atomic
     def _create_media(model, **kwargs):
-        types = {Film: Media.FILM, Series: Media.SERIES, Book: Media.BOOK}
         media_args, model_args = Media._split_args(model, **kwargs)
-        media = Media.objects.create(media_type=types[model], **media_args)
+        media = Media.objects.create(media_type=Media._get_media_type(model), **media_args)
         model.objects.create(media=media, **model_args)
         return media
 
+    @staticmethod
+    def _get_media_type(model) -> str:
+        return {Film: Media.FILM, Series: Media.SERIES, Book: Media.BOOK}[model]
+
     @staticmethod
     def _split_args(model, **kwargs) -> (Dict, Dict):
         media_args, type_args = dict(), dict()
-        type_fields = [field.name for field in model._meta.fields]
+        type_fields = Media._get_type_fields(model)
         for arg, value in kwargs.items():
             if arg in type_fields:
                 type_args[arg] = value
@@ -107,6 +314,11 @@ class Media(models.Model):
                 media_args[arg] = value
         return media_args, type_args
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_type_fields(model) -> FrozenSet[str]:
+        return frozenset(field.name for field in model._meta.fields)
+
     def __repr__(self):
         return f"<{self.__class__.__name__}[title={self.title!r}, type={self.get_media_type_display()!r}]>"
 
@@ -114,7 +326,12 @@ class Media(models.Model):
         return self.title
 
 
+# Module level so that RelatedMedia.Meta, whose body can't see RelatedMedia's attributes, can use it too
+RELATED_MEDIA_UNIQUE_PAIR = 'unique_related_media_pair'
+
+
 class RelatedMedia(models.Model):
+    UNIQUE_PAIR_CONSTRAINT = RELATED_MEDIA_UNIQUE_PAIR
     RELATIONSHIPS = [
         (Media.SEQUEL, "Sequel"),
         (Media.RELATED, "Related")
@@ -127,7 +344,15 @@ class RelatedMedia(models.Model):
                                               "i.e. SEQUEL if media1 is the SEQUEL to media2")
 
     class Meta:
-        unique_together = ['media1', 'media2']
+        constraints = [
+            # A pair of Media may only be related once, in either direction
+            models.UniqueConstraint(Least('media1', 'media2'), Greatest('media1', 'media2'),
+                                    name=RELATED_MEDIA_UNIQUE_PAIR)
+        ]
+        indexes = [
+            models.Index(fields=['media1', 'relationship'], name='related_media1_relation_idx'),
+            models.Index(fields=['media2', 'relationship'], name='related_media2_relation_idx')
+        ]
 
     def __repr__(self):
         return f"{self.__class__.__name__}(media1={self.media1.title!r}" \
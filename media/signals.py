@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from media.models import Media, Book, Film, Series
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Series)
+@receiver(post_save, sender=Book)
+def touch_media(sender, instance, created, raw=False, **kwargs):
+    """A film's runtime or a series' episodes are shown as part of its Media, so editing them edits the Media too"""
+    # A new subtype is created along with its Media
+    if not created and not raw:
+        Media.objects.filter(pk=instance.media_id).update(updated_at=timezone.now())
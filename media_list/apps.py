@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MediaListConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'media_list'
+
+    def ready(self):
+        from media_list import signals  # noqa: F401
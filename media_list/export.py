@@ -0,0 +1,59 @@
+"""
+Streaming export of a user's list. Entries are read through a server-side cursor joined to their media, and
+serialised a row at a time, so memory use doesn't grow with the size of the list
+"""
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
+
+from accounts.models import User
+from media.models import Media
+from media_list.models import ListEntry
+from utils.data_files import write_rows
+
+EXPORT_FORMATS = ['csv', 'jsonl', 'xml']
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/jsonl',
+    'xml': 'application/xml'
+}
+EXPORT_FIELDS = ['media_id', 'title', 'media_type', 'score', 'progress', 'updated_at']
+EXPORT_CHUNK_SIZE = 2000
+
+
+def export_rows(user: User, media_type: Optional[str] = None) -> Iterator[dict]:
+    entries = ListEntry.objects.filter(user=user)
+    if media_type is not None:
+        entries = entries.filter(media__media_type=media_type)
+    entries = entries \
+        .order_by('pk') \
+        .values_list('media_id', 'media__title', 'media__media_type', 'score', 'progress', 'updated_at')
+    for media_id, title, entry_type, score, progress, updated_at in entries.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {
+            'media_id': media_id,
+            'title': title,
+            'media_type': Media.SUBTYPE_FIELDS[entry_type],
+            'score': score,
+            'progress': progress,
+            'updated_at': updated_at
+        }
+
+
+def write_xml(user: User, rows: Iterator[dict]) -> Iterator[str]:
+    """Writes rows in the style of a MyAnimeList export, one <entry> per line"""
+    yield '<?xml version="1.0" encoding="UTF-8" ?>\n<mymedialist>\n'
+    yield f"  <myinfo><user_name>{escape(user.username)}</user_name></myinfo>\n"
+    for row in rows:
+        yield (
+            f"  <entry><media_id>{row['media_id']}</media_id><title>{escape(row['title'])}</title>"
+            f"<media_type>{row['media_type']}</media_type><my_score>{row['score'] or 0}</my_score>"
+            f"<my_progress>{row['progress']}</my_progress>"
+            f"<updated_at>{row['updated_at'].isoformat()}</updated_at></entry>\n"
+        )
+    yield '</mymedialist>\n'
+
+
+def stream_export(user: User, media_type: Optional[str], file_format: str) -> Iterator[str]:
+    rows = export_rows(user, media_type)
+    if file_format == 'xml':
+        return write_xml(user, rows)
+    return write_rows(rows, EXPORT_FIELDS, file_format)
@@ -0,0 +1,182 @@
+"""
+Bulk import of list entries, from other trackers or from an export. Rows give a media_id or a title, optionally a
+media_type, and a score and progress. Each batch of rows is matched to media with one query and upserted with one
+INSERT ... ON CONFLICT, which skips ListEntry signals, so list stats, media totals and list rows are rebuilt once at
+the end
+"""
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Upper
+
+from accounts.models import User
+from media.models import Media
+from media_list.models import ListEntry, ListRow, UserListStats
+from utils import page_cache, db_router
+
+IMPORT_BATCH_SIZE = 1000
+MAX_SCORE = Decimal(10)
+# The largest value of an IntegerField in Postgres
+MAX_PROGRESS = 2 ** 31 - 1
+MEDIA_TYPES = {name: media_type for media_type, name in Media.SUBTYPE_FIELDS.items()}
+# The types each field may have in a row, as read from CSV (strings) or JSON lines (anything)
+ROW_FIELD_TYPES = {
+    'media_id': (int, str),
+    'title': (str,),
+    'media_type': (str,),
+    'score': (int, float, Decimal, str),
+    'progress': (int, float, str),
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.errors: List[Tuple[int, str]] = []
+        self.media_ids = set()
+
+
+def import_rows(user: User, rows: Iterable[dict], *, media_type: str = None, batch_size=IMPORT_BATCH_SIZE,
+                progress: Callable[[ImportResult], None] = None) -> ImportResult:
+    """
+    Adds or updates the user's list entries from rows, batch_size at a time, each batch in its own transaction.
+    Rows that can't be imported are skipped and recorded in the result's errors by row number, counting from 1.
+    When media_type is given, titles are only matched to media of that type. Errors reading rows are raised, after
+    the batches before them have been imported
+    """
+    result = ImportResult()
+    numbered_rows = enumerate(rows, start=1)
+    try:
+        while batch := list(islice(numbered_rows, batch_size)):
+            _import_batch(user, batch, media_type, result)
+            result.processed += len(batch)
+            if progress is not None:
+                progress(result)
+    finally:
+        # Earlier batches are committed even if reading the rest of the file fails
+        if result.media_ids:
+            with transaction.atomic():
+                UserListStats.rebuild(user)
+                ListEntry.recompute_media_stats(result.media_ids)
+                ListRow.refresh(user_ids=[user.pk], media_ids=result.media_ids)
+            page_cache.bump_versions([page_cache.user_namespace(user.pk)])
+            db_router.pin_to_primary(user.pk)
+    return result
+
+
+@transaction.atomic
+def _import_batch(user: User, batch: List[Tuple[int, dict]], media_type: Optional[str], result: ImportResult):
+    errors = []
+    valid_rows = []
+    for number, row in batch:
+        try:
+            _check_row(row)
+            valid_rows.append((number, row))
+        except ValueError as e:
+            errors.append((number, str(e)))
+
+    by_id, by_title = _match_media([row for _, row in valid_rows], media_type)
+    entries: Dict[int, ListEntry] = {}
+    for number, row in valid_rows:
+        try:
+            media_id = _find_media(row, by_id, by_title, media_type)
+            entries[media_id] = ListEntry(user=user, media_id=media_id, score=_parse_score(row.get('score')),
+                                          progress=_parse_progress(row.get('progress')))
+        except ValueError as e:
+            errors.append((number, str(e)))
+    result.errors.extend(sorted(errors))
+
+    # Later rows for the same media win, as one INSERT can't update a row twice
+    ListEntry.objects.bulk_create(entries.values(), update_conflicts=True, unique_fields=['user', 'media'],
+                                  update_fields=['score', 'progress', 'updated_at'])
+    result.imported += len(entries)
+    result.media_ids.update(entries)
+
+
+def _check_row(row):
+    """Checks that a row is an object whose fields have the types in ROW_FIELD_TYPES, which the rest relies on"""
+    if not isinstance(row, dict):
+        raise ValueError(f"Expected an object, not {type(row).__name__}")
+    for field, types in ROW_FIELD_TYPES.items():
+        value = row.get(field)
+        # bool is an int, but never a valid id, score or progress
+        if value is not None and (isinstance(value, bool) or not isinstance(value, types)):
+            raise ValueError(f"Invalid {field} {value!r}")
+
+
+def _match_media(rows: List[dict], media_type: Optional[str]):
+    """Looks up the media of a batch of rows in one query, by id and by case insensitive title"""
+    ids = {str(row['media_id']) for row in rows if row.get('media_id')}
+    titles = {row['title'].upper() for row in rows if not row.get('media_id') and row.get('title')}
+    title_query = Q(title_key__in=titles)
+    if media_type is not None:
+        title_query &= Q(media_type=media_type)
+    matches = Media.objects \
+        .annotate(title_key=Upper('title')) \
+        .filter(Q(pk__in=[int(pk) for pk in ids if pk.isdigit()]) | title_query) \
+        .values_list('pk', 'title_key', 'media_type')
+
+    by_id, by_title = {}, {}
+    for pk, title_key, matched_type in matches:
+        by_id[pk] = matched_type
+        by_title.setdefault(title_key, []).append((pk, matched_type))
+    return by_id, by_title
+
+
+def _find_media(row: dict, by_id: dict, by_title: dict, media_type: Optional[str]) -> int:
+    row_type = row.get('media_type')
+    if row_type is not None and row_type not in MEDIA_TYPES:
+        raise ValueError(f"Unknown media type {row_type!r}")
+    wanted_type = MEDIA_TYPES.get(row_type, media_type)
+
+    if row.get('media_id'):
+        media_id = str(row['media_id'])
+        if not media_id.isdigit() or int(media_id) not in by_id:
+            raise ValueError(f"No media with id {row['media_id']}")
+        if wanted_type is not None and by_id[int(media_id)] != wanted_type:
+            raise ValueError(f"Media {media_id} is not a {row_type or Media.SUBTYPE_FIELDS[media_type]}")
+        return int(media_id)
+
+    title = row.get('title')
+    if not title:
+        raise ValueError("Missing media_id or title")
+    candidates = [pk for pk, matched_type in by_title.get(title.upper(), [])
+                  if wanted_type is None or matched_type == wanted_type]
+    if not candidates:
+        raise ValueError(f"No media titled {title!r}")
+    if len(candidates) > 1:
+        raise ValueError(f"More than one media titled {title!r}, give a media_type or media_id")
+    return candidates[0]
+
+
+def _parse_score(value) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    try:
+        score = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Invalid score {value!r}")
+    if not score.is_finite():
+        raise ValueError(f"Invalid score {value!r}")
+    score = score.quantize(Decimal("0.1"))
+    if not 0 <= score <= MAX_SCORE:
+        raise ValueError(f"Score {value} is not between 0 and {MAX_SCORE}")
+    return score
+
+
+def _parse_progress(value) -> int:
+    if value is None or value == "":
+        return 0
+    try:
+        progress = int(value)
+    except (ValueError, TypeError, OverflowError):
+        raise ValueError(f"Invalid progress {value!r}")
+    if progress < 0:
+        raise ValueError(f"Progress {value} is negative")
+    if progress > MAX_PROGRESS:
+        raise ValueError(f"Progress {value} is more than {MAX_PROGRESS}")
+    return progress
@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand, CommandError
+
+from accounts.models import User
+from media.models import Media
+from media_list.export import EXPORT_FORMATS, stream_export
+
+MEDIA_TYPES = {name: media_type for media_type, name in Media.SUBTYPE_FIELDS.items()}
+
+
+class Command(BaseCommand):
+    help = "Exports a user's list as CSV, JSON lines or XML, streaming entries so that memory use stays constant"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--type', choices=MEDIA_TYPES.keys(), dest='media_type',
+                            help="Only export entries of this type, rather than the whole list")
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', dest='file_format')
+        parser.add_argument('--output', default='-', help="The file to write, or - to write to stdout")
+
+    def handle(self, *args, username, media_type, file_format, output, **options):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f"No user with username {username!r}")
+
+        lines = stream_export(user, MEDIA_TYPES.get(media_type), file_format)
+        if output == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+        else:
+            with open(output, 'w', newline='', encoding='utf-8') as file:
+                file.writelines(lines)
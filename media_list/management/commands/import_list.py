@@ -0,0 +1,39 @@
+import time
+
+from django.core.management import CommandError
+
+from accounts.models import User
+from media_list.importer import IMPORT_BATCH_SIZE, MEDIA_TYPES, import_rows
+from utils.commands import RowsImportCommand
+
+
+class Command(RowsImportCommand):
+    help = "Adds or updates a user's list entries from a CSV or JSON lines file, matching media by id or title"
+
+    default_batch_size = IMPORT_BATCH_SIZE
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        super().add_arguments(parser)
+        parser.add_argument('--type', choices=MEDIA_TYPES.keys(), dest='media_type',
+                            help="Only match titles to media of this type")
+
+    def handle(self, *args, username, path, media_type, file_format, batch_size, **options):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f"No user with username {username!r}")
+
+        start = time.perf_counter()
+        with self.open_rows(path, file_format) as rows:
+            result = import_rows(user, rows, media_type=MEDIA_TYPES.get(media_type), batch_size=batch_size,
+                                 progress=self.progress)
+        elapsed = time.perf_counter() - start
+
+        for number, error in result.errors:
+            self.stderr.write(f"Row {number}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.imported} entries in {elapsed:.2f}s, {len(result.errors)} rows skipped"))
+
+    def progress(self, result):
+        self.stdout.write(f"Processed {result.processed} rows")
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management import BaseCommand
+
+from media_list.models import ListEntry
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the members and score of every Media from list entries, repairing the incrementally kept totals"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = ListEntry.recompute_media_stats()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Recomputed media stats in {elapsed:.2f}s, {updated} media changed"))
@@ -0,0 +1,15 @@
+import time
+
+from django.core.management import BaseCommand
+
+from media_list.models import ListRow
+
+
+class Command(BaseCommand):
+    help = "Rebuilds every list row from list entries and their media, repairing the incrementally kept copies"
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = ListRow.refresh()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Refreshed list rows in {elapsed:.2f}s, {updated} rows changed"))
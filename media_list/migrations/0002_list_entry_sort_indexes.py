@@ -0,0 +1,23 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:01
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_list', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='listentry',
+            index=models.Index(models.F('user'), django.db.models.functions.comparison.Coalesce('score', models.Value(Decimal('0'))), models.F('id'), name='list_entry_user_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listentry',
+            index=models.Index(fields=['user', 'progress', 'id'], name='list_entry_user_progress_idx'),
+        ),
+    ]
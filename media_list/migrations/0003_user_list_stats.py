@@ -0,0 +1,43 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('media_list', '0002_list_entry_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserListStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_type', models.CharField(choices=[('F', 'Film'), ('S', 'Series'), ('B', 'Book')], max_length=1)),
+                ('entries', models.IntegerField(default=0)),
+                ('scored_entries', models.IntegerField(default=0)),
+                ('score_total', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('progress_total', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'media_type')},
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO media_list_userliststats
+                    (user_id, media_type, entries, scored_entries, score_total, progress_total)
+                SELECT entry.user_id, media.media_type, COUNT(*), COUNT(entry.score),
+                       COALESCE(SUM(entry.score), 0), COALESCE(SUM(entry.progress), 0)
+                FROM media_list_listentry entry
+                JOIN media_media media ON media.id = entry.media_id
+                GROUP BY entry.user_id, media.media_type
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
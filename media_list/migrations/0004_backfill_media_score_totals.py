@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0004_media_score_totals'),
+        ('media_list', '0003_user_list_stats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                UPDATE media_media AS media
+                SET members = totals.members,
+                    scored_members = totals.scored_members,
+                    score_total = totals.score_total,
+                    score = COALESCE(ROUND(totals.score_total / NULLIF(totals.scored_members, 0), 2), 0)
+                FROM (
+                    SELECT entry.media_id, COUNT(*) AS members, COUNT(entry.score) AS scored_members,
+                           COALESCE(SUM(entry.score), 0) AS score_total
+                    FROM media_list_listentry entry
+                    GROUP BY entry.media_id
+                ) AS totals
+                WHERE media.id = totals.media_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
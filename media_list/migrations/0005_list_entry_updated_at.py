@@ -0,0 +1,24 @@
+# Generated by Django 4.1.13 on 2026-10-18 16:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media_list', '0004_backfill_media_score_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='listentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='listentry',
+            index=models.Index(fields=['user', 'updated_at'], name='list_entry_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.1.13 on 2026-10-18 14:56
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('media', '0007_media_updated_at'),
+        ('media_list', '0005_list_entry_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListRow',
+            fields=[
+                ('entry', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='row', serialize=False, to='media_list.listentry')),
+                ('media_type', models.CharField(choices=[('F', 'Film'), ('S', 'Series'), ('B', 'Book')], max_length=1)),
+                ('title', models.CharField(max_length=250)),
+                ('score', models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True)),
+                ('progress', models.IntegerField(default=0)),
+                ('progress_total', models.IntegerField(null=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='listrow',
+            index=models.Index(fields=['user', 'media_type', 'title', 'entry'], name='list_row_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listrow',
+            index=models.Index(models.F('user'), models.F('media_type'), django.db.models.functions.comparison.Coalesce('score', models.Value(Decimal('0'))), models.F('entry'), name='list_row_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listrow',
+            index=models.Index(fields=['user', 'media_type', 'progress', 'entry'], name='list_row_progress_idx'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO media_list_listrow (entry_id, user_id, media_type, title, score, progress, progress_total)
+                SELECT entry.id, entry.user_id, media.media_type, media.title, entry.score, entry.progress,
+                       CASE media.media_type WHEN 'F' THEN film.runtime WHEN 'S' THEN series.episodes
+                                             WHEN 'B' THEN book.chapters END
+                FROM media_list_listentry entry
+                JOIN media_media media ON media.id = entry.media_id
+                LEFT JOIN media_film film ON film.media_id = media.id
+                LEFT JOIN media_series series ON series.media_id = media.id
+                LEFT JOIN media_book book ON book.media_id = media.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,18 +1,40 @@
-from django.db import models
-from django.db.models import Q
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models, connection, transaction
+from django.db.models import Q, F, Value, QuerySet, Count, Sum, Max
+from django.db.models.functions import Coalesce, Greatest
 
 from accounts.models import User
-from media.models import Media
+from media.models import Media, Book, Film, Series
 
 
 class ListEntry(models.Model):
+    SORT_TITLE = 'title'
+    SORT_SCORE = 'score'
+    SORT_PROGRESS = 'progress'
+    # Sort keys are never null, so that list pages can be paginated by their values
+    SORT_KEYS = {
+        SORT_TITLE: F('media__title'),
+        SORT_SCORE: Coalesce('score', Value(Decimal(0))),
+        SORT_PROGRESS: F('progress')
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     media = models.ForeignKey(Media, on_delete=models.CASCADE)
     score = models.DecimalField(null=True, blank=True, decimal_places=1, max_digits=3)
     progress = models.IntegerField(default=0, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['user', 'media']
+        indexes = [
+            models.Index('user', Coalesce('score', Value(Decimal(0))), 'id', name='list_entry_user_score_idx'),
+            models.Index(fields=['user', 'progress', 'id'], name='list_entry_user_progress_idx'),
+            models.Index(fields=['user', 'updated_at'], name='list_entry_user_updated_idx')
+        ]
 
     @classmethod
     def get_user_film_list(cls, user: User):
@@ -26,6 +48,111 @@ class ListEntry(models.Model):
     def get_user_book_list(cls, user: User):
         return cls._get_user_list_entries(user, media_type=Media.BOOK)
 
+    @classmethod
+    def get_user_lists(cls, user: User, sort=SORT_TITLE, order='asc') -> Dict[str, List['ListEntry']]:
+        """
+        Gets all of a user's lists with one query, joining every subtype, as a list of entries per media type ordered
+        by one of the SORT_KEYS. Every media type has a list, empty if the user has no entries of that type
+        """
+        prefix = '-' if order == 'desc' else ''
+        entries = cls.sort_entries(cls._get_user_list_entries(user), sort).order_by(f"{prefix}sort_key", f"{prefix}pk")
+        lists = {media_type: [] for media_type, _ in Media.MEDIA_TYPES}
+        for entry in entries:
+            lists[entry.media.media_type].append(entry)
+        return lists
+
+    @classmethod
+    def get_list_state(cls, user: User, media_type=None, *, with_media=False) -> (Optional[datetime], int):
+        """
+        Gets when a user's list entries, or those of one media type, last changed, and how many there are, in one
+        query. Changes to the entries' media are included for a media type or with_media. Deleting an entry only changes
+        the count, so both are needed to tell if a list changed
+        """
+        entries, aggregates = cls._list_state_query(user, media_type, with_media)
+        state = entries.aggregate(**aggregates)
+        return state['last_modified'], state['count']
+
+    @classmethod
+    async def aget_list_state(cls, user: User, media_type=None, *, with_media=False) -> (Optional[datetime], int):
+        entries, aggregates = cls._list_state_query(user, media_type, with_media)
+        state = await entries.aaggregate(**aggregates)
+        return state['last_modified'], state['count']
+
+    @classmethod
+    def _list_state_query(cls, user: User, media_type=None, with_media=False) -> (QuerySet, Dict):
+        entries = cls.objects.filter(user=user)
+        last_modified = Max('updated_at')
+        if media_type is not None:
+            entries = entries.filter(media__media_type=media_type)
+        if media_type is not None or with_media:
+            last_modified = Max(Greatest('updated_at', 'media__updated_at'))
+        return entries, {'last_modified': last_modified, 'count': Count('id')}
+
+    @classmethod
+    def sort_entries(cls, entries: QuerySet, sort: str) -> QuerySet:
+        """Annotates entries with a `sort_key` to order them by, for one of the SORT_KEYS"""
+        return entries.annotate(sort_key=cls.SORT_KEYS[sort])
+
+    @classmethod
+    def recompute_media_stats(cls, media_ids=None) -> int:
+        """
+        Rebuilds Media.members, scored_members, score_total and score from list entries in one set-based UPDATE, for
+        every Media or only those in media_ids. Returns the number of Media whose stats changed
+        """
+        media_table = Media._meta.db_table
+        entry_table = cls._meta.db_table
+        media_filter = "WHERE media.id = ANY(%s)" if media_ids is not None else ""
+        sql = f"""
+            UPDATE {media_table} AS media
+            SET members = totals.members,
+                scored_members = totals.scored_members,
+                score_total = totals.score_total,
+                score = totals.score
+            FROM (
+                SELECT grouped.*,
+                       COALESCE(ROUND(grouped.score_total / NULLIF(grouped.scored_members, 0), 2), 0) AS score
+                FROM (
+                    SELECT media.id, COUNT(entry.id) AS members, COUNT(entry.score) AS scored_members,
+                           COALESCE(SUM(entry.score), 0) AS score_total
+                    FROM {media_table} media
+                    LEFT JOIN {entry_table} entry ON entry.media_id = media.id
+                    {media_filter}
+                    GROUP BY media.id
+                ) AS grouped
+            ) AS totals
+            WHERE media.id = totals.id
+              AND (media.members, media.scored_members, media.score_total, media.score)
+                  IS DISTINCT FROM (totals.members, totals.scored_members, totals.score_total, totals.score)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [list(media_ids)] if media_ids is not None else [])
+            return cursor.rowcount
+
+    @property
+    def title(self):
+        """The title of the entry's media, so that list templates can show ListEntry and ListRow alike"""
+        return self.media.title
+
+    @property
+    def progress_total(self):
+        """The number of episodes, chapters or minutes of the entry's media, if known"""
+        total_fields = {Media.FILM: 'runtime', Media.SERIES: 'episodes', Media.BOOK: 'chapters'}
+        try:
+            subtype = getattr(self.media, Media.SUBTYPE_FIELDS[self.media.media_type])
+        except ObjectDoesNotExist:
+            return None
+        return getattr(subtype, total_fields[self.media.media_type])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_saved_values()
+        return instance
+
+    def remember_saved_values(self):
+        """Records the values last read from or written to the database, so that signal handlers can compute deltas"""
+        self._saved_values = {'media_id': self.media_id, 'score': self.score, 'progress': self.progress}
+
     def __str__(self):
         return f"<{self.__class__}: [{self.user}: [{self.media}]>"
 
@@ -34,5 +161,193 @@ class ListEntry(models.Model):
         query = Q(user=user)
         if media_type is not None:
             query = Q(media__media_type=media_type) & query
+            subtypes = [f"media__{Media.SUBTYPE_FIELDS[media_type]}"]
+        else:
+            subtypes = [f"media__{subtype}" for subtype in Media.SUBTYPE_FIELDS.values()]
+
+        return cls.objects.filter(query).select_related('media', *subtypes)
+
+
+class UserListStats(models.Model):
+    """
+    Running totals of a user's list for one media type. These are kept up to date from ListEntry signals, so bulk
+    operations which skip signals must call rebuild afterwards
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    media_type = models.CharField(max_length=1, choices=Media.MEDIA_TYPES)
+    entries = models.IntegerField(default=0)
+    scored_entries = models.IntegerField(default=0)
+    score_total = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    progress_total = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'media_type']
+
+    @property
+    def mean_score(self) -> Optional[Decimal]:
+        if not self.scored_entries:
+            return None
+        return round(self.score_total / self.scored_entries, 2)
+
+    @classmethod
+    def get_user_stats(cls, user: User) -> Dict[str, 'UserListStats']:
+        """Gets the stats of every media type for user in one query, with empty stats for types without entries"""
+        stats = {media_type: cls(user=user, media_type=media_type) for media_type, _ in Media.MEDIA_TYPES}
+        for user_stats in cls.objects.filter(user=user):
+            stats[user_stats.media_type] = user_stats
+        return stats
 
-        return cls.objects.filter(query)
+    @classmethod
+    async def aget_user_stats(cls, user: User) -> Dict[str, 'UserListStats']:
+        stats = {media_type: cls(user=user, media_type=media_type) for media_type, _ in Media.MEDIA_TYPES}
+        async for user_stats in cls.objects.filter(user=user):
+            stats[user_stats.media_type] = user_stats
+        return stats
+
+    @classmethod
+    def from_entries(cls, user: User, media_type: str, entries: List[ListEntry]) -> 'UserListStats':
+        """Computes unsaved stats from all of a user's entries of media_type, for pages that have fetched them anyway"""
+        scores = [entry.score for entry in entries if entry.score is not None]
+        return cls(user=user, media_type=media_type, entries=len(entries), scored_entries=len(scores),
+                   score_total=sum(scores, Decimal(0)), progress_total=sum(entry.progress for entry in entries))
+
+    @classmethod
+    def get_user_type_stats(cls, user: User, media_type: str) -> 'UserListStats':
+        return cls.objects.filter(user=user, media_type=media_type).first() or cls(user=user, media_type=media_type)
+
+    @classmethod
+    async def aget_user_type_stats(cls, user: User, media_type: str) -> 'UserListStats':
+        return await cls.objects.filter(user=user, media_type=media_type).afirst() \
+            or cls(user=user, media_type=media_type)
+
+    @classmethod
+    def apply_change(cls, user_id, media_type, *, create=True,
+                     entries=0, scored_entries=0, score_total=0, progress_total=0):
+        """Adds the given deltas to the stats of a user's media type, creating them first if create is set"""
+        changes = {
+            'entries': F('entries') + entries,
+            'scored_entries': F('scored_entries') + scored_entries,
+            'score_total': F('score_total') + score_total,
+            'progress_total': F('progress_total') + progress_total
+        }
+        stats = cls.objects.filter(user_id=user_id, media_type=media_type)
+        if not stats.update(**changes) and create:
+            cls.objects.get_or_create(user_id=user_id, media_type=media_type)
+            stats.update(**changes)
+
+    @classmethod
+    def rebuild(cls, user: User):
+        """Recomputes all of a user's stats from their list entries"""
+        totals = ListEntry.objects.filter(user=user).values('media__media_type').annotate(
+            entries=Count('pk'),
+            scored_entries=Count('score'),
+            score_total=Coalesce(Sum('score'), Value(Decimal(0))),
+            progress_total=Coalesce(Sum('progress'), Value(0))
+        )
+        with transaction.atomic():
+            cls.objects.filter(user=user).delete()
+            cls.objects.bulk_create([
+                cls(user=user, media_type=row['media__media_type'], entries=row['entries'],
+                    scored_entries=row['scored_entries'], score_total=row['score_total'],
+                    progress_total=row['progress_total'])
+                for row in totals
+            ])
+
+    @classmethod
+    def rebuild_all(cls):
+        """Recomputes every user's stats from list entries with one set-based INSERT, for after bulk loads"""
+        stats_table = cls._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {stats_table}")
+            cursor.execute(f"""
+                INSERT INTO {stats_table}
+                    (user_id, media_type, entries, scored_entries, score_total, progress_total)
+                SELECT entry.user_id, media.media_type, COUNT(*), COUNT(entry.score),
+                       COALESCE(SUM(entry.score), 0), COALESCE(SUM(entry.progress), 0)
+                FROM {ListEntry._meta.db_table} entry
+                JOIN {Media._meta.db_table} media ON media.id = entry.media_id
+                GROUP BY entry.user_id, media.media_type
+            """)
+
+    def __str__(self):
+        return f"<{self.__class__}: [{self.user}: [{self.get_media_type_display()}]>"
+
+
+class ListRow(models.Model):
+    """
+    A copy of a ListEntry with everything a list page shows of it and its media, so that large lists are read from
+    one narrow table instead of joining Media and a subtype. Rows are refreshed from ListEntry, Media and subtype
+    signals, so bulk writes which skip signals must call refresh afterwards. List pages read them when
+    settings.LIST_ROWS_ENABLED is set
+    """
+    SORT_KEYS = {
+        ListEntry.SORT_TITLE: F('title'),
+        ListEntry.SORT_SCORE: Coalesce('score', Value(Decimal(0))),
+        ListEntry.SORT_PROGRESS: F('progress')
+    }
+    PROGRESS_TOTAL_FIELDS = {Media.FILM: (Film, 'runtime'), Media.SERIES: (Series, 'episodes'),
+                             Media.BOOK: (Book, 'chapters')}
+
+    entry = models.OneToOneField(ListEntry, primary_key=True, on_delete=models.CASCADE, related_name='row')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    media_type = models.CharField(max_length=1, choices=Media.MEDIA_TYPES)
+    title = models.CharField(max_length=250)
+    score = models.DecimalField(null=True, blank=True, decimal_places=1, max_digits=3)
+    progress = models.IntegerField(default=0)
+    progress_total = models.IntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'media_type', 'title', 'entry'], name='list_row_title_idx'),
+            models.Index('user', 'media_type', Coalesce('score', Value(Decimal(0))), 'entry',
+                         name='list_row_score_idx'),
+            models.Index(fields=['user', 'media_type', 'progress', 'entry'], name='list_row_progress_idx')
+        ]
+
+    @classmethod
+    def get_user_rows(cls, user: User, media_type: str) -> QuerySet:
+        return cls.objects.filter(user=user, media_type=media_type)
+
+    @classmethod
+    def sort_entries(cls, rows: QuerySet, sort: str) -> QuerySet:
+        """Annotates rows with a `sort_key` to order them by, like ListEntry.sort_entries"""
+        return rows.annotate(sort_key=cls.SORT_KEYS[sort])
+
+    @classmethod
+    def refresh(cls, *, entry_ids=None, media_ids=None, user_ids=None) -> int:
+        """
+        Recomputes the rows of every list entry, or only of those in entry_ids, of media in media_ids and of users in
+        user_ids, with one INSERT ... ON CONFLICT. Returns the number of rows which were added or changed
+        """
+        filters = []
+        params = []
+        for column, ids in [('entry.id', entry_ids), ('entry.media_id', media_ids), ('entry.user_id', user_ids)]:
+            if ids is not None:
+                filters.append(f"{column} = ANY(%s)")
+                params.append(list(ids))
+        subtype_joins = []
+        progress_totals = []
+        for media_type, (model, field) in cls.PROGRESS_TOTAL_FIELDS.items():
+            alias = model._meta.model_name
+            subtype_joins.append(f"LEFT JOIN {model._meta.db_table} {alias} ON {alias}.media_id = media.id")
+            progress_totals.append(f"WHEN '{media_type}' THEN {alias}.{field}")
+        columns = ['user_id', 'media_type', 'title', 'score', 'progress', 'progress_total']
+        sql = f"""
+            INSERT INTO {cls._meta.db_table} AS list_row (entry_id, {", ".join(columns)})
+            SELECT entry.id, entry.user_id, media.media_type, media.title, entry.score, entry.progress,
+                   CASE media.media_type {" ".join(progress_totals)} END
+            FROM {ListEntry._meta.db_table} entry
+            JOIN {Media._meta.db_table} media ON media.id = entry.media_id
+            {" ".join(subtype_joins)}
+            {"WHERE " + " AND ".join(filters) if filters else ""}
+            ON CONFLICT (entry_id) DO UPDATE
+            SET {", ".join(f"{column} = EXCLUDED.{column}" for column in columns)}
+            WHERE ({", ".join(f"list_row.{column}" for column in columns)})
+                IS DISTINCT FROM ({", ".join(f"EXCLUDED.{column}" for column in columns)})
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def __str__(self):
+        return f"<{self.__class__}: [{self.user_id}: [{self.title}]>"
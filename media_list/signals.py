@@ -0,0 +1,89 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from media.models import Media, Book, Film, Series
+from media_list.models import ListEntry, ListRow, UserListStats
+
+
+def _entry_totals(score, progress, sign=1) -> dict:
+    return {
+        'entries': sign,
+        'scored_entries': sign if score is not None else 0,
+        'score_total': sign * (score or 0),
+        'progress_total': sign * (progress or 0)
+    }
+
+
+def _apply_media_change(media_id, totals: dict):
+    Media.apply_list_change(media_id, members=totals['entries'], scored_members=totals['scored_entries'],
+                            score_total=totals['score_total'])
+
+
+def _media_type(entry: ListEntry, media_id):
+    if media_id == entry.media_id:
+        return entry.media.media_type
+    return Media.objects.values_list('media_type', flat=True).get(pk=media_id)
+
+
+def _saved_values(entry: ListEntry) -> dict:
+    return getattr(entry, '_saved_values', None) or {
+        'media_id': entry.media_id, 'score': entry.score, 'progress': entry.progress}
+
+
+@receiver(post_save, sender=ListEntry)
+def update_stats_on_save(sender, instance: ListEntry, created, raw=False, **kwargs):
+    if raw:
+        return
+    saved = getattr(instance, '_saved_values', None)
+    new_totals = _entry_totals(instance.score, instance.progress)
+    if created:
+        UserListStats.apply_change(instance.user_id, instance.media.media_type, **new_totals)
+        _apply_media_change(instance.media_id, new_totals)
+    elif saved is None:
+        # The previous values are unknown, e.g. for an entry constructed with an existing pk
+        UserListStats.rebuild(instance.user)
+        ListEntry.recompute_media_stats([instance.media_id])
+    elif saved['media_id'] != instance.media_id:
+        old_totals = _entry_totals(saved['score'], saved['progress'], sign=-1)
+        UserListStats.apply_change(instance.user_id, _media_type(instance, saved['media_id']), create=False,
+                                   **old_totals)
+        _apply_media_change(saved['media_id'], old_totals)
+        UserListStats.apply_change(instance.user_id, instance.media.media_type, **new_totals)
+        _apply_media_change(instance.media_id, new_totals)
+    elif (saved['score'], saved['progress']) != (instance.score, instance.progress):
+        old_totals = _entry_totals(saved['score'], saved['progress'])
+        changes = {key: new_totals[key] - old_totals[key] for key in new_totals}
+        UserListStats.apply_change(instance.user_id, instance.media.media_type, **changes)
+        if saved['score'] != instance.score:
+            _apply_media_change(instance.media_id, changes)
+    instance.remember_saved_values()
+
+
+@receiver(post_delete, sender=ListEntry)
+def update_stats_on_delete(sender, instance: ListEntry, **kwargs):
+    saved = _saved_values(instance)
+    # Never create stats here, they may be being deleted along with the user
+    totals = _entry_totals(saved['score'], saved['progress'], sign=-1)
+    UserListStats.apply_change(instance.user_id, _media_type(instance, saved['media_id']), create=False, **totals)
+    _apply_media_change(saved['media_id'], totals)
+
+
+@receiver(post_save, sender=ListEntry)
+def refresh_list_row(sender, instance: ListEntry, raw=False, **kwargs):
+    if not raw:
+        ListRow.refresh(entry_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Media)
+def refresh_media_list_rows(sender, instance: Media, created, raw=False, **kwargs):
+    # New media aren't on any lists yet
+    if not created and not raw:
+        ListRow.refresh(media_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Film)
+@receiver(post_save, sender=Series)
+@receiver(post_save, sender=Book)
+def refresh_subtype_list_rows(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        ListRow.refresh(media_ids=[instance.media_id])
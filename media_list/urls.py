@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import path
 
 from media_list import views
 
 app_name = 'media_list'
+
+if settings.ASYNC_VIEWS:
+    book_list, film_list, series_list = views.AsyncBookListView, views.AsyncFilmListView, views.AsyncSeriesListView
+else:
+    book_list, film_list, series_list = views.BookListView, views.FilmListView, views.SeriesListView
+
 urlpatterns = [
-    path('books/', views.BookListView.as_view(), name='book-list'),
-    path('books/<str:username>/', views.BookListView.as_view(), name='book-list'),
-    path('films/', views.FilmListView.as_view(), name='film-list'),
-    path('films/<str:username>/', views.FilmListView.as_view(), name='film-list'),
-    path('series/', views.SeriesListView.as_view(), name='series-list'),
-    path('series/<str:username>/', views.SeriesListView.as_view(), name='series-list'),
+    path('books/', book_list.as_view(), name='book-list'),
+    path('books/<str:username>/', book_list.as_view(), name='book-list'),
+    path('films/', film_list.as_view(), name='film-list'),
+    path('films/<str:username>/', film_list.as_view(), name='film-list'),
+    path('series/', series_list.as_view(), name='series-list'),
+    path('series/<str:username>/', series_list.as_view(), name='series-list'),
+    path('all/', views.AllListView.as_view(), name='all-lists'),
+    path('all/<str:username>/', views.AllListView.as_view(), name='all-lists'),
+    path('import/', views.ListImportView.as_view(), name='list-import'),
+    path('export/<str:list_type>/', views.ListExportView.as_view(), name='list-export'),
+    path('export/<str:list_type>/<str:username>/', views.ListExportView.as_view(), name='list-export'),
 ]
@@ -1,40 +1,248 @@
+import csv
+import io
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
 
-from media_list.models import ListEntry
-from utils.views import BaseTemplateView, get_user_from_url
+from media.models import Media
+from media_list.export import EXPORT_FORMATS, CONTENT_TYPES, stream_export
+from media_list.importer import MEDIA_TYPES, import_rows
+from media_list.models import ListEntry, ListRow, UserListStats
+from utils import page_cache
+from utils.db_router import ReplicaReadMixin
+from utils.data_files import detect_format, read_rows
+from utils.pagination import KeysetPaginator, InvalidCursor
+from utils.views import BaseTemplateView, ConditionalGetMixin, get_user_from_url, find_user_from_url, \
+    aget_user_from_url, afind_user_from_url
 
 
-class AbstractListView(BaseTemplateView):
+class AbstractListView(ReplicaReadMixin, page_cache.PublicPageCacheMixin, ConditionalGetMixin, BaseTemplateView):
     template_name = "media_list/list.html"
     page_user = None
     query_callback = None
+    media_type = None
     list_name = "Base List"
+    paginate_by = 50
+    default_sort = ListEntry.SORT_TITLE
+    # Titles read best A-Z, scores and progress highest first
+    default_orders = {
+        ListEntry.SORT_TITLE: 'asc',
+        ListEntry.SORT_SCORE: 'desc',
+        ListEntry.SORT_PROGRESS: 'desc'
+    }
 
     def get_page_title(self):
         pluralise = "" if self.page_user.username[-1] == 's' else "s"
         return f"{self.page_user.username}'{pluralise} {self.list_name}"
 
+    def get_cache_namespaces(self):
+        if 'username' not in self.kwargs:
+            return None
+        return page_cache.user_page_namespaces(self.kwargs['username'], page_cache.MEDIA)
+
+    def get_page_state(self):
+        user = find_user_from_url(self.request, **self.kwargs)
+        return ListEntry.get_list_state(user, self.media_type) if user is not None else None
+
+    def get_sort(self) -> (str, str):
+        sort = self.request.GET.get('sort', self.default_sort)
+        if sort not in ListEntry.SORT_KEYS:
+            sort = self.default_sort
+        order = self.request.GET.get('order', self.default_orders[sort])
+        if order not in ('asc', 'desc'):
+            order = self.default_orders[sort]
+        return sort, order
+
+    def get_entries(self, user):
+        """The user's entries of this list's media type, as list rows when they're enabled"""
+        if settings.LIST_ROWS_ENABLED:
+            return ListRow.get_user_rows(user, self.media_type)
+        return self.query_callback(user)
+
+    def get_paginator(self, entries, sort, order) -> KeysetPaginator:
+        prefix = '-' if order == 'desc' else ''
+        return KeysetPaginator(entries.model.sort_entries(entries, sort), [f"{prefix}sort_key", f"{prefix}pk"],
+                               self.paginate_by)
+
+    def paginate_entries(self, entries, sort, order):
+        try:
+            return self.get_paginator(entries, sort, order).get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page")
+
     def get(self, request, *args, **kwargs):
         try:
             self.page_user = get_user_from_url(request, **kwargs)
         except PermissionError:
             return redirect_to_login(next=request.path)
+        sort, order = self.get_sort()
+        page = self.paginate_entries(self.get_entries(self.page_user), sort, order)
+        list_stats = UserListStats.get_user_type_stats(self.page_user, self.media_type)
+        return self.render_list(page, sort, order, list_stats, **kwargs)
+
+    def render_list(self, page, sort, order, list_stats, **kwargs):
         self.page_title = self.get_page_title()
         context = self.get_context_data(**kwargs)
-        context['list_objects'] = self.query_callback(self.page_user)
+        context['list_objects'] = page.object_list
+        context['page_obj'] = page
+        context['sort'] = sort
+        context['order'] = order
+        context['list_stats'] = list_stats
         return self.render_to_response(context)
 
 
+class AsyncListViewMixin:
+    """Serves an AbstractListView from an async handler, with the async ORM"""
+
+    async def aget_page_state(self):
+        user = await afind_user_from_url(self.request, **self.kwargs)
+        return await ListEntry.aget_list_state(user, self.media_type) if user is not None else None
+
+    async def apaginate_entries(self, entries, sort, order):
+        try:
+            return await self.get_paginator(entries, sort, order).aget_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page")
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.page_user = await aget_user_from_url(request, **kwargs)
+        except PermissionError:
+            return redirect_to_login(next=request.path)
+        sort, order = self.get_sort()
+        page = await self.apaginate_entries(self.get_entries(self.page_user), sort, order)
+        list_stats = await UserListStats.aget_user_type_stats(self.page_user, self.media_type)
+        return self.render_list(page, sort, order, list_stats, **kwargs)
+
+
 class BookListView(AbstractListView):
     query_callback = ListEntry.get_user_book_list
+    media_type = Media.BOOK
     list_name = "Book List"
 
 
 class FilmListView(AbstractListView):
     query_callback = ListEntry.get_user_film_list
+    media_type = Media.FILM
     list_name = "Film List"
 
 
 class SeriesListView(AbstractListView):
     query_callback = ListEntry.get_user_series_list
+    media_type = Media.SERIES
     list_name = "Series List"
+
+
+class AllListView(AbstractListView):
+    """All of a user's lists on one page, fetched with a single query and split by media type"""
+    template_name = "media_list/all-lists.html"
+    list_name = "Lists"
+    list_urls = {
+        Media.BOOK: 'media_list:book-list',
+        Media.FILM: 'media_list:film-list',
+        Media.SERIES: 'media_list:series-list'
+    }
+
+    def get_page_state(self):
+        user = find_user_from_url(self.request, **self.kwargs)
+        return ListEntry.get_list_state(user, with_media=True) if user is not None else None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.page_user = get_user_from_url(request, **kwargs)
+        except PermissionError:
+            return redirect_to_login(next=request.path)
+        self.page_title = self.get_page_title()
+        sort, order = self.get_sort()
+        lists = ListEntry.get_user_lists(self.page_user, sort, order)
+        context = self.get_context_data(**kwargs)
+        context['lists'] = [
+            {
+                'name': name,
+                'url': reverse(self.list_urls[media_type], args=[self.page_user.username]),
+                'entries': lists[media_type],
+                'stats': UserListStats.from_entries(self.page_user, media_type, lists[media_type])
+            }
+            for media_type, name in Media.MEDIA_TYPES
+        ]
+        context['sort'] = sort
+        context['order'] = order
+        return self.render_to_response(context)
+
+
+class AsyncBookListView(AsyncListViewMixin, BookListView):
+    pass
+
+
+class AsyncFilmListView(AsyncListViewMixin, FilmListView):
+    pass
+
+
+class AsyncSeriesListView(AsyncListViewMixin, SeriesListView):
+    pass
+
+
+class ListExportView(View):
+    """Streams a user's list, of one media type or all of them, as a CSV, JSON lines or XML download"""
+    list_types = {
+        'all': None,
+        'books': Media.BOOK,
+        'films': Media.FILM,
+        'series': Media.SERIES
+    }
+
+    def get(self, request, list_type, **kwargs):
+        if list_type not in self.list_types:
+            raise Http404("Invalid list type")
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            raise Http404("Invalid export format")
+        try:
+            user = get_user_from_url(request, **kwargs)
+        except PermissionError:
+            return redirect_to_login(next=request.get_full_path())
+
+        response = StreamingHttpResponse(stream_export(user, self.list_types[list_type], file_format),
+                                         content_type=CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{user.username}-{list_type}.{file_format}"'
+        return response
+
+
+class ListImportView(BaseTemplateView):
+    """Adds or updates the logged-in user's list entries from an uploaded CSV or JSON lines file"""
+    template_name = "media_list/import.html"
+    page_title = "Import list"
+    max_errors_shown = 100
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            messages.add_message(request, messages.ERROR, "!danger You must be logged in to import a list.")
+            return redirect_to_login(next=request.path)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['media_types'] = MEDIA_TYPES.keys()
+        return context
+
+    def post(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        upload = request.FILES.get('file')
+        try:
+            if upload is None:
+                raise ValueError("Choose a file to import")
+            file_format = detect_format(upload.name)
+            rows = read_rows(io.TextIOWrapper(upload.file, encoding='utf-8', newline=''), file_format)
+            result = import_rows(request.user, rows, media_type=MEDIA_TYPES.get(request.POST.get('media_type')))
+        except (ValueError, csv.Error) as e:
+            # Malformed files, including bad JSON and CSV, or a bad encoding
+            context['error'] = f"Cannot import the file: {e}" if isinstance(e, csv.Error) else str(e)
+        else:
+            context['result'] = result
+            context['errors'] = result.errors[:self.max_errors_shown]
+            context['more_errors'] = len(result.errors) - len(context['errors'])
+        return self.render_to_response(context)
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_media_list.settings')
+# Each ASGI request runs its database work on a thread of its own, which would leave a persistent connection open
+# behind every request until the server runs out. Pool connections with PgBouncer instead
+os.environ.setdefault('POSTGRES_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
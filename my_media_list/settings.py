@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'search',
     'media_list',
     'compressor',
+    'django.contrib.postgres',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -58,7 +59,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per view query counts and timings, as Server-Timing headers and Prometheus metrics at /metrics/
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'utils.metrics.MetricsMiddleware')
+
 ROOT_URLCONF = 'my_media_list.urls'
+# Serve the home, profile, list and search pages from async views, for ASGI servers. See dev/compare_servers.py
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
 
 TEMPLATES = [
     {
@@ -106,6 +114,73 @@ if 'GIT_PG_HOST' in os.environ:
         }
     }
 
+# Connections are kept open for POSTGRES_CONN_MAX_AGE seconds and reused by later requests, after a health check,
+# rather than paying the TCP and authentication handshake on every request. 0 closes them after each request.
+# Set POSTGRES_POOLER=pgbouncer when POSTGRES_HOST/POSTGRES_PORT point at PgBouncer in transaction pooling mode, whose
+# server connections are shared between clients, so can't hold the server-side cursors used by QuerySet.iterator()
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+    'CONN_HEALTH_CHECKS': True,
+    'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_POOLER') == 'pgbouncer'
+})
+
+# Read replicas. Setting POSTGRES_REPLICA_HOST adds a 'replica' database, which list, profile and search pages read
+# from. Users are pinned to the primary for POSTGRES_REPLICA_PIN_SECONDS after changing their list, which should be
+# longer than the replicas usually lag. The pins live in the cache, so utils.checks refuses a replica unless
+# CACHE_BACKEND is shared between workers
+
+if 'POSTGRES_REPLICA_HOST' in os.environ:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'}
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['utils.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('POSTGRES_REPLICA_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# CACHE_BACKEND picks the backend and CACHE_LOCATION its server(s) or directory. Redis and Memcached share the cache
+# between workers and need the redis or pymemcache package, the file and local memory caches are for development and
+# tests only. The local memory cache is per process, so `manage.py check --deploy` fails with it
+
+CACHE_BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache'
+}
+CACHE_LOCATIONS = {
+    'redis': 'redis://localhost:6379',
+    'memcached': 'localhost:11211',
+    'file': str(BASE_DIR / '.cache'),
+    'locmem': 'my_media_list'
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_LOCATIONS[CACHE_BACKEND]),
+        'KEY_PREFIX': 'mml'
+    }
+}
+
+
+# Search backend, either 'database' for Postgres full text and trigram search, or 'memory' for an in-process index
+# built on first use. The memory index is per process, so every worker holds its own copy
+
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'database')
+
+# Serve list pages from the denormalised media_list.models.ListRow table rather than joining ListEntry, Media and the
+# subtype. The rows are kept up to date either way, `python manage.py refresh_list_rows` rebuilds them
+LIST_ROWS_ENABLED = os.environ.get('LIST_ROWS_ENABLED') == '1'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'my_media_list.settings')
 
 application = get_wsgi_application()
+
+from search import memory_index  # noqa: E402
+
+# Build the in-memory search indexes before serving the first request, rather than during it
+if memory_index.uses_memory_backend():
+    memory_index.get_user_index()
+    memory_index.get_media_index()
@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from profiles import views
 
 app_name = 'profiles'
+
+profile = views.AsyncProfileView if settings.ASYNC_VIEWS else views.ProfileView
+
 urlpatterns = [
-    path('', views.ProfileView.as_view(), name='profile'),
-    path('<str:username>/', views.ProfileView.as_view(), name='profile')
+    path('', profile.as_view(), name='profile'),
+    path('<str:username>/', profile.as_view(), name='profile')
 ]
@@ -1,12 +1,14 @@
-from django.contrib import messages
 from django.contrib.auth.views import redirect_to_login
-from django.shortcuts import get_object_or_404
 from django.views.generic import TemplateView
 
-from accounts.models import User
+from media_list.models import ListEntry, UserListStats
+from utils import page_cache
+from utils.db_router import ReplicaReadMixin
+from utils.views import ConditionalGetMixin, get_user_from_url, find_user_from_url, aget_user_from_url, \
+    afind_user_from_url
 
 
-class ProfileView(TemplateView):
+class ProfileView(ReplicaReadMixin, page_cache.PublicPageCacheMixin, ConditionalGetMixin, TemplateView):
     template_name = "profiles/profile.html"
     extra_context = {}
     profile_user = None
@@ -16,15 +18,23 @@ class ProfileView(TemplateView):
             if self.profile_user.username[-1] == 's' \
             else f"{self.profile_user.username}'s profile"
 
+    def get_cache_namespaces(self):
+        if 'username' not in self.kwargs:
+            return None
+        return page_cache.user_page_namespaces(self.kwargs['username'])
+
+    def get_page_state(self):
+        user = find_user_from_url(self.request, **self.kwargs)
+        return ListEntry.get_list_state(user) if user is not None else None
+
     def set_profile_user(self, request, **kwargs):
-        if 'username' in kwargs:
-            self.profile_user = get_object_or_404(User, username=kwargs['username'])
-        else:
-            if request.user.is_authenticated:
-                self.profile_user = request.user
-            else:
-                messages.add_message(request, messages.ERROR, "!danger You must be logged in to view your profile.")
-                raise PermissionError
+        self.profile_user = get_user_from_url(request, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if 'list_stats' not in context:
+            context['list_stats'] = UserListStats.get_user_stats(self.profile_user).values()
+        return context
 
     def get(self, request, *args, **kwargs):
         try:
@@ -33,3 +43,20 @@ class ProfileView(TemplateView):
             return redirect_to_login(next=request.path)
         self.extra_context['page_title'] = self.get_page_title()
         return super().get(self, request, *args, **kwargs)
+
+
+class AsyncProfileView(ProfileView):
+    """Serves ProfileView from an async handler, with the async ORM"""
+
+    async def aget_page_state(self):
+        user = await afind_user_from_url(self.request, **self.kwargs)
+        return await ListEntry.aget_list_state(user) if user is not None else None
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.profile_user = await aget_user_from_url(request, **kwargs)
+        except PermissionError:
+            return redirect_to_login(next=request.path)
+        self.extra_context['page_title'] = self.get_page_title()
+        list_stats = await UserListStats.aget_user_stats(self.profile_user)
+        return self.render_to_response(self.get_context_data(list_stats=list_stats.values(), **kwargs))
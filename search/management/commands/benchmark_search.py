@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+
+from accounts.models import User
+from benchmarks.factories import synthetic_name, synthetic_title
+from media.models import Media, Film
+from search import memory_index
+from search.views import UserSearch, MediaSearch
+
+
+def misspell(rng: random.Random, text: str) -> str:
+    position = rng.randrange(len(text))
+    return text[:position] + rng.choice("aeioust") + text[position + 1:]
+
+
+class Command(BaseCommand):
+    help = "Compares the database and in-memory search backends on a synthetic corpus, in a throwaway test database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help="The size of the corpus, split evenly between users and media")
+        parser.add_argument('--queries', type=int, default=200, help="The number of queries to time per backend")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, rows, queries, seed, batch_size, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self.run_benchmark(rows, queries, seed, batch_size)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run_benchmark(self, rows, queries, seed, batch_size):
+        rng = random.Random(seed)
+        user_count, media_count = rows // 2, rows - rows // 2
+
+        start = time.perf_counter()
+        usernames = [f"{synthetic_name(rng)}{i}" for i in range(user_count)]
+        for offset in range(0, user_count, batch_size):
+            User.objects.bulk_create([
+                User(username=username, first_name=synthetic_name(rng).title(), last_name=synthetic_name(rng).title())
+                for username in usernames[offset:offset + batch_size]])
+        titles = [synthetic_title(rng) for _ in range(media_count)]
+        films = ({'title': title, 'members': rng.randint(0, 5000), 'release_status': Film.RELEASED} for title in titles)
+        Media.bulk_create_media(Film, films, batch_size)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.stdout.write(f"Created {user_count} users and {media_count} media in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        memory_index.user_index.is_built = memory_index.media_index.is_built = False
+        memory_index.get_user_index()
+        memory_index.get_media_index()
+        self.stdout.write(f"Built the in-memory indexes in {time.perf_counter() - start:.1f}s")
+
+        user_queries = [misspell(rng, rng.choice(usernames)[:8]) for _ in range(queries)]
+        media_queries = [" ".join(rng.choice(titles).split()[:2]) for _ in range(queries)]
+        for backend in ['database', 'memory']:
+            with override_settings(SEARCH_BACKEND=backend):
+                self.report(backend, "users", self.time_queries(UserSearch, user_queries))
+                self.report(backend, "media", self.time_queries(MediaSearch, media_queries))
+
+    @staticmethod
+    def time_queries(view_class, queries):
+        factory = RequestFactory()
+        timings = []
+        for query in queries:
+            view = view_class()
+            view.setup(factory.get('/', {'query': query}))
+            start = time.perf_counter()
+            list(view.get_queryset()[:view.paginate_by])
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    def report(self, backend, corpus, timings):
+        percentiles = statistics.quantiles(timings, n=100)
+        self.stdout.write(f"{backend:>8} {corpus:<5} p50 {percentiles[49]:8.2f}ms  p95 {percentiles[94]:8.2f}ms  "
+                          f"max {max(timings):8.2f}ms")
@@ -0,0 +1,248 @@
+"""
+An optional in-process search backend, enabled with SEARCH_BACKEND = 'memory'. Users and media are held in trigram
+inverted indexes which are built from the database at startup, or on first use, and kept fresh by post_save and
+post_delete signals once their transaction commits, so searches never touch the database. Only the fields shown in
+search results are held, so media descriptions are not searched, and rows written without signals (bulk_create, update)
+are only picked up by the next build
+"""
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+# pg_trgm's default similarity_threshold, so fuzzy matches agree with the database backend
+SIMILARITY_THRESHOLD = 0.3
+BUILD_CHUNK_SIZE = 5000
+
+
+def uses_memory_backend() -> bool:
+    return getattr(settings, 'SEARCH_BACKEND', 'database') == 'memory'
+
+
+def trigrams(text: Optional[str]) -> set:
+    """Splits text into trigrams like pg_trgm, each lower cased word padded with two spaces before and one after"""
+    grams = set()
+    for word in re.findall(r'[^\W_]+', (text or "").lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def prefix_trigrams(text: str) -> set:
+    """The trigrams every string starting with text contains, which leaves out the padding after its last word"""
+    words = re.findall(r'[^\W_]+', text.lower())
+    if not words:
+        return set()
+    padded = f"  {words[-1]}"
+    return trigrams(" ".join(words[:-1])) | {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NGramIndex:
+    """
+    An inverted index from trigrams to documents, each made of a few text fields and the result object to return for
+    them. Postings are arrays of 32-bit document slot and field numbers, and field trigram counts are held in a
+    parallel array of 16-bit ints. Replacing or removing a document tombstones its slot rather than rewriting
+    postings, and the postings are compacted once a quarter of the slots are dead. Searches hold the same lock as
+    writes, since writes append to the postings in place and compaction replaces them all
+    """
+
+    def __init__(self, field_count: int):
+        self.field_count = field_count
+        self.is_built = False
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, array] = {}
+        self._lengths = array('H')
+        self._texts: List[Optional[Tuple[str, ...]]] = []
+        self._results: List[Optional[Tuple[object, object]]] = []
+        self._slots: Dict[object, int] = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def build(self, documents: Iterable[Tuple[object, Sequence[str], object]]):
+        """Replaces the contents of the index with documents, an iterable of (key, texts, result) tuples"""
+        with self._lock:
+            self._reset()
+            for key, texts, result in documents:
+                self._add(key, texts, result)
+            self.is_built = True
+
+    def clear(self):
+        """Empties the index, so it is rebuilt on next use"""
+        with self._lock:
+            self._reset()
+            self.is_built = False
+
+    def add(self, key, texts: Sequence[str], result):
+        with self._lock:
+            self._remove(key)
+            self._add(key, texts, result)
+            self._maybe_compact()
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+            self._maybe_compact()
+
+    def search(self, query: str, *, predicate: Callable = None, sort_key: Callable = None) -> List:
+        """
+        Gets the results of documents with a field containing query or trigram similar to it, best match first. Ties
+        are ordered by sort_key, which is given each result
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        needle = " ".join(query.lower().split())
+        inner_grams = {gram for gram in query_grams if " " not in gram}
+
+        scores = {}
+        with self._lock:
+            for entry, shared in self._count_shared(query_grams).items():
+                slot, field = divmod(entry, self.field_count)
+                texts = self._texts[slot]
+                if texts is None:
+                    continue
+                similarity = shared / (len(query_grams) + self._lengths[entry] - shared)
+                if similarity < SIMILARITY_THRESHOLD:
+                    if shared < len(inner_grams) or needle not in " ".join((texts[field] or "").lower().split()):
+                        continue
+                scores[slot] = max(similarity, scores.get(slot, 0))
+            return self._ranked(scores, predicate, sort_key)
+
+    def search_prefix(self, prefix: str, *, field=0, predicate: Callable = None, sort_key: Callable = None) -> List:
+        """Gets the results of documents whose field starts with prefix, case insensitively"""
+        prefix = prefix.lower()
+        required = prefix_trigrams(prefix)
+        if not required:
+            return []
+        scores = {}
+        with self._lock:
+            for entry, shared in self._count_shared(required).items():
+                slot, entry_field = divmod(entry, self.field_count)
+                texts = self._texts[slot]
+                if entry_field == field and shared == len(required) and texts is not None \
+                        and (texts[field] or "").lower().startswith(prefix):
+                    scores[slot] = 1
+            return self._ranked(scores, predicate, sort_key)
+
+    def _count_shared(self, grams) -> Counter:
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                shared.update(postings)
+        return shared
+
+    def _ranked(self, scores: Dict[int, float], predicate, sort_key) -> List:
+        results = [(score, self._results[slot][1]) for slot, score in scores.items()]
+        if predicate is not None:
+            results = [(score, result) for score, result in results if predicate(result)]
+        results.sort(key=lambda item: (-item[0], sort_key(item[1]) if sort_key else 0))
+        return [result for _, result in results]
+
+    def _add(self, key, texts: Sequence[str], result):
+        slot = len(self._texts)
+        self._slots[key] = slot
+        self._texts.append(tuple(texts))
+        self._results.append((key, result))
+        for field, text in enumerate(texts):
+            entry = slot * self.field_count + field
+            grams = trigrams(text)
+            self._lengths.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array('I')
+                postings.append(entry)
+
+    def _remove(self, key):
+        slot = self._slots.pop(key, None)
+        if slot is not None:
+            self._texts[slot] = None
+            self._results[slot] = None
+            self._dead += 1
+
+    def _maybe_compact(self):
+        if self._dead > 1000 and self._dead * 4 > len(self._texts):
+            documents = [(key, texts, result) for texts, (key, result)
+                         in zip(self._texts, (item or (None, None) for item in self._results)) if texts is not None]
+            self._reset()
+            for key, texts, result in documents:
+                self._add(key, texts, result)
+
+
+class IndexedUser(NamedTuple):
+    pk: int
+    username: str
+    first_name: str
+    last_name: str
+
+    def __str__(self):
+        return self.username
+
+
+class IndexedMedia(NamedTuple):
+    pk: int
+    title: str
+    local_title: Optional[str]
+    media_type: str
+    score: object
+    members: int
+    description = None
+
+    def get_media_type_display(self):
+        from media.models import Media
+        return dict(Media.MEDIA_TYPES)[self.media_type]
+
+    def __str__(self):
+        return self.title
+
+
+def user_document(pk, username, first_name, last_name):
+    return pk, (username, first_name, last_name), IndexedUser(pk, username, first_name, last_name)
+
+
+def media_document(pk, title, local_title, media_type, score, members):
+    return pk, (title, local_title), IndexedMedia(pk, title, local_title, media_type, score, members)
+
+
+user_index = NGramIndex(field_count=3)
+media_index = NGramIndex(field_count=2)
+
+
+def get_user_index() -> NGramIndex:
+    if not user_index.is_built:
+        from accounts.models import User
+        with user_index._lock:
+            if not user_index.is_built:
+                rows = User.objects.values_list('pk', 'username', 'first_name', 'last_name')
+                user_index.build(user_document(*row) for row in rows.iterator(chunk_size=BUILD_CHUNK_SIZE))
+    return user_index
+
+
+def get_media_index() -> NGramIndex:
+    if not media_index.is_built:
+        from media.models import Media
+        with media_index._lock:
+            if not media_index.is_built:
+                rows = Media.objects.values_list('pk', 'title', 'local_title', 'media_type', 'score', 'members')
+                media_index.build(media_document(*row) for row in rows.iterator(chunk_size=BUILD_CHUNK_SIZE))
+    return media_index
+
+
+def search_users(query: str, prefix=False) -> List[IndexedUser]:
+    if prefix:
+        return get_user_index().search_prefix(query, sort_key=lambda user: (user.username.upper(), user.pk))
+    return get_user_index().search(query, sort_key=lambda user: user.pk)
+
+
+def search_media(query: str, media_type: str = None) -> List[IndexedMedia]:
+    predicate = (lambda media: media.media_type == media_type) if media_type else None
+    return get_media_index().search(query, predicate=predicate, sort_key=lambda media: (-media.members, media.pk))
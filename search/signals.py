@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from media.models import Media
+from search import memory_index
+
+
+def _on_commit(index: memory_index.NGramIndex, method: str, *args):
+    """Updates the index, if it has been built, once the change is committed, so a rollback never reaches it"""
+    def update():
+        if index.is_built:
+            getattr(index, method)(*args)
+    transaction.on_commit(update)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance: User, **kwargs):
+    """Updates the in-memory index so that new and renamed users are found straight away"""
+    _on_commit(memory_index.user_index, 'add', *memory_index.user_document(
+        instance.pk, instance.username, instance.first_name, instance.last_name))
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance: User, **kwargs):
+    _on_commit(memory_index.user_index, 'remove', instance.pk)
+
+
+@receiver(post_save, sender=Media)
+def index_media(sender, instance: Media, **kwargs):
+    _on_commit(memory_index.media_index, 'add', *memory_index.media_document(
+        instance.pk, instance.title, instance.local_title, instance.media_type, instance.score, instance.members))
+
+
+@receiver(post_delete, sender=Media)
+def unindex_media(sender, instance: Media, **kwargs):
+    _on_commit(memory_index.media_index, 'remove', instance.pk)
@@ -1,8 +1,17 @@
+from django.conf import settings
 from django.urls import path
 from search import views
 
 app_name = 'search'
+
+if settings.ASYNC_VIEWS:
+    user_search, media_search = views.AsyncUserSearch, views.AsyncMediaSearch
+else:
+    user_search, media_search = views.UserSearch, views.MediaSearch
+
 urlpatterns = [
     path('', views.search_handler, name='index'),
-    path('users/', views.UserSearch.as_view(), name='users')
+    path('users/', user_search.as_view(), name='users'),
+    path('media/', media_search.as_view(), name='media'),
+    path('autocomplete/', views.autocomplete, name='autocomplete')
 ]
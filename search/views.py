@@ -1,16 +1,42 @@
+import hashlib
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.db.models import Model, Q
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Model, Q, F, Value, FloatField, QuerySet
+from django.db.models.functions import Greatest, Coalesce, Upper, Cast
+from django.core.cache import cache
+from django.http import JsonResponse, Http404
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.views.generic import ListView
 
 from accounts.models import User
+from media.models import Media
+from search import memory_index
+from utils import page_cache
+from utils.db_router import ReplicaReadMixin
+from utils.pagination import KeysetPaginator, InvalidCursor, approximate_count, aapproximate_count
 from utils.url_helpers import url_with_get_params
 
 SEARCH_PAGES = {
+    'all': '/search/media/',
+    'tv': '/search/media/',
+    'films': '/search/media/',
+    'books': '/search/media/',
     'users': '/search/users/'
 }
-# TODO: Add other search types [MMl-2]
+SEARCH_FILTERS = {
+    'tv': {'media_type': Media.SERIES},
+    'films': {'media_type': Media.FILM},
+    'books': {'media_type': Media.BOOK}
+}
+AUTOCOMPLETE_LIMIT = 5
+AUTOCOMPLETE_MAX_LENGTH = 50
+AUTOCOMPLETE_CACHE_TIMEOUT = 30
+# Sorts users who have never logged in after everyone else, keeping the keyset sort key non-null
+NEVER_LOGGED_IN = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
 
 def invalid_search(request, message, alert_type="danger"):
@@ -30,34 +56,200 @@ def search_handler(request):
     elif search_type not in SEARCH_PAGES.keys():
         return invalid_search(request, "Invalid search type")
 
+    for param, value in SEARCH_FILTERS.get(search_type, {}).items():
+        params[param] = value
     return redirect(url_with_get_params(SEARCH_PAGES[search_type], params))
 
 
-class BaseSearch(ListView):
+def normalise_prefix(prefix: str) -> str:
+    return " ".join(prefix.split()).lower()[:AUTOCOMPLETE_MAX_LENGTH]
+
+
+def autocomplete(request):
+    """
+    Returns the first users and media whose username or title start with the query, as JSON. Both lookups are range
+    scans of the UPPER() pattern indexes, and results are cached briefly by normalised prefix so that a burst of
+    keystrokes from many users costs few queries
+    """
+    prefix = normalise_prefix(request.GET.get('query', ""))
+    if not prefix:
+        return JsonResponse({'users': [], 'media': []})
+
+    cache_key = f"search:autocomplete:{hashlib.md5(prefix.encode()).hexdigest()}"
+    results = cache.get(cache_key)
+    if results is None:
+        users = User.objects \
+            .filter(username__istartswith=prefix) \
+            .order_by(Upper('username'), 'pk') \
+            .values_list('username', flat=True)[:AUTOCOMPLETE_LIMIT]
+        media = Media.objects \
+            .filter(title__istartswith=prefix) \
+            .order_by(Upper('title'), 'pk') \
+            .values('pk', 'title', 'media_type')[:AUTOCOMPLETE_LIMIT]
+        media_types = dict(Media.MEDIA_TYPES)
+        results = {
+            'users': [
+                {'username': username, 'url': reverse('profiles:profile', kwargs={'username': username})}
+                for username in users
+            ],
+            'media': [
+                {'id': item['pk'], 'title': item['title'], 'media_type': media_types[item['media_type']]}
+                for item in media
+            ]
+        }
+        cache.set(cache_key, results, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return JsonResponse(results)
+
+
+class BaseSearch(ReplicaReadMixin, ListView):
 
     model: Model
     paginate_by = 10
     default_page_title = "Search results"
     template_name = 'search/search.html'
+    result_template = None
+    show_approximate_count = True
+    # A page fetched ahead by an async handler, returned as is by paginate_queryset
+    fetched_page = None
+
+    def get_cursor_ordering(self):
+        """
+        The KeysetPaginator ordering of the results. When not None, pages are addressed by opaque cursors built from
+        these sort keys rather than by page number, so deep pages cost the same as the first and no COUNT(*) is run
+        """
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.fetched_page is not None:
+            return self.fetched_page
+        ordering = self.get_cursor_ordering()
+        # The in-memory backend returns its ranked results as a list, which is paged by number
+        if ordering is None or not isinstance(queryset, QuerySet):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, ordering, page_size)
+        try:
+            page = paginator.get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid page")
+        return paginator, page, page.object_list, page.has_other_pages()
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
         context['page_title'] = self.default_page_title
         context['query'] = self.request.GET.get('query', "")
+        context['result_template'] = self.result_template
+        if self.show_approximate_count and isinstance(self.object_list, QuerySet) \
+                and 'approximate_count' not in context:
+            context['approximate_count'] = approximate_count(self.object_list)
         return context
 
 
-class UserSearch(BaseSearch):
+class AsyncSearchMixin:
+    """Serves a BaseSearch from an async handler, with the async ORM"""
+
+    async def get(self, request, *args, **kwargs):
+        if memory_index.uses_memory_backend():
+            # The in-memory indexes are built from the database on first use
+            self.object_list = await sync_to_async(self.get_queryset)()
+        else:
+            self.object_list = self.get_queryset()
+        extra_context = {}
+        ordering = self.get_cursor_ordering()
+        if isinstance(self.object_list, QuerySet) and ordering is not None:
+            paginator = KeysetPaginator(self.object_list, ordering, self.get_paginate_by(self.object_list))
+            try:
+                page = await paginator.aget_page(self.request.GET.get('cursor'))
+            except InvalidCursor:
+                raise Http404("Invalid page")
+            self.fetched_page = paginator, page, page.object_list, page.has_other_pages()
+            if self.show_approximate_count:
+                extra_context['approximate_count'] = await aapproximate_count(self.object_list)
+        return self.render_to_response(self.get_context_data(**extra_context))
+
+
+class UserSearch(page_cache.PublicPageCacheMixin, BaseSearch):
 
     model = User
+    result_template = 'search/user-card.html'
 
     def get_queryset(self):
-        query = self.request.GET.get("query")
+        query = self.request.GET.get("query", "")
+        if memory_index.uses_memory_backend():
+            return memory_index.search_users(query, prefix=self.request.GET.get("match") == "prefix")
+        if self.request.GET.get("match") == "prefix":
+            return self.get_prefix_queryset(query)
+        # icontains and trigram_similar are both served by the trigram indexes on User
         return self.model.objects.filter(
             Q(username__icontains=query) |
             Q(first_name__icontains=query) |
-            Q(last_name__icontains=query)).order_by('-last_login')
+            Q(last_name__icontains=query) |
+            Q(username__trigram_similar=query)
+        ).annotate(
+            # Cast to double precision so the values survive a round trip through a cursor unchanged
+            similarity=Cast(Greatest(
+                TrigramSimilarity('username', query),
+                TrigramSimilarity('first_name', query),
+                TrigramSimilarity('last_name', query)), FloatField()),
+            last_login_key=Coalesce('last_login', Value(NEVER_LOGGED_IN))
+        ).order_by('-similarity', '-last_login_key', 'pk')
+
+    def get_cache_namespaces(self):
+        return [page_cache.USERS]
+
+    def get_prefix_queryset(self, query):
+        """Matches usernames starting with query, a cheap range scan of the UPPER(username) pattern index"""
+        return self.model.objects \
+            .filter(username__istartswith=query) \
+            .annotate(username_key=Upper('username')) \
+            .order_by('username_key', 'pk')
+
+    def get_cursor_ordering(self):
+        if self.request.GET.get("match") == "prefix":
+            return ['username_key', 'pk']
+        return ['-similarity', '-last_login_key', 'pk']
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
         return context
+
+
+class MediaSearch(BaseSearch):
+    """
+    Searches titles and descriptions with the stored, GIN indexed full text vector, and titles alone by trigram
+    similarity so that misspelt titles still match. Results are ranked by the better of the two
+    """
+
+    model = Media
+    result_template = 'search/media-card.html'
+    text_search_config = 'english'
+
+    def get_queryset(self):
+        query = self.request.GET.get("query", "")
+        media_type = self.request.GET.get("media_type")
+        if media_type not in dict(Media.MEDIA_TYPES):
+            media_type = None
+        if memory_index.uses_memory_backend():
+            return memory_index.search_media(query, media_type)
+        search_query = SearchQuery(query, config=self.text_search_config, search_type='websearch')
+        results = self.model.objects \
+            .filter(Q(search_vector=search_query) |
+                    Q(title__trigram_similar=query) |
+                    Q(local_title__trigram_similar=query)) \
+            .annotate(rank=Cast(Greatest(
+                SearchRank(F('search_vector'), search_query),
+                TrigramSimilarity('title', query),
+                Coalesce(TrigramSimilarity('local_title', query), Value(0.0))), FloatField()))
+        if media_type:
+            results = results.filter(media_type=media_type)
+        return results.order_by('-rank', '-members', 'pk')
+
+    def get_cursor_ordering(self):
+        return ['-rank', '-members', 'pk']
+
+
+class AsyncUserSearch(AsyncSearchMixin, UserSearch):
+    pass
+
+
+class AsyncMediaSearch(AsyncSearchMixin, MediaSearch):
+    pass
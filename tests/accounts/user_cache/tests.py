@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts import user_cache
+from accounts.models import User
+
+
+class UserCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.user = User.objects.create_user(username="cached", password="password")
+
+    def test_get_user_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(user_cache.get_user("cached"), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(user_cache.get_user("cached"), self.user)
+
+    def test_get_user_shared_cache(self):
+        user_cache.get_user("cached")
+        user_cache.clear_local()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user_cache.get_user("cached").username, "cached")
+
+    def test_password_not_cached(self):
+        user_cache.get_user("cached")
+
+        self.assertNotIn('password', cache.get(user_cache._cache_key("cached")).__dict__)
+
+    def test_missing_user_cached(self):
+        with self.assertNumQueries(1):
+            self.assertRaises(User.DoesNotExist, user_cache.get_user, "nobody")
+        with self.assertNumQueries(0):
+            self.assertRaises(User.DoesNotExist, user_cache.get_user, "nobody")
+
+    def test_new_user_clears_missing(self):
+        self.assertRaises(User.DoesNotExist, user_cache.get_user, "newcomer")
+        newcomer = User.objects.create_user(username="newcomer", password="password")
+
+        self.assertEqual(user_cache.get_user("newcomer"), newcomer)
+
+    def test_rename_invalidates(self):
+        user = user_cache.get_user("cached")
+        user = User.objects.get(pk=user.pk)
+        user.username = "renamed"
+        user.save()
+
+        self.assertRaises(User.DoesNotExist, user_cache.get_user, "cached")
+        self.assertEqual(user_cache.get_user("renamed").first_name, "")
+
+    def test_delete_invalidates(self):
+        user_cache.get_user("cached")
+        self.user.delete()
+
+        self.assertRaises(User.DoesNotExist, user_cache.get_user, "cached")
+
+    def test_invalidated_again_on_commit(self):
+        stale = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.first_name = "Renamed"
+            self.user.save()
+            # A concurrent lookup before the commit still sees, and caches, the old row
+            cache.set(user_cache._cache_key("cached"), stale)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(user_cache.get_user("cached").first_name, "Renamed")
+
+    def test_local_cache_bounded(self):
+        for i in range(user_cache.LOCAL_SIZE + 10):
+            user_cache._set_local(f"key{i}", user_cache.MISSING)
+
+        self.assertEqual(len(user_cache._local), user_cache.LOCAL_SIZE)
+        self.assertIsNone(user_cache._get_local("key0"))
+
+    def test_profile_not_found(self):
+        response = self.client.get(reverse("profiles:profile", kwargs={'username': "nobody"}))
+
+        self.assertEqual(response.status_code, 404)
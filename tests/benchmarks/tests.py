@@ -0,0 +1,70 @@
+from django.test import TestCase
+
+from accounts.models import User
+from benchmarks.cases import build_cases
+from benchmarks.factories import BENCHMARK_USER, build_dataset
+from benchmarks.runner import compare, run_cases
+from media.models import Media, RelatedMedia
+from media_list.models import ListEntry, UserListStats
+
+
+class BuildDatasetTestCase(TestCase):
+    def test_sizes(self):
+        dataset = build_dataset(1000, seed=1, batch_size=100)
+
+        self.assertEqual(User.objects.count(), dataset.users)
+        self.assertEqual(Media.objects.count(), dataset.media)
+        self.assertEqual(ListEntry.objects.count(), dataset.entries)
+        self.assertGreater(ListEntry.objects.filter(user__username=BENCHMARK_USER).count(),
+                           ListEntry.objects.exclude(user__username=BENCHMARK_USER).count() / dataset.users)
+        self.assertTrue(RelatedMedia.objects.filter(relationship=Media.SEQUEL).exists())
+
+    def test_deterministic(self):
+        build_dataset(1000, seed=1)
+        first = list(ListEntry.objects.order_by('pk').values_list('user__username', 'media__title', 'score'))
+        ListEntry.objects.all().delete()
+        RelatedMedia.objects.all().delete()
+        Media.objects.all().delete()
+        User.objects.all().delete()
+
+        build_dataset(1000, seed=1)
+
+        self.assertEqual(list(ListEntry.objects.order_by('pk').values_list('user__username', 'media__title', 'score')),
+                         first)
+
+    def test_stats_rebuilt(self):
+        build_dataset(1000)
+        user = User.objects.get(username=BENCHMARK_USER)
+
+        self.assertEqual(sum(UserListStats.objects.filter(user=user).values_list('entries', flat=True)),
+                         ListEntry.objects.filter(user=user).count())
+        media = ListEntry.objects.filter(user=user).first().media
+        media.refresh_from_db()
+        self.assertEqual(media.members, ListEntry.objects.filter(media=media).count())
+
+
+class RunCasesTestCase(TestCase):
+    def test_every_case_runs(self):
+        dataset = build_dataset(500)
+        cases = build_cases(dataset)
+
+        results = run_cases(cases, iterations=2)
+
+        self.assertEqual(list(results), [case.name for case in cases])
+        self.assertGreater(results['film_list']['queries'], 0)
+        self.assertGreater(results['film_list']['peak_memory_kb'], 0)
+
+
+class CompareTestCase(TestCase):
+    def test_regressions(self):
+        baseline = {'results': {
+            'home': {'p50_ms': 10, 'p95_ms': 20, 'queries': 2, 'peak_memory_kb': 50},
+            'removed': {'p50_ms': 1, 'p95_ms': 1, 'queries': 1, 'peak_memory_kb': 1},
+        }}
+        report = {'results': {
+            'home': {'p50_ms': 11, 'p95_ms': 30, 'queries': 3, 'peak_memory_kb': 50},
+            'added': {'p50_ms': 100, 'p95_ms': 100, 'queries': 100, 'peak_memory_kb': 100},
+        }}
+
+        self.assertEqual(compare(report, baseline, threshold=0.2),
+                         ["home: p95_ms 20 -> 30", "home: queries 2 -> 3"])
@@ -1,6 +1,10 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, AsyncRequestFactory
 from django.urls import reverse
 
+from home.views import AsyncHome
+
 
 class HomeViewTests(TestCase):
     def test_home_page_loads(self):
@@ -8,3 +12,12 @@ class HomeViewTests(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.template_name, ['home/index.html'])
+
+    def test_async_home_page_loads(self):
+        request = AsyncRequestFactory().get(reverse("home:index"))
+        request.user = AnonymousUser()
+
+        response = async_to_sync(AsyncHome.as_view())(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.template_name, ['home/index.html'])
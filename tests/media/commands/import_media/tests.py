@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from media.models import Media, Book, Series
+from utils.testing import TempFileMixin
+
+
+class ImportMediaCommandTests(TempFileMixin, TestCase):
+    def test_import_csv(self):
+        path = self.write_file('.csv', "title,chapters,release_status\nBook 1,12,P\nBook 2,,N\n")
+        out = StringIO()
+
+        call_command('import_media', path, '--type', 'book', stdout=out)
+
+        books = Book.objects.select_related('media').order_by('media__title')
+        self.assertEqual([(book.media.title, book.chapters) for book in books], [('Book 1', 12), ('Book 2', None)])
+        self.assertIn("Imported 2 book rows", out.getvalue())
+
+    def test_import_jsonl(self):
+        path = self.write_file('.jsonl', '{"title": "Series 1", "episodes": 10, "airing_status": "F"}\n'
+                                         '\n'
+                                         '{"title": "Series 2", "local_title": "Serie 2", "airing_status": "C"}\n')
+
+        call_command('import_media', path, '--type', 'series', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(Media.objects.filter(media_type=Media.SERIES).count(), 2)
+        self.assertEqual(Series.objects.get(media__local_title="Serie 2").airing_status, Series.CURRENTLY_AIRING)
+
+    def test_import_unknown_format(self):
+        path = self.write_file('.txt', "")
+
+        with self.assertRaises(CommandError):
+            call_command('import_media', path, '--type', 'film', stdout=StringIO())
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from media.models import Media, RelatedMedia, Film
+from utils.testing import TempFileMixin
+
+
+class ImportRelatedMediaCommandTests(TempFileMixin, TestCase):
+    def setUp(self):
+        self.media1 = Media.create_film(title='Film 1', release_status=Film.RELEASED)
+        self.media2 = Media.create_film(title='Film 2', release_status=Film.RELEASED)
+        self.media3 = Media.create_film(title='Film 3', release_status=Film.RELEASED)
+
+    def test_import_csv(self):
+        path = self.write_file('.csv', f"media1,media2,relationship\n"
+                                       f"{self.media2.pk},{self.media1.pk},sequel\n"
+                                       f"{self.media3.pk},{self.media2.pk},S\n"
+                                       f"{self.media2.pk},{self.media3.pk},R\n")
+        out = StringIO()
+
+        call_command('import_related_media', path, stdout=out)
+
+        self.assertEqual([media.title for media in self.media1.get_chain()], ['Film 2', 'Film 3'])
+        self.assertEqual(RelatedMedia.objects.count(), 2)
+        self.assertIn("Added 2 related media", out.getvalue())
+
+    def test_import_jsonl(self):
+        path = self.write_file('.jsonl', f'{{"media1": {self.media1.pk}, "media2": {self.media3.pk}, '
+                                         f'"relationship": "related"}}\n')
+
+        call_command('import_related_media', path, stdout=StringIO())
+
+        self.assertQuerysetEqual(self.media3.get_related_media(), [self.media1])
+
+    def test_import_invalid_relationship(self):
+        path = self.write_file('.csv', f"media1,media2,relationship\n{self.media1.pk},{self.media2.pk},prequel\n")
+
+        with self.assertRaises(CommandError):
+            call_command('import_related_media', path, stdout=StringIO())
@@ -98,3 +98,24 @@ class MediaModelTests(TestCase):
 
         self.assertQuerysetEqual(Media.objects.all(), [])
         self.assertQuerysetEqual(Book.objects.all(), [])
+
+    def test_bulk_create_media(self):
+        rows = [{'title': f'Film {i}', 'runtime': 90 + i, 'release_status': Film.RELEASED} for i in range(5)]
+
+        # Two INSERTs per batch, each batch wrapped in a savepoint
+        with self.assertNumQueries(8):
+            created = Media.bulk_create_media(Film, rows, batch_size=3)
+
+        self.assertEqual(created, 5)
+        films = Film.objects.select_related('media').order_by('runtime')
+        self.assertEqual([film.media.title for film in films], [f'Film {i}' for i in range(5)])
+        self.assertEqual({film.media.media_type for film in films}, {Media.FILM})
+
+    def test_bulk_create_media_missing_params(self):
+        rows = [{'title': 'Series 1', 'airing_status': Series.FINISHED_AIRING}, {'title': 'Series 2'}]
+
+        with self.assertRaises(IntegrityError):
+            Media.bulk_create_media(Series, rows)
+
+        self.assertQuerysetEqual(Media.objects.all(), [])
+        self.assertQuerysetEqual(Series.objects.all(), [])
@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from media.models import Media, RelatedMedia, Film, Book, Series
@@ -34,6 +35,27 @@ class RelatedMediaTests(TestCase):
         self.assertEqual(relation.media2, self.media1)
         self.assertEqual(relation.relationship, Media.RELATED)
 
+    def test_add_related_media_duplicate(self):
+        self.media1.add_related_media(self.media2)
+
+        with self.assertRaisesMessage(IntegrityError, "already exists"):
+            self.media2.add_sequel(self.media1)
+        with self.assertRaisesMessage(IntegrityError, "already exists"):
+            self.media1.add_related_media(self.media2)
+        self.assertEqual(RelatedMedia.objects.count(), 1)
+
+    def test_add_related_media_single_query(self):
+        # A single INSERT wrapped in a savepoint, with no existence check beforehand
+        with self.assertNumQueries(3):
+            self.media1.add_related_media(self.media2)
+
+    def test_reverse_pair_rejected_by_database(self):
+        RelatedMedia.objects.create(media1=self.media1, media2=self.media2, relationship=Media.SEQUEL)
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                RelatedMedia.objects.create(media1=self.media2, media2=self.media1, relationship=Media.RELATED)
+
     def test_get_sequels(self):
         RelatedMedia.objects.create(media1=self.media2, media2=self.media1, relationship=Media.SEQUEL)
         RelatedMedia.objects.create(media1=self.media3, media2=self.media1, relationship=Media.SEQUEL)
@@ -58,3 +80,148 @@ class RelatedMediaTests(TestCase):
         self.media1.delete_related_media(self.media2)
 
         self.assertQuerysetEqual(RelatedMedia.objects.all(), [])
+
+    def test_get_sequels_single_query(self):
+        RelatedMedia.objects.create(media1=self.media2, media2=self.media1, relationship=Media.SEQUEL)
+
+        with self.assertNumQueries(1):
+            self.assertQuerysetEqual(self.media1.get_sequels(), [self.media2])
+
+    def test_get_relations(self):
+        RelatedMedia.objects.create(media1=self.media2, media2=self.media1, relationship=Media.SEQUEL)
+        RelatedMedia.objects.create(media1=self.media1, media2=self.media3, relationship=Media.SEQUEL)
+        RelatedMedia.objects.create(media1=self.media4, media2=self.media1, relationship=Media.RELATED)
+
+        with self.assertNumQueries(1):
+            relations = self.media1.get_relations()
+
+        self.assertEqual(relations, {
+            Media.SEQUELS: [self.media2],
+            Media.PREQUELS: [self.media3],
+            Media.RELATED_MEDIA: [self.media4]
+        })
+
+    def test_get_relations_cached(self):
+        self.media1.get_relations()
+
+        with self.assertNumQueries(0):
+            self.media1.get_relations()
+
+    def test_get_relations_reset_on_change(self):
+        self.assertEqual(self.media1.get_relations()[Media.SEQUELS], [])
+
+        self.media1.add_sequel(self.media2)
+
+        self.assertEqual(self.media1.get_relations()[Media.SEQUELS], [self.media2])
+
+    def test_prefetch_relations(self):
+        RelatedMedia.objects.create(media1=self.media2, media2=self.media1, relationship=Media.SEQUEL)
+        RelatedMedia.objects.create(media1=self.media3, media2=self.media4, relationship=Media.RELATED)
+
+        with self.assertNumQueries(2):
+            media_items = Media.prefetch_relations(Media.objects.order_by('pk'))
+            relations = [media.get_relations() for media in media_items]
+
+        self.assertEqual(relations[0][Media.SEQUELS], [self.media2])
+        self.assertEqual(relations[1][Media.PREQUELS], [self.media1])
+        self.assertEqual(relations[2][Media.RELATED_MEDIA], [self.media4])
+        self.assertEqual(relations[3][Media.RELATED_MEDIA], [self.media3])
+
+    def test_bulk_add_related_media(self):
+        added = Media.bulk_add_related_media([
+            (self.media2, self.media1, Media.SEQUEL),
+            (self.media4.pk, self.media3.pk, Media.RELATED),
+        ])
+
+        self.assertEqual(added, 2)
+        self.assertQuerysetEqual(self.media1.get_sequels(), [self.media2])
+        relation = RelatedMedia.objects.get(relationship=Media.RELATED)
+        self.assertEqual((relation.media1, relation.media2), (self.media3, self.media4))
+
+    def test_bulk_add_related_media_skips_duplicates(self):
+        self.media1.add_sequel(self.media2)
+
+        added = Media.bulk_add_related_media([
+            (self.media1, self.media2, Media.RELATED),
+            (self.media3, self.media4, Media.SEQUEL),
+            (self.media4, self.media3, Media.SEQUEL),
+            (self.media3, self.media3, Media.RELATED),
+        ], batch_size=1)
+
+        self.assertEqual(added, 1)
+        self.assertEqual(RelatedMedia.objects.count(), 2)
+        self.assertQuerysetEqual(self.media4.get_sequels(), [self.media3])
+
+    def test_bulk_add_related_media_counts_inserted_rows(self):
+        self.media1.add_sequel(self.media2)
+        self.media4.add_related_media(self.media3)
+
+        added = Media.bulk_add_related_media([
+            (self.media2, self.media1, Media.SEQUEL),
+            (self.media3, self.media4, Media.RELATED),
+            (self.media1, self.media3, Media.RELATED),
+        ])
+
+        self.assertEqual(added, 1)
+        self.assertEqual(RelatedMedia.objects.count(), 3)
+
+    def test_bulk_add_related_media_query_count(self):
+        edges = [(self.media1, self.media2, Media.SEQUEL), (self.media2, self.media3, Media.SEQUEL),
+                 (self.media3, self.media4, Media.SEQUEL)]
+
+        with self.assertNumQueries(1):
+            Media.bulk_add_related_media(edges)
+
+
+class MediaChainTests(TestCase):
+    def setUp(self):
+        self.films = [Media.create_film(title=f'Film {i}', release_status=Film.RELEASED) for i in range(1, 6)]
+        for prequel, sequel in zip(self.films, self.films[1:]):
+            prequel.add_sequel(sequel)
+
+    def test_get_chain_sequels(self):
+        with self.assertNumQueries(1):
+            chain = list(self.films[1].get_chain())
+
+        self.assertEqual(chain, self.films[2:])
+        self.assertEqual([media.distance for media in chain], [1, 2, 3])
+
+    def test_get_chain_prequels(self):
+        chain = list(self.films[3].get_chain(direction=Media.PREQUELS))
+
+        self.assertEqual(chain, [self.films[2], self.films[1], self.films[0]])
+        self.assertEqual([media.distance for media in chain], [-1, -2, -3])
+
+    def test_get_chain_invalid_direction(self):
+        with self.assertRaises(ValueError):
+            self.films[0].get_chain(direction=Media.RELATED_MEDIA)
+
+    def test_get_chain_max_depth(self):
+        chain = list(self.films[0].get_chain(max_depth=2))
+
+        self.assertEqual(chain, self.films[1:3])
+
+    def test_get_chain_ignores_related(self):
+        other = Media.create_book(title='Book', release_status=Book.PUBLISHED)
+        self.films[4].add_related_media(other)
+
+        self.assertEqual(list(self.films[3].get_chain()), [self.films[4]])
+
+    def test_get_chain_cycle(self):
+        self.films[4].add_sequel(self.films[0])
+
+        chain = list(self.films[0].get_chain())
+
+        self.assertEqual(chain, self.films[1:])
+
+    def test_get_franchise(self):
+        with self.assertNumQueries(1):
+            franchise = list(self.films[2].get_franchise())
+
+        self.assertEqual(franchise, self.films)
+        self.assertEqual([media.distance for media in franchise], [-2, -1, 0, 1, 2])
+
+    def test_get_franchise_standalone(self):
+        media = Media.create_book(title='Book', release_status=Book.PUBLISHED)
+
+        self.assertEqual(list(media.get_franchise()), [media])
@@ -0,0 +1,50 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from media.models import Media, Book, Film
+from media_list.models import ListEntry
+
+
+class ExportListCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="john_smith", password="password")
+        self.film = Media.create_film(title="Film, the sequel", release_status=Film.RELEASED)
+        book = Media.create_book(title="Book", release_status=Book.PUBLISHED)
+        ListEntry.objects.create(user=self.user, media=self.film, score=7, progress=90)
+        ListEntry.objects.create(user=self.user, media=book, progress=3)
+
+    def test_export_csv(self):
+        out = StringIO()
+
+        call_command('export_list', "john_smith", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "media_id,title,media_type,score,progress,updated_at")
+        self.assertTrue(lines[1].startswith(f'{self.film.pk},"Film, the sequel",film,7.0,90,'))
+        self.assertIn(",Book,book,,3,", lines[2])
+        self.assertEqual(len(lines), 3)
+
+    def test_export_jsonl_of_type(self):
+        out = StringIO()
+
+        call_command('export_list', "john_smith", '--type', 'film', '--format', 'jsonl', stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(row['title'], row['score'], row['progress']) for row in rows],
+                         [("Film, the sequel", "7.0", 90)])
+
+    def test_export_uses_server_side_cursor(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('export_list', "john_smith", stdout=StringIO())
+
+        self.assertTrue(any(query['sql'].startswith("DECLARE") for query in queries))
+
+    def test_export_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('export_list', "nobody", stdout=StringIO())
@@ -0,0 +1,147 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from accounts.models import User
+from media.models import Media, Book, Film
+from media_list.importer import import_rows
+from media_list.models import ListEntry, ListRow, UserListStats
+from utils.testing import TempFileMixin
+
+
+class ImportListTests(TempFileMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="john_smith", password="password")
+        self.film = Media.create_film(title="Dune", release_status=Film.RELEASED)
+        self.book = Media.create_book(title="Dune", release_status=Book.PUBLISHED)
+        self.other_film = Media.create_film(title="Arrival", release_status=Film.RELEASED)
+
+    def test_import_rows(self):
+        result = import_rows(self.user, [
+            {'title': "arrival", 'score': "8", 'progress': "116"},
+            {'media_id': self.book.pk, 'score': None, 'progress': 3},
+            {'title': "Dune", 'media_type': 'film', 'score': 9.5},
+        ])
+
+        entries = ListEntry.objects.filter(user=self.user).order_by('media__title', 'media__media_type')
+        self.assertEqual([(entry.media, entry.score, entry.progress) for entry in entries], [
+            (self.other_film, Decimal("8.0"), 116), (self.book, None, 3), (self.film, Decimal("9.5"), 0)])
+        self.assertEqual((result.processed, result.imported, result.errors), (3, 3, []))
+
+    def test_import_updates_existing(self):
+        ListEntry.objects.create(user=self.user, media=self.other_film, score=5, progress=10)
+
+        import_rows(self.user, [{'title': "Arrival", 'score': "7"}, {'title': "Arrival", 'progress': "20"}])
+
+        entry = ListEntry.objects.get(user=self.user)
+        self.assertEqual((entry.score, entry.progress), (None, 20))
+
+    def test_import_rebuilds_stats(self):
+        other_user = User.objects.create_user(username="jane_smith", password="password")
+        ListEntry.objects.create(user=other_user, media=self.other_film, score=6)
+
+        import_rows(self.user, [{'title': "Arrival", 'score': "8", 'progress': 100}])
+
+        stats = UserListStats.get_user_type_stats(self.user, Media.FILM)
+        self.assertEqual((stats.entries, stats.mean_score, stats.progress_total), (1, 8, 100))
+        self.other_film.refresh_from_db()
+        self.assertEqual((self.other_film.members, self.other_film.score), (2, 7))
+
+    def test_import_errors(self):
+        result = import_rows(self.user, [
+            {'title': "Dune"},
+            {'title': "Unknown"},
+            {'media_id': 0},
+            {'media_id': self.book.pk, 'media_type': 'film'},
+            {'title': "Arrival", 'score': "11"},
+            {'title': "Arrival", 'score': "NaN"},
+            {'title': "Arrival", 'progress': "-1"},
+            {'title': "Arrival", 'media_type': 'game'},
+            {},
+            {'title': "Arrival"},
+        ], batch_size=4)
+
+        self.assertEqual([number for number, _ in result.errors], [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertIn("More than one media titled 'Dune'", result.errors[0][1])
+        self.assertEqual((result.processed, result.imported), (10, 1))
+
+    def test_import_invalid_rows(self):
+        result = import_rows(self.user, [
+            ["F", 1],
+            "Arrival",
+            {'title': 5},
+            {'title': "Arrival", 'media_type': ["film"]},
+            {'media_id': {'id': 1}},
+            {'title': "Arrival", 'score': True},
+            {'title': "Arrival", 'progress': [1]},
+            {'title': "Arrival", 'score': 8, 'progress': 2.0},
+        ], batch_size=3)
+
+        self.assertEqual(result.errors, [
+            (1, "Expected an object, not list"), (2, "Expected an object, not str"), (3, "Invalid title 5"),
+            (4, "Invalid media_type ['film']"), (5, "Invalid media_id {'id': 1}"), (6, "Invalid score True"),
+            (7, "Invalid progress [1]")])
+        self.assertEqual((result.processed, result.imported), (8, 1))
+
+    def test_import_progress_out_of_range(self):
+        result = import_rows(self.user, [
+            {'title': "Arrival", 'progress': 99999999999},
+            {'title': "Arrival", 'progress': "2147483648"},
+            {'title': "Arrival", 'progress': float('inf')},
+            {'title': "Arrival", 'progress': 2147483647},
+        ])
+
+        self.assertEqual([number for number, _ in result.errors], [1, 2, 3])
+        self.assertEqual(result.errors[2], (3, "Invalid progress inf"))
+        self.assertEqual(ListEntry.objects.get(user=self.user).progress, 2147483647)
+
+    def test_import_media_type(self):
+        result = import_rows(self.user, [{'title': "Dune"}], media_type=Media.BOOK)
+
+        self.assertEqual(result.errors, [])
+        self.assertEqual(ListEntry.objects.get(user=self.user).media, self.book)
+
+    def test_import_batch_queries(self):
+        rows = [{'media_id': self.film.pk}, {'title': "Arrival"}, {'media_id': self.book.pk}]
+
+        # Per batch: a savepoint, the media lookup and the upsert. Then a savepoint, the stats rebuild (a select,
+        # delete and insert in its own savepoint), the media totals and the list rows
+        with self.assertNumQueries(3 * 4 + 9):
+            import_rows(self.user, rows, batch_size=1)
+
+    def test_import_refreshes_list_rows(self):
+        ListEntry.objects.create(user=self.user, media=self.film, score=5)
+
+        import_rows(self.user, [{'media_id': self.film.pk, 'score': 9}, {'title': "Arrival", 'progress': 2}])
+
+        rows = ListRow.objects.filter(user=self.user).order_by('title')
+        self.assertEqual([(row.title, row.score, row.progress) for row in rows],
+                         [("Arrival", None, 2), ("Dune", Decimal(9), 0)])
+
+    def test_command(self):
+        path = self.write_file('.csv', "title,media_type,score,progress\nDune,book,7,100\nNobody,,,\n")
+        out, err = StringIO(), StringIO()
+
+        call_command('import_list', "john_smith", path, stdout=out, stderr=err)
+
+        self.assertEqual(ListEntry.objects.get(user=self.user).media, self.book)
+        self.assertIn("Processed 2 rows", out.getvalue())
+        self.assertIn("Imported 1 entries", out.getvalue())
+        self.assertIn("Row 2: No media titled 'Nobody'", err.getvalue())
+
+    def test_command_round_trip(self):
+        ListEntry.objects.create(user=self.user, media=self.film, score=9, progress=155)
+        path = self.write_file('.jsonl', "")
+        call_command('export_list', "john_smith", '--format', 'jsonl', '--output', path)
+        other_user = User.objects.create_user(username="jane_smith", password="password")
+
+        call_command('import_list', "jane_smith", path, stdout=StringIO())
+
+        entry = ListEntry.objects.get(user=other_user)
+        self.assertEqual((entry.media, entry.score, entry.progress), (self.film, 9, 155))
+
+    def test_command_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('import_list', "nobody", "list.csv", stdout=StringIO())
@@ -41,3 +41,25 @@ class ListEntryModelTests(TestCase):
         ListEntry.objects.create(user=self.user2, media=self.series)
 
         self.assertQuerysetEqual(ListEntry.get_user_series_list(self.user), [series_list_entry])
+
+    def test_get_user_lists(self):
+        other_film = Media.create_film(title="Film 0", release_status=Film.RELEASED)
+        film_entries = [ListEntry.objects.create(user=self.user, media=media) for media in [self.film, other_film]]
+        book_entry = ListEntry.objects.create(user=self.user, media=self.book)
+        ListEntry.objects.create(user=self.user2, media=self.series)
+
+        with self.assertNumQueries(1):
+            lists = ListEntry.get_user_lists(self.user)
+            progress_totals = [entry.progress_total for entries in lists.values() for entry in entries]
+
+        self.assertEqual(lists, {Media.FILM: film_entries[::-1], Media.SERIES: [], Media.BOOK: [book_entry]})
+        self.assertEqual(progress_totals, [None, None, None])
+
+    def test_get_user_lists_sorted(self):
+        low = ListEntry.objects.create(user=self.user, media=self.film, score=3)
+        other_film = Media.create_film(title="Film 2", release_status=Film.RELEASED)
+        high = ListEntry.objects.create(user=self.user, media=other_film, score=9)
+
+        lists = ListEntry.get_user_lists(self.user, ListEntry.SORT_SCORE, 'desc')
+
+        self.assertEqual(lists[Media.FILM], [high, low])
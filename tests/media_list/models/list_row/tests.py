@@ -0,0 +1,97 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import User
+from media.models import Media, Book, Film, Series
+from media_list.models import ListEntry, ListRow
+
+
+class ListRowTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="TestUser", email="test@example.com")
+        self.film = Media.create_film(title="Film", release_status=Film.RELEASED, runtime=120)
+        self.series = Media.create_series(title="Series", airing_status=Series.FINISHED_AIRING, episodes=12)
+        self.book = Media.create_book(title="Book", release_status=Book.PUBLISHED)
+
+    def assertRowsMatchEntries(self):
+        rows = {row.pk: (row.user_id, row.media_type, row.title, row.score, row.progress, row.progress_total)
+                for row in ListRow.objects.all()}
+        entries = {entry.pk: (entry.user_id, entry.media.media_type, entry.media.title, entry.score, entry.progress,
+                              entry.progress_total)
+                   for entry in ListEntry.objects.select_related('media__film', 'media__series', 'media__book')}
+        self.assertEqual(rows, entries)
+
+    def test_entry_created(self):
+        entry = ListEntry.objects.create(user=self.user, media=self.film, score=8, progress=60)
+
+        row = ListRow.objects.get(pk=entry.pk)
+        self.assertEqual((row.user, row.media_type, row.title, row.score, row.progress, row.progress_total),
+                         (self.user, Media.FILM, "Film", Decimal(8), 60, 120))
+
+    def test_entry_updated(self):
+        entry = ListEntry.objects.create(user=self.user, media=self.series)
+        entry.score = 6
+        entry.progress = 4
+        entry.save()
+
+        self.assertEqual(ListRow.objects.get(pk=entry.pk).progress, 4)
+        self.assertRowsMatchEntries()
+
+    def test_entry_deleted(self):
+        entry = ListEntry.objects.create(user=self.user, media=self.book)
+        entry.delete()
+
+        self.assertFalse(ListRow.objects.exists())
+
+    def test_media_renamed(self):
+        ListEntry.objects.create(user=self.user, media=self.film)
+        self.film.title = "Renamed film"
+        self.film.save()
+
+        self.assertEqual(ListRow.objects.get().title, "Renamed film")
+
+    def test_subtype_changed(self):
+        ListEntry.objects.create(user=self.user, media=self.series)
+        self.series.series.episodes = 24
+        self.series.series.save()
+
+        self.assertEqual(ListRow.objects.get().progress_total, 24)
+
+    def test_media_deleted(self):
+        ListEntry.objects.create(user=self.user, media=self.film)
+        self.film.delete()
+
+        self.assertFalse(ListRow.objects.exists())
+
+    def test_refresh_after_bulk_update(self):
+        entries = [ListEntry.objects.create(user=self.user, media=media) for media in [self.film, self.book]]
+        ListEntry.objects.filter(pk=entries[0].pk).update(score=3)
+
+        self.assertEqual(ListRow.refresh(entry_ids=[entries[0].pk]), 1)
+        self.assertEqual(ListRow.refresh(), 0)
+        self.assertRowsMatchEntries()
+
+    def test_sorted(self):
+        high = ListEntry.objects.create(user=self.user, media=self.film, score=9)
+        other_film = Media.create_film(title="A film", release_status=Film.RELEASED)
+        unscored = ListEntry.objects.create(user=self.user, media=other_film)
+
+        rows = ListRow.get_user_rows(self.user, Media.FILM)
+
+        self.assertEqual([row.pk for row in ListRow.sort_entries(rows, ListEntry.SORT_TITLE).order_by('sort_key')],
+                         [unscored.pk, high.pk])
+        self.assertEqual([row.pk for row in ListRow.sort_entries(rows, ListEntry.SORT_SCORE).order_by('-sort_key')],
+                         [high.pk, unscored.pk])
+
+    def test_refresh_command(self):
+        ListEntry.objects.create(user=self.user, media=self.film)
+        ListRow.objects.all().delete()
+        out = StringIO()
+
+        call_command('refresh_list_rows', stdout=out)
+
+        self.assertIn("1 rows changed", out.getvalue())
+        self.assertRowsMatchEntries()
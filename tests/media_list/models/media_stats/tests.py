@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+
+
+class MediaStatsTests(TestCase):
+    def setUp(self) -> None:
+        self.users = [User.objects.create_user(username=f"TestUser{i}") for i in range(4)]
+        self.film = Media.create_film(title="Film 1", release_status=Film.RELEASED)
+        self.other_film = Media.create_film(title="Film 2", release_status=Film.RELEASED)
+
+    def get_stats(self, media):
+        media.refresh_from_db()
+        return media.members, media.scored_members, media.score_total, media.score
+
+    def assertMatchesRecompute(self, *media_items):
+        incremental = [self.get_stats(media) for media in media_items]
+        Media.objects.update(members=0, scored_members=0, score_total=0, score=0)
+
+        ListEntry.recompute_media_stats()
+
+        self.assertEqual([self.get_stats(media) for media in media_items], incremental)
+
+    def test_entries_created(self):
+        ListEntry.objects.create(user=self.users[0], media=self.film, score=8)
+        ListEntry.objects.create(user=self.users[1], media=self.film, score=7)
+        ListEntry.objects.create(user=self.users[2], media=self.film, score=7)
+        ListEntry.objects.create(user=self.users[3], media=self.film)
+
+        self.assertEqual(self.get_stats(self.film), (4, 3, Decimal(22), Decimal("7.33")))
+        self.assertMatchesRecompute(self.film, self.other_film)
+
+    def test_entry_rescored(self):
+        entry = ListEntry.objects.create(user=self.users[0], media=self.film, score=8)
+        ListEntry.objects.create(user=self.users[1], media=self.film, score=5)
+
+        entry.score = Decimal("9.5")
+        entry.save()
+        self.assertEqual(self.get_stats(self.film), (2, 2, Decimal("14.5"), Decimal("7.25")))
+
+        entry.score = None
+        entry.save()
+        self.assertEqual(self.get_stats(self.film), (2, 1, Decimal(5), Decimal(5)))
+        self.assertMatchesRecompute(self.film)
+
+    def test_entry_moved_to_other_media(self):
+        entry = ListEntry.objects.create(user=self.users[0], media=self.film, score=6)
+
+        entry.media = self.other_film
+        entry.save()
+
+        self.assertEqual(self.get_stats(self.film), (0, 0, Decimal(0), Decimal(0)))
+        self.assertEqual(self.get_stats(self.other_film), (1, 1, Decimal(6), Decimal(6)))
+        self.assertMatchesRecompute(self.film, self.other_film)
+
+    def test_entry_deleted(self):
+        ListEntry.objects.create(user=self.users[0], media=self.film, score=6)
+        ListEntry.objects.create(user=self.users[1], media=self.film, score=3)
+
+        ListEntry.objects.filter(user=self.users[0]).get().delete()
+
+        self.assertEqual(self.get_stats(self.film), (1, 1, Decimal(3), Decimal(3)))
+        self.assertMatchesRecompute(self.film)
+
+    def test_user_deleted(self):
+        ListEntry.objects.create(user=self.users[0], media=self.film, score=6)
+
+        self.users[0].delete()
+
+        self.assertEqual(self.get_stats(self.film), (0, 0, Decimal(0), Decimal(0)))
+
+    def test_recompute_only_changed(self):
+        ListEntry.objects.create(user=self.users[0], media=self.film, score=6)
+        Media.objects.filter(pk=self.film.pk).update(members=10)
+
+        self.assertEqual(ListEntry.recompute_media_stats(), 1)
+        self.assertEqual(ListEntry.recompute_media_stats(), 0)
+        self.assertEqual(self.get_stats(self.film), (1, 1, Decimal(6), Decimal(6)))
+
+    def test_recompute_selected_media(self):
+        Media.objects.update(members=10)
+
+        ListEntry.recompute_media_stats([self.film.pk])
+
+        self.assertEqual(self.get_stats(self.film)[0], 0)
+        self.assertEqual(self.get_stats(self.other_film)[0], 10)
+
+    def test_recompute_media_stats_command(self):
+        ListEntry.objects.create(user=self.users[0], media=self.film, score=6)
+        Media.objects.update(members=0, scored_members=0, score_total=0, score=0)
+        out = StringIO()
+
+        call_command('recompute_media_stats', stdout=out)
+
+        self.assertEqual(self.get_stats(self.film), (1, 1, Decimal(6), Decimal(6)))
+        self.assertIn("1 media changed", out.getvalue())
@@ -0,0 +1,119 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+from accounts.models import User
+from media.models import Media, Film, Book
+from media_list.models import ListEntry, UserListStats
+
+
+class UserListStatsTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="TestUser", email="test@example.com")
+        self.films = [Media.create_film(title=f"Film {i}", release_status=Film.RELEASED) for i in range(3)]
+        self.book = Media.create_book(title="Book 1", release_status=Book.PUBLISHED)
+
+    def assertStats(self, media_type, entries, scored_entries, score_total, progress_total):
+        stats = UserListStats.get_user_stats(self.user)[media_type]
+        self.assertEqual((stats.entries, stats.scored_entries, stats.score_total, stats.progress_total),
+                         (entries, scored_entries, score_total, progress_total))
+
+    def assertMatchesRebuild(self):
+        incremental = {key: (stats.entries, stats.scored_entries, stats.score_total, stats.progress_total)
+                       for key, stats in UserListStats.get_user_stats(self.user).items()}
+        UserListStats.rebuild(self.user)
+        rebuilt = {key: (stats.entries, stats.scored_entries, stats.score_total, stats.progress_total)
+                   for key, stats in UserListStats.get_user_stats(self.user).items()}
+        self.assertEqual(incremental, rebuilt)
+
+    def test_empty_stats(self):
+        stats = UserListStats.get_user_stats(self.user)
+
+        self.assertEqual(list(stats.keys()), [Media.FILM, Media.SERIES, Media.BOOK])
+        self.assertEqual(stats[Media.FILM].entries, 0)
+        self.assertIsNone(stats[Media.FILM].mean_score)
+
+    def test_entries_created(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=8, progress=100)
+        ListEntry.objects.create(user=self.user, media=self.films[1], progress=20)
+        ListEntry.objects.create(user=self.user, media=self.book, score=Decimal("6.5"))
+
+        self.assertStats(Media.FILM, 2, 1, Decimal(8), 120)
+        self.assertStats(Media.BOOK, 1, 1, Decimal("6.5"), 0)
+        self.assertMatchesRebuild()
+
+    def test_entry_updated(self):
+        entry = ListEntry.objects.create(user=self.user, media=self.films[0], progress=10)
+        ListEntry.objects.create(user=self.user, media=self.films[1], score=4)
+
+        entry.score = 9
+        entry.progress = 50
+        entry.save()
+        entry = ListEntry.objects.get(pk=entry.pk)
+        entry.score = None
+        entry.save()
+
+        self.assertStats(Media.FILM, 2, 1, Decimal(4), 50)
+        self.assertMatchesRebuild()
+
+    def test_entry_media_changed(self):
+        entry = ListEntry.objects.create(user=self.user, media=self.films[0], score=5, progress=3)
+
+        entry.media = self.book
+        entry.save()
+
+        self.assertStats(Media.FILM, 0, 0, Decimal(0), 0)
+        self.assertStats(Media.BOOK, 1, 1, Decimal(5), 3)
+        self.assertMatchesRebuild()
+
+    def test_entry_deleted(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=5, progress=3)
+        ListEntry.objects.create(user=self.user, media=self.films[1], score=7, progress=4)
+
+        ListEntry.objects.get(media=self.films[0]).delete()
+
+        self.assertStats(Media.FILM, 1, 1, Decimal(7), 4)
+        self.assertMatchesRebuild()
+
+    def test_media_deleted(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=5, progress=3)
+
+        self.films[0].delete()
+
+        self.assertStats(Media.FILM, 0, 0, Decimal(0), 0)
+
+    def test_user_deleted(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=5, progress=3)
+
+        self.user.delete()
+
+        self.assertQuerysetEqual(UserListStats.objects.all(), [])
+
+    def test_rebuild_rolled_back(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=5, progress=3)
+
+        with patch.object(UserListStats.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                UserListStats.rebuild(self.user)
+
+        self.assertStats(Media.FILM, 1, 1, Decimal(5), 3)
+
+    def test_mean_score(self):
+        ListEntry.objects.create(user=self.user, media=self.films[0], score=5)
+        ListEntry.objects.create(user=self.user, media=self.films[1], score=6)
+        ListEntry.objects.create(user=self.user, media=self.films[2], score=6)
+
+        self.assertEqual(UserListStats.get_user_stats(self.user)[Media.FILM].mean_score, Decimal("5.67"))
+
+    def test_from_entries(self):
+        for film, score in zip(self.films, [7, None, 8]):
+            ListEntry.objects.create(user=self.user, media=film, score=score, progress=10)
+
+        entries = ListEntry.get_user_lists(self.user)[Media.FILM]
+        stats = UserListStats.from_entries(self.user, Media.FILM, entries)
+
+        self.assertEqual((stats.entries, stats.scored_entries, stats.score_total, stats.progress_total),
+                         (3, 2, Decimal(15), 30))
+        self.assertEqual(stats.mean_score, Decimal('7.5'))
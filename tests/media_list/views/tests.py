@@ -1,9 +1,22 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import Http404
+from django.db import connection
+from django.test import TestCase, RequestFactory, AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 
 from accounts.models import User
 from media.models import Media, Book, Film, Series
 from media_list.models import ListEntry
+from media_list.views import SeriesListView, FilmListView, AsyncFilmListView, AsyncSeriesListView
 
 
 class MediaListViewTests(TestCase):
@@ -87,3 +100,407 @@ class MediaListViewTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.template_name, ['media_list/list.html'])
         self.assertQuerysetEqual(response.context_data['list_objects'], [self.series_list_entry])
+
+
+class MediaListPaginationTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.entries = []
+        for i, (score, progress) in enumerate([(7, 3), (None, 10), (9, 1), (7, 0)]):
+            series = Media.create_series(title=f"Series {i}", episodes=12, airing_status=Series.FINISHED_AIRING)
+            self.entries.append(ListEntry.objects.create(media=series, user=self.user, score=score, progress=progress))
+        self.url = reverse('media_list:series-list', kwargs={'username': self.user.username})
+
+    def test_sorted_by_title(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context_data['list_objects'], self.entries)
+        self.assertContains(response, "3 / 12")
+
+    def test_sorted_by_score(self):
+        response = self.client.get(self.url, {'sort': 'score'})
+
+        self.assertEqual(response.context_data['list_objects'],
+                         [self.entries[2], self.entries[3], self.entries[0], self.entries[1]])
+
+    def test_sorted_by_progress_ascending(self):
+        response = self.client.get(self.url, {'sort': 'progress', 'order': 'asc'})
+
+        self.assertEqual(response.context_data['list_objects'],
+                         [self.entries[3], self.entries[2], self.entries[0], self.entries[1]])
+
+    def test_invalid_sort_uses_default(self):
+        response = self.client.get(self.url, {'sort': 'password', 'order': 'sideways'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['sort'], 'title')
+        self.assertEqual(response.context_data['order'], 'asc')
+
+    @patch.object(SeriesListView, 'paginate_by', 3)
+    def test_paginated(self):
+        page1 = self.client.get(self.url, {'sort': 'score'}).context_data['page_obj']
+        page2 = self.client.get(self.url, {'sort': 'score', 'cursor': page1.next_cursor}).context_data['page_obj']
+
+        self.assertEqual(page1.object_list, [self.entries[2], self.entries[3], self.entries[0]])
+        self.assertEqual(page2.object_list, [self.entries[1]])
+        self.assertFalse(page2.has_next())
+
+    def test_list_stats(self):
+        response = self.client.get(self.url)
+
+        stats = response.context_data['list_stats']
+        self.assertEqual((stats.entries, stats.mean_score, stats.progress_total), (4, Decimal("7.67"), 14))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'invalid'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        for sort, values in [('score', ["high", self.entries[0].pk]), ('title', ["Series 0", "x"]),
+                             ('progress', [2 ** 40, self.entries[0].pk])]:
+            with self.subTest(sort):
+                cursor = base64.urlsafe_b64encode(json.dumps(["n", values]).encode()).decode()
+
+                self.assertEqual(self.client.get(self.url, {'sort': sort, 'cursor': cursor}).status_code, 404)
+
+    def test_single_list_query(self):
+        # The page user, the list's ETag, the list and the list stats, however many entries are rendered
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+
+@override_settings(LIST_ROWS_ENABLED=True)
+class ListRowViewTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.entries = []
+        for i, (score, progress) in enumerate([(7, 3), (None, 10), (9, 1), (7, 0)]):
+            series = Media.create_series(title=f"Series {i}", episodes=12, airing_status=Series.FINISHED_AIRING)
+            self.entries.append(ListEntry.objects.create(media=series, user=self.user, score=score, progress=progress))
+        self.url = reverse('media_list:series-list', kwargs={'username': self.user.username})
+        # Logged in, so that pages aren't served from the public page cache
+        self.client.login(username="john_smith", password="password")
+
+    def get_pks(self, response):
+        return [row.pk for row in response.context_data['list_objects']]
+
+    def test_matches_list_entries(self):
+        for sort in ['title', 'score', 'progress']:
+            with self.subTest(sort):
+                response = self.client.get(self.url, {'sort': sort})
+                with override_settings(LIST_ROWS_ENABLED=False):
+                    expected = self.client.get(self.url, {'sort': sort})
+
+                self.assertEqual(response.render().content, expected.render().content)
+                self.assertEqual(self.get_pks(response), [entry.pk for entry in expected.context_data['list_objects']])
+
+    @patch.object(SeriesListView, 'paginate_by', 3)
+    def test_paginated(self):
+        page1 = self.client.get(self.url, {'sort': 'score'})
+        page2 = self.client.get(self.url, {'sort': 'score', 'cursor': page1.context_data['page_obj'].next_cursor})
+
+        self.assertEqual(self.get_pks(page1), [self.entries[i].pk for i in [2, 3, 0]])
+        self.assertEqual(self.get_pks(page2), [self.entries[1].pk])
+
+    def test_no_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+
+        list_query = next(query['sql'] for query in queries if 'media_list_listrow' in query['sql'])
+        self.assertNotIn("JOIN", list_query)
+
+    def test_entry_changed(self):
+        self.entries[0].progress = 12
+        self.entries[0].save()
+
+        self.assertContains(self.client.get(self.url), "12 / 12")
+
+
+class MediaListConditionalGetTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        self.entry = ListEntry.objects.create(media=self.film, user=self.user, score=7)
+        self.url = reverse('media_list:film-list')
+        self.client.login(username="john_smith", password="password")
+
+    def get_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_not_modified(self):
+        etag = self.get_etag()
+
+        # The session, the user and the list's ETag, without querying for or rendering the list
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_no_last_modified(self):
+        other = Media.create_film(title="Other film", release_status=Film.RELEASED)
+        ListEntry.objects.create(media=other, user=self.user)
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        self.entry.delete()
+
+        # Deleting the entry leaves the latest change time as it was
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_entry_changed(self):
+        etag = self.get_etag()
+        self.entry.score = 8
+        self.entry.save()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_entry_deleted(self):
+        other = Media.create_film(title="Other film", release_status=Film.RELEASED)
+        ListEntry.objects.create(media=other, user=self.user)
+        etag = self.get_etag()
+        self.entry.delete()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_media_changed(self):
+        etag = self.get_etag()
+        self.film.title = "Renamed film"
+        self.film.save()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_subtype_changed(self):
+        etag = self.get_etag()
+        self.film.film.runtime = 95
+        self.film.film.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "/ 95")
+
+    def test_other_list_type_unchanged(self):
+        etag = self.get_etag()
+        book = Media.create_book(title="Book", release_status=Book.PUBLISHED)
+        ListEntry.objects.create(media=book, user=self.user)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_etag_per_viewer(self):
+        etag = self.get_etag()
+        self.client.logout()
+        url = reverse('media_list:film-list', kwargs={'username': self.user.username})
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=self.client.get(url)['ETag']).status_code, 304)
+
+
+class AllListViewTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.film = Media.create_film(title="Film", release_status=Film.RELEASED, runtime=120)
+        book = Media.create_book(title="Book", release_status=Book.PUBLISHED, chapters=30)
+        ListEntry.objects.create(media=self.film, user=self.user, score=7, progress=120)
+        ListEntry.objects.create(media=book, user=self.user, score=9, progress=3)
+        self.url = reverse('media_list:all-lists', kwargs={'username': self.user.username})
+
+    def test_all_lists(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'media_list/all-lists.html')
+        lists = {media_list['name']: media_list for media_list in response.context_data['lists']}
+        self.assertEqual([entry.media for entry in lists["Film"]['entries']], [self.film])
+        self.assertEqual(lists["Film"]['stats'].mean_score, 7)
+        self.assertEqual(lists["Series"]['entries'], [])
+        self.assertEqual(lists["Book"]['url'], reverse('media_list:book-list', args=[self.user.username]))
+        self.assertContains(response, "120 / 120")
+        self.assertContains(response, "3 / 30")
+
+    def test_single_list_query(self):
+        self.client.login(username="john_smith", password="password")
+        self.client.get(self.url)
+
+        # The session, the viewer, the list's ETag and every entry with its media and subtype
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_own_lists_not_logged_in(self):
+        url = reverse('media_list:all-lists')
+
+        response = self.client.get(url)
+
+        self.assertRedirects(response, f"{reverse('accounts:login')}?next={url}", fetch_redirect_response=False)
+
+    def test_media_changed(self):
+        self.client.login(username="john_smith", password="password")
+        etag = self.client.get(self.url)['ETag']
+        self.film.title = "Renamed film"
+        self.film.save()
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AsyncMediaListViewTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.viewer = User.objects.create_user(username="jane_doe", email="jane.doe@test.com", password="password")
+        for i in range(3):
+            film = Media.create_film(title=f"Film {i}", release_status=Film.RELEASED)
+            ListEntry.objects.create(media=film, user=self.user, score=i + 1)
+        self.url = reverse('media_list:film-list', kwargs={'username': self.user.username})
+
+    def get(self, view_class, data=None, **headers):
+        request = AsyncRequestFactory().get(self.url, data)
+        request.META.update(headers)
+        request.user = self.viewer
+        return async_to_sync(view_class.as_view())(request, username=self.user.username)
+
+    def test_async(self):
+        self.assertTrue(AsyncFilmListView.view_is_async)
+        self.assertFalse(FilmListView.view_is_async)
+
+    def test_matches_sync_view(self):
+        request = RequestFactory().get(self.url, {'sort': 'score'})
+        request.user = self.viewer
+        expected = FilmListView.as_view()(request, username=self.user.username)
+
+        response = self.get(AsyncFilmListView, {'sort': 'score'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.render().content, expected.render().content)
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+    def test_queries(self):
+        # The list's user, its ETag, the list and its stats
+        with self.assertNumQueries(4):
+            response = self.get(AsyncFilmListView)
+        self.assertEqual(len(response.context_data['list_objects']), 3)
+
+    def test_not_modified(self):
+        etag = self.get(AsyncFilmListView)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.get(AsyncFilmListView, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_empty_list(self):
+        response = self.get(AsyncSeriesListView)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context_data['list_stats'].entries, 0)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(Http404):
+            self.get(AsyncFilmListView, {'cursor': "not-a-cursor"})
+        cursor = base64.urlsafe_b64encode(json.dumps(["n", ["high", 1]]).encode()).decode()
+        with self.assertRaises(Http404):
+            self.get(AsyncFilmListView, {'sort': 'score', 'cursor': cursor})
+
+    def test_user_not_found(self):
+        self.url = reverse('media_list:film-list', kwargs={'username': "nobody"})
+        request = AsyncRequestFactory().get(self.url)
+        request.user = self.viewer
+
+        with self.assertRaises(Http404):
+            async_to_sync(AsyncFilmListView.as_view())(request, username="nobody")
+
+
+class ListExportViewTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        film = Media.create_film(title="Film & <Friends>", release_status=Film.RELEASED)
+        ListEntry.objects.create(media=film, user=self.user, score=8, progress=100)
+        self.url = reverse('media_list:list-export', kwargs={'list_type': 'films', 'username': "john_smith"})
+
+    def test_export_csv(self):
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="john_smith-films.csv"')
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Film & <Friends>,film,8.0,100,", content)
+
+    def test_export_xml(self):
+        response = self.client.get(self.url, {'format': 'xml'})
+
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("<title>Film &amp; &lt;Friends&gt;</title>", content)
+        self.assertIn("<my_score>8.0</my_score><my_progress>100</my_progress>", content)
+        self.assertTrue(content.endswith("</mymedialist>\n"))
+
+    def test_export_other_list_type(self):
+        url = reverse('media_list:list-export', kwargs={'list_type': 'books', 'username': "john_smith"})
+
+        content = b"".join(self.client.get(url).streaming_content).decode()
+        self.assertEqual(content.splitlines(), ["media_id,title,media_type,score,progress,updated_at"])
+
+    def test_export_own_list_not_logged_in(self):
+        response = self.client.get(reverse('media_list:list-export', kwargs={'list_type': 'all'}))
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_export_invalid(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'pdf'}).status_code, 404)
+        url = reverse('media_list:list-export', kwargs={'list_type': 'games', 'username': "john_smith"})
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ListImportViewTests(TestCase):
+    url = reverse('media_list:list-import')
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="john_smith", email="john.smith@test.com", password="password")
+        self.film = Media.create_film(title="Film", release_status=Film.RELEASED)
+
+    def test_import_not_logged_in(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+
+    def test_import(self):
+        self.client.login(username="john_smith", password="password")
+        upload = SimpleUploadedFile("list.csv", b"title,score,progress\nFilm,8,90\nMissing,,\n")
+
+        response = self.client.post(self.url, {'file': upload, 'media_type': 'film'})
+
+        self.assertContains(response, "Imported 1 of 2 rows")
+        self.assertContains(response, "No media titled &#x27;Missing&#x27;")
+        self.assertEqual(ListEntry.objects.get(user=self.user).score, 8)
+
+    def test_import_invalid_json_rows(self):
+        self.client.login(username="john_smith", password="password")
+        upload = SimpleUploadedFile("list.jsonl", b'["F", 1]\n{"title": 5}\n{"title": "Film", "score": 8}\n')
+
+        response = self.client.post(self.url, {'file': upload})
+
+        self.assertContains(response, "Imported 1 of 3 rows")
+        self.assertContains(response, "Expected an object, not list")
+        self.assertContains(response, "Invalid title 5")
+
+    def test_import_json_infinity(self):
+        self.client.login(username="john_smith", password="password")
+        upload = SimpleUploadedFile("list.jsonl", b'{"title": "Film", "progress": Infinity}\n')
+
+        response = self.client.post(self.url, {'file': upload})
+
+        self.assertContains(response, "Invalid progress inf")
+
+    def test_import_malformed_csv(self):
+        self.client.login(username="john_smith", password="password")
+        upload = SimpleUploadedFile("list.csv", b'title\n"' + b"x" * 200000 + b'"\n')
+
+        response = self.client.post(self.url, {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cannot import the file: field larger than field limit")
+
+    def test_import_unknown_format(self):
+        self.client.login(username="john_smith", password="password")
+        upload = SimpleUploadedFile("list.xlsx", b"")
+
+        response = self.client.post(self.url, {'file': upload})
+
+        self.assertContains(response, "Cannot detect the format")
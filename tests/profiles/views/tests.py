@@ -1,7 +1,11 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.test import TestCase, RequestFactory, AsyncRequestFactory
 from django.urls import reverse
 
 from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+from profiles.views import ProfileView, AsyncProfileView
 
 
 class ProfileTests(TestCase):
@@ -34,8 +38,61 @@ class ProfileTests(TestCase):
         self.assertEqual(response.template_name, ['profiles/profile.html'])
         self.assertContains(response, other_user.username)
 
+    def test_profile_list_stats(self):
+        film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        ListEntry.objects.create(user=self.user, media=film, score=8, progress=90)
+        url = reverse("profiles:profile", kwargs={'username': self.user.username})
+
+        response = self.client.get(url)
+
+        stats = {stats.media_type: stats for stats in response.context_data['list_stats']}
+        self.assertEqual(stats[Media.FILM].entries, 1)
+        self.assertEqual(stats[Media.FILM].mean_score, 8)
+        self.assertEqual(stats[Media.BOOK].entries, 0)
+
+    def test_profile_not_modified(self):
+        url = reverse("profiles:profile", kwargs={'username': self.user.username})
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            film = Media.create_film(title="Film", release_status=Film.RELEASED)
+            ListEntry.objects.create(user=self.user, media=film, score=8)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
     def test_other_profile_not_found(self):
         url = reverse("profiles:profile", kwargs={'username': "not existing user"})
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 404)
+
+
+class AsyncProfileTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="john_smith", email="john_smith@example.com", password="password")
+        film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        ListEntry.objects.create(user=self.user, media=film, score=8, progress=90)
+        self.url = reverse("profiles:profile", kwargs={'username': self.user.username})
+
+    def get(self, **headers):
+        request = AsyncRequestFactory().get(self.url)
+        request.META.update(headers)
+        request.user = self.user
+        return async_to_sync(AsyncProfileView.as_view())(request, username=self.user.username)
+
+    def test_matches_sync_view(self):
+        request = RequestFactory().get(self.url)
+        request.user = self.user
+        expected = ProfileView.as_view()(request, username=self.user.username)
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.render().content, expected.render().content)
+        stats = {stats.media_type: stats for stats in response.context_data['list_stats']}
+        self.assertEqual(stats[Media.FILM].mean_score, 8)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
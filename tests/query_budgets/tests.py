@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.models import User
+from media.models import Media, Book, Film, Series
+from media_list.models import ListEntry
+from utils.testing import QueryBudgetMixin
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """
+    Requests each page with enough rows that an N+1 query would blow its budget. Budgets count the session and user
+    queries of a logged-in request
+    """
+    query_budgets = {
+        'media_list:book-list': 5,
+        'media_list:film-list': 5,
+        'media_list:series-list': 5,
+        'media_list:list-export': 3,
+        'profiles:profile': 4,
+        'search:users': 4,
+        'search:media': 4,
+        'search:autocomplete': 4
+    }
+    entries = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="john_smith", password="password")
+        User.objects.bulk_create([User(username=f"smith_{i}") for i in range(cls.entries)])
+        for i in range(cls.entries):
+            for media in [Media.create_book(title=f"Book {i}", chapters=10, release_status=Book.PUBLISHED),
+                          Media.create_film(title=f"Film {i}", runtime=90, release_status=Film.RELEASED),
+                          Media.create_series(title=f"Series {i}", episodes=12,
+                                              airing_status=Series.FINISHED_AIRING)]:
+                ListEntry.objects.create(user=cls.user, media=media, score=i % 10 + 1, progress=i)
+
+    def setUp(self):
+        self.client.login(username="john_smith", password="password")
+
+    def test_list_pages(self):
+        for list_name in ['book-list', 'film-list', 'series-list']:
+            with self.subTest(list_name):
+                response = self.get_within_budget(reverse(f'media_list:{list_name}'))
+                self.assertEqual(len(response.context_data['list_objects']), self.entries)
+
+    def test_export(self):
+        response = self.get_within_budget(reverse('media_list:list-export', kwargs={'list_type': 'all'}))
+        # A header and a line per entry, all read within the budget
+        self.assertEqual(b"".join(response.streaming_content).count(b"\n"), 3 * self.entries + 1)
+
+    def test_profile(self):
+        self.get_within_budget(reverse('profiles:profile'))
+
+    def test_search(self):
+        response = self.get_within_budget(reverse('search:users'), {'query': "smith"})
+        self.assertEqual(len(response.context['object_list']), 10)
+        self.get_within_budget(reverse('search:media'), {'query': "film"})
+        self.get_within_budget(reverse('search:autocomplete'), {'query': "fil"})
+
+    def test_missing_budget(self):
+        with self.assertRaisesMessage(AssertionError, "No query budget declared for home:index"):
+            self.get_within_budget(reverse('home:index'))
+
+    def test_over_budget(self):
+        self.query_budgets = {**self.query_budgets, 'profiles:profile': 1}
+
+        with self.assertRaisesMessage(AssertionError, "profiles:profile made 4 queries, over its budget of 1"):
+            self.get_within_budget(reverse('profiles:profile'))
@@ -0,0 +1,171 @@
+import threading
+
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from media.models import Media, Book, Film, Series
+from search import memory_index
+from search.memory_index import NGramIndex, trigrams, prefix_trigrams
+
+
+class TrigramsTestCase(SimpleTestCase):
+    def test_trigrams_match_pg_trgm(self):
+        self.assertEqual(trigrams("Cat"), {"  c", " ca", "cat", "at "})
+        self.assertEqual(trigrams("a-b"), {"  a", " a ", "  b", " b "})
+        self.assertEqual(trigrams(None), set())
+
+    def test_prefix_trigrams_leave_out_end_padding(self):
+        self.assertEqual(prefix_trigrams("Cat"), {"  c", " ca", "cat"})
+        self.assertEqual(prefix_trigrams("--"), set())
+
+
+class NGramIndexTestCase(SimpleTestCase):
+    def setUp(self):
+        self.index = NGramIndex(field_count=2)
+        self.index.build([
+            (1, ("Interstellar", None), "interstellar"),
+            (2, ("Inception", "Origen"), "inception"),
+            (3, ("The Prestige", None), "prestige"),
+        ])
+
+    def test_search_similar(self):
+        self.assertEqual(self.index.search("Intersteller"), ["interstellar"])
+
+    def test_search_substring(self):
+        self.assertEqual(self.index.search("prest"), ["prestige"])
+
+    def test_search_secondary_field(self):
+        self.assertEqual(self.index.search("origen"), ["inception"])
+
+    def test_search_no_match(self):
+        self.assertEqual(self.index.search("zzz"), [])
+        self.assertEqual(self.index.search("!!"), [])
+
+    def test_search_ranks_best_match_first(self):
+        self.index.add(4, ("Inception 2", None), "inception 2")
+
+        self.assertEqual(self.index.search("Inception"), ["inception", "inception 2"])
+
+    def test_search_predicate(self):
+        self.assertEqual(self.index.search("in", predicate=lambda result: result != "inception"), ["interstellar"])
+
+    def test_search_prefix(self):
+        self.index.add(4, ("Incendies", None), "incendies")
+
+        self.assertEqual(self.index.search_prefix("inc", sort_key=str), ["incendies", "inception"])
+        self.assertEqual(self.index.search_prefix("nce"), [])
+
+    def test_add_replaces(self):
+        self.index.add(1, ("Dunkirk", None), "dunkirk")
+
+        self.assertEqual(self.index.search("Interstellar"), [])
+        self.assertEqual(self.index.search("Dunkirk"), ["dunkirk"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove(self):
+        self.index.remove(3)
+        self.index.remove(3)
+
+        self.assertEqual(self.index.search("prestige"), [])
+        self.assertEqual(len(self.index), 2)
+
+    def test_compaction_keeps_live_documents(self):
+        for i in range(2000):
+            self.index.add(100, (f"Film {i}", None), f"film {i}")
+
+        self.assertEqual(self.index.search("Inception"), ["inception"])
+        self.assertEqual(self.index.search("Film 1999"), ["film 1999"])
+        self.assertLess(len(self.index._texts), 2000)
+
+    def test_search_during_compaction(self):
+        errors = []
+
+        def write():
+            for i in range(3000):
+                self.index.add(i % 100, (f"film {i}", None), f"film {i}")
+
+        def search():
+            try:
+                for _ in range(200):
+                    self.index.search("film")
+                    self.index.search_prefix("fil")
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=search) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.index.search("film")), 100)
+
+
+@override_settings(SEARCH_BACKEND='memory')
+class MemorySearchViewTestCase(TestCase):
+    def setUp(self):
+        memory_index.user_index.clear()
+        memory_index.media_index.clear()
+        self.smith = User.objects.create_user(username="smith", password="password")
+        User.objects.create_user(username="jones", password="password")
+        self.film = Media.create_film(title="Interstellar", members=10, release_status=Film.RELEASED)
+        Media.create_book(title="Interstellar: The Science", members=5, release_status=Book.PUBLISHED)
+
+    def tearDown(self):
+        memory_index.user_index.clear()
+        memory_index.media_index.clear()
+
+    def test_user_search(self):
+        response = self.client.get(reverse("search:users"), {'query': "smyth"})
+
+        self.assertEqual([user.pk for user in response.context['object_list']], [self.smith.pk])
+
+    def test_user_prefix_search(self):
+        response = self.client.get(reverse("search:users"), {'query': "jon", 'match': "prefix"})
+
+        self.assertEqual([str(user) for user in response.context['object_list']], ["jones"])
+
+    def test_media_search_with_type(self):
+        response = self.client.get(reverse("search:media"), {'query': "interstellar", 'media_type': Media.FILM})
+
+        self.assertEqual([media.pk for media in response.context['object_list']], [self.film.pk])
+        self.assertContains(response, "Film")
+
+    def test_search_skips_database_once_built(self):
+        self.client.get(reverse("search:media"), {'query': "interstellar"})
+        self.client.get(reverse("search:users"), {'query': "smith"})
+
+        with self.assertNumQueries(0):
+            memory_index.search_media("interstellar")
+            memory_index.search_users("smith")
+        self.assertEqual(len(memory_index.search_media("interstellar")), 2)
+
+    def test_signals_keep_index_fresh(self):
+        memory_index.get_user_index()
+        memory_index.get_media_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.smith.username = "smithers"
+            self.smith.save()
+            User.objects.get(username="jones").delete()
+            Media.create_series(title="Interstellar Stories", airing_status=Series.FINISHED_AIRING)
+
+        self.assertEqual([str(user) for user in memory_index.search_users("smithers")], ["smithers"])
+        self.assertEqual(memory_index.search_users("jones"), [])
+        self.assertEqual(len(memory_index.search_media("interstellar")), 3)
+
+    def test_rolled_back_changes_not_indexed(self):
+        memory_index.get_user_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    User.objects.create_user(username="okonkwo", password="password")
+                    User.objects.get(username="jones").delete()
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+
+        self.assertEqual(memory_index.search_users("okonkwo"), [])
+        self.assertEqual([str(user) for user in memory_index.search_users("jones")], ["jones"])
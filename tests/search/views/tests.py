@@ -1,8 +1,22 @@
+import base64
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
 from django.contrib.messages import get_messages
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase, RequestFactory, AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.urls import reverse
 
 from accounts.models import User
+from media.models import Media, Book, Film, Series
+from search import memory_index
+from search.views import UserSearch, MediaSearch, AsyncUserSearch, AsyncMediaSearch
 
 
 class InvalidSearchTestCase(TestCase):
@@ -50,8 +64,14 @@ class InvalidSearchTestCase(TestCase):
         self.assertEqual(response.url, '/home/')
 
 
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(["n", values]).encode()).decode()
+
+
 class UserSearchTestCase(TestCase):
     def setUp(self):
+        # Page cache versions are bumped on commit, which never happens in a TestCase, so drop other tests' pages
+        cache.clear()
         self.user1 = User.objects.create_user(username="testUser1",
                                               email="test1@test.com",
                                               first_name="John")
@@ -94,6 +114,32 @@ class UserSearchTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertQuerysetEqual(response.context_data['object_list'], [self.user2])
 
+    def test_user_search_misspelt_username(self):
+        response = self.client.get(reverse("search:users"), {
+            'query': 'testUsr'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.user1, self.user2])
+
+    def test_user_search_ranked_by_similarity(self):
+        user3 = User.objects.create_user(username="smithers", email="test3@test.com")
+
+        response = self.client.get(reverse("search:users"), {
+            'query': 'smith'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.user2, user3])
+
+    def test_user_search_prefix(self):
+        User.objects.create_user(username="userTest", email="test3@test.com")
+
+        response = self.client.get(reverse("search:users"), {
+            'query': 'TESTUSER',
+            'match': 'prefix'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.user1, self.user2])
+
     def test_user_search_no_results(self):
         response = self.client.get(reverse("search:users"), {
             'query': 'query with no response'
@@ -102,3 +148,253 @@ class UserSearchTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "No results found for 'query with no response'")
         self.assertQuerysetEqual(response.context_data['object_list'], [])
+
+
+@patch.object(UserSearch, 'paginate_by', 2)
+class UserSearchCursorTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.users = [
+            User.objects.create_user(username=f"reader{i}", email=f"reader{i}@test.com",
+                                     last_login=now - timedelta(days=i) if i % 2 else None)
+            for i in range(5)
+        ]
+
+    def get_page(self, **params):
+        return self.client.get(reverse("search:users"), {'query': 'reader', **params})
+
+    def test_pages_by_cursor(self):
+        page1 = self.get_page()
+        page2 = self.get_page(cursor=page1.context_data['page_obj'].next_cursor)
+        page3 = self.get_page(cursor=page2.context_data['page_obj'].next_cursor)
+        back = self.get_page(cursor=page3.context_data['page_obj'].previous_cursor)
+
+        expected = [self.users[1], self.users[3], self.users[0], self.users[2], self.users[4]]
+        self.assertEqual(page1.context_data['object_list'], expected[:2])
+        self.assertEqual(page2.context_data['object_list'], expected[2:4])
+        self.assertEqual(page3.context_data['object_list'], expected[4:])
+        self.assertEqual(back.context_data['object_list'], expected[2:4])
+        self.assertFalse(page3.context_data['page_obj'].has_next())
+
+    def test_cursor_links(self):
+        response = self.get_page()
+
+        next_cursor = response.context_data['page_obj'].next_cursor
+        self.assertContains(response, f"/search/users/?query=reader&cursor={next_cursor}")
+
+    def test_approximate_count(self):
+        response = self.get_page()
+
+        self.assertIsInstance(response.context_data['approximate_count'], int)
+        self.assertContains(response, "results")
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page()
+
+        self.assertFalse([query for query in queries if "COUNT(" in query['sql'].upper()])
+
+    def test_prefix_pages_by_cursor(self):
+        page1 = self.get_page(match='prefix')
+        page2 = self.get_page(match='prefix', cursor=page1.context_data['page_obj'].next_cursor)
+
+        self.assertEqual(page1.context_data['object_list'], self.users[:2])
+        self.assertEqual(page2.context_data['object_list'], self.users[2:4])
+
+    def test_invalid_cursor(self):
+        response = self.get_page(cursor='invalid')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        for values in [[0.5, "yesterday", 1], ["high", "2020-01-01T00:00:00+00:00", 1]]:
+            with self.subTest(values):
+                self.assertEqual(self.get_page(cursor=encode_cursor(values)).status_code, 404)
+
+
+@patch.object(UserSearch, 'paginate_by', 2)
+class AsyncSearchTestCase(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"reader{i}", email=f"reader{i}@test.com") for i in range(5)]
+        Media.create_film(title="Reader's Digest", release_status=Film.RELEASED)
+
+    def search(self, view_class, **params):
+        request = AsyncRequestFactory().get(reverse("search:users"), {'query': 'reader', **params})
+        request.user = self.users[0]
+        return async_to_sync(view_class.as_view())(request)
+
+    def test_matches_sync_view(self):
+        for view_class, async_view_class in [(UserSearch, AsyncUserSearch), (MediaSearch, AsyncMediaSearch)]:
+            with self.subTest(view_class.__name__):
+                request = RequestFactory().get(reverse("search:users"), {'query': 'reader'})
+                request.user = self.users[0]
+                expected = view_class.as_view()(request)
+
+                response = self.search(async_view_class)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.render().content, expected.render().content)
+                self.assertIsInstance(response.context_data['approximate_count'], int)
+
+    def test_pages_by_cursor(self):
+        page1 = self.search(AsyncUserSearch, match='prefix')
+        page2 = self.search(AsyncUserSearch, match='prefix', cursor=page1.context_data['page_obj'].next_cursor)
+
+        self.assertEqual(page1.context_data['object_list'], self.users[:2])
+        self.assertEqual(page2.context_data['object_list'], self.users[2:4])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(Http404):
+            self.search(AsyncUserSearch, cursor='invalid')
+        with self.assertRaises(Http404):
+            self.search(AsyncUserSearch, cursor=encode_cursor([0.5, "yesterday", 1]))
+
+    @override_settings(SEARCH_BACKEND='memory')
+    def test_memory_backend(self):
+        memory_index.user_index.clear()
+        self.addCleanup(memory_index.user_index.clear)
+
+        response = self.search(AsyncUserSearch, match='prefix')
+
+        self.assertEqual([user.username for user in response.context_data['object_list']], ["reader0", "reader1"])
+
+
+class MediaSearchTestCase(TestCase):
+    def setUp(self):
+        self.martian = Media.create_book(title="The Martian", release_status=Book.PUBLISHED,
+                                         description="An astronaut is stranded on Mars")
+        self.martian_film = Media.create_film(title="The Martian", release_status=Film.RELEASED)
+        self.expanse = Media.create_series(title="The Expanse", local_title="Expanse",
+                                           airing_status=Series.FINISHED_AIRING,
+                                           description="Humanity has colonised the solar system, including Mars")
+
+    def test_media_search_redirect(self):
+        response = self.client.get(reverse("search:index"), {
+            'query': 'abc',
+            'type': 'films'
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse("search:media") + "?query=abc&media_type=F")
+
+    def test_all_media_search_redirect(self):
+        response = self.client.get(reverse("search:index"), {
+            'query': 'abc',
+            'type': 'all'
+        })
+
+        self.assertEqual(response.url, reverse("search:media") + "?query=abc")
+
+    def test_media_search_by_title(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'martian'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.martian, self.martian_film])
+        self.assertContains(response, "The Martian")
+
+    def test_media_search_by_description(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'mars'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.martian, self.expanse], ordered=False)
+
+    def test_media_search_misspelt_title(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'the expanze'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.expanse])
+
+    def test_media_search_title_ranked_above_description(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'expanse'
+        })
+
+        self.assertEqual(response.context_data['object_list'][0], self.expanse)
+
+    def test_media_search_by_type(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'martian',
+            'media_type': Media.FILM
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.martian_film])
+
+    def test_media_search_vector_updated(self):
+        self.expanse.title = "Leviathan Wakes"
+        self.expanse.save()
+
+        response = self.client.get(reverse("search:media"), {
+            'query': 'leviathan'
+        })
+
+        self.assertQuerysetEqual(response.context_data['object_list'], [self.expanse])
+
+    @patch.object(MediaSearch, 'paginate_by', 1)
+    def test_media_search_pages_by_cursor(self):
+        page1 = self.client.get(reverse("search:media"), {'query': 'martian'})
+        page2 = self.client.get(reverse("search:media"), {
+            'query': 'martian',
+            'cursor': page1.context_data['page_obj'].next_cursor
+        })
+
+        self.assertEqual(page1.context_data['object_list'], [self.martian])
+        self.assertEqual(page2.context_data['object_list'], [self.martian_film])
+
+    def test_media_search_no_results(self):
+        response = self.client.get(reverse("search:media"), {
+            'query': 'query with no response'
+        })
+
+        self.assertContains(response, "No results found for 'query with no response'")
+
+
+class AutocompleteTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user1 = User.objects.create_user(username="martha", email="test1@test.com")
+        self.user2 = User.objects.create_user(username="Marty", email="test2@test.com")
+        self.user3 = User.objects.create_user(username="amartin", email="test3@test.com")
+        self.book = Media.create_book(title="The Martian", release_status=Book.PUBLISHED)
+        self.film = Media.create_film(title="Mars Attacks!", release_status=Film.RELEASED)
+
+    def test_autocomplete(self):
+        response = self.client.get(reverse("search:autocomplete"), {
+            'query': 'MAR'
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'users': [
+                {'username': "martha", 'url': reverse("profiles:profile", kwargs={'username': "martha"})},
+                {'username': "Marty", 'url': reverse("profiles:profile", kwargs={'username': "Marty"})}
+            ],
+            'media': [
+                {'id': self.film.pk, 'title': "Mars Attacks!", 'media_type': "Film"}
+            ]
+        })
+
+    def test_autocomplete_normalises_prefix(self):
+        response = self.client.get(reverse("search:autocomplete"), {
+            'query': '  the   MART '
+        })
+
+        self.assertEqual([media['title'] for media in response.json()['media']], ["The Martian"])
+
+    def test_autocomplete_cached(self):
+        self.client.get(reverse("search:autocomplete"), {'query': 'mar'})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("search:autocomplete"), {'query': ' Mar'})
+
+        self.assertEqual(len(response.json()['users']), 2)
+
+    def test_autocomplete_empty_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("search:autocomplete"), {'query': '  '})
+
+        self.assertEqual(response.json(), {'users': [], 'media': []})
@@ -0,0 +1,30 @@
+from django.test import SimpleTestCase, override_settings
+
+from utils.checks import check_shared_cache, check_replica_cache
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_per_process_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['utils.E001'])
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class ReplicaCacheCheckTests(SimpleTestCase):
+    @override_settings(DATABASE_REPLICAS=['replica'], CACHES=LOCMEM_CACHES)
+    def test_replica_with_per_process_cache(self):
+        self.assertEqual([error.id for error in check_replica_cache(None)], ['utils.E002'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'], CACHES=REDIS_CACHES)
+    def test_replica_with_shared_cache(self):
+        self.assertEqual(check_replica_cache(None), [])
+
+    @override_settings(DATABASE_REPLICAS=[], CACHES=LOCMEM_CACHES)
+    def test_no_replica(self):
+        self.assertEqual(check_replica_cache(None), [])
@@ -0,0 +1,136 @@
+import pickle
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Permission
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.views import View
+
+from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+from utils.db_router import replica_reads, pin_to_primary, is_pinned, ReplicaReadMixin
+
+
+class ReadAliasView(ReplicaReadMixin, View):
+    def get(self, request):
+        return HttpResponse(router.db_for_read(Media))
+
+    def post(self, request):
+        return HttpResponse(router.db_for_read(Media))
+
+
+class ReadAliasResponse(SimpleTemplateResponse):
+    @property
+    def rendered_content(self):
+        return router.db_for_read(Media)
+
+
+class RenderAliasView(ReplicaReadMixin, View):
+    def get(self, request):
+        return ReadAliasResponse("unused.html")
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="john_smith", password="password")
+
+    def test_reads_default_outside_block(self):
+        self.assertEqual(router.db_for_read(Media), 'default')
+
+    def test_reads_replica_in_block(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Media), 'replica')
+        self.assertEqual(router.db_for_read(Media), 'default')
+
+    def test_sessions_read_primary_and_users_replica(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_read(Permission), 'default')
+            self.assertEqual(router.db_for_read(User), 'replica')
+
+    def test_writes_go_to_primary(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_write(Media), 'default')
+            # Later reads in the block may depend on the write
+            self.assertEqual(router.db_for_read(Media), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        with replica_reads():
+            self.assertEqual(router.db_for_read(Media), 'default')
+
+    def test_pinned_user_reads_primary(self):
+        pin_to_primary(self.user.pk)
+
+        with replica_reads(self.user.pk):
+            self.assertEqual(router.db_for_read(Media), 'default')
+        with replica_reads(self.user.pk + 1):
+            self.assertEqual(router.db_for_read(Media), 'replica')
+
+    def test_list_change_pins_owner(self):
+        film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        ListEntry.objects.create(user=self.user, media=film)
+
+        self.assertTrue(is_pinned(self.user.pk))
+
+    def test_login_pins_user(self):
+        self.client.login(username="john_smith", password="password")
+
+        self.assertTrue(is_pinned(self.user.pk))
+
+    def test_view_reads_replica(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        self.assertEqual(ReadAliasView.as_view()(request).content, b'replica')
+
+    def test_view_renders_from_replica(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        response = RenderAliasView.as_view()(request)
+        self.assertFalse(response.is_rendered)
+        self.assertEqual(response.render().content, b'replica')
+        self.assertEqual(router.db_for_read(Media), 'default')
+        pickle.dumps(response)
+
+    def test_view_post_reads_primary(self):
+        request = RequestFactory().post('/')
+        request.user = AnonymousUser()
+
+        self.assertEqual(ReadAliasView.as_view()(request).content, b'default')
+
+
+@skipUnless('replica' in settings.DATABASES, "Set POSTGRES_REPLICA_HOST to test against a replica")
+class ReplicaDatabaseTestCase(TransactionTestCase):
+    """
+    Runs pages against a real replica connection, which mirrors the default database in tests. The replica is a
+    separate connection, so test data must be committed for it to see
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="john_smith", password="password")
+        film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        ListEntry.objects.create(user=self.user, media=film)
+
+    def test_list_page(self):
+        cache.clear()
+        response = self.client.get(reverse('media_list:film-list', kwargs={'username': "john_smith"}))
+
+        self.assertContains(response, "Film")
+
+    def test_search_page(self):
+        response = self.client.get(reverse('search:users'), {'query': "smith"})
+
+        self.assertContains(response, "john_smith")
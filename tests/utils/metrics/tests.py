@@ -0,0 +1,45 @@
+from django.test import TestCase, override_settings, modify_settings
+from django.urls import reverse
+
+from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+from utils import metrics
+
+
+@override_settings(METRICS_ENABLED=True)
+@modify_settings(MIDDLEWARE={'prepend': 'utils.metrics.MetricsMiddleware'})
+class MetricsMiddlewareTestCase(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.user = User.objects.create_user(username="john_smith", password="password")
+        film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        ListEntry.objects.create(user=self.user, media=film)
+        self.client.login(username="john_smith", password="password")
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('media_list:film-list'))
+
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="5 queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_prometheus_text(self):
+        self.client.get(reverse('media_list:film-list'))
+        self.client.get(reverse('media_list:film-list'))
+        self.client.get(reverse('profiles:profile'))
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('mml_requests_total{view="media_list:film-list"} 2', text)
+        self.assertIn('mml_db_queries_total{view="media_list:film-list"} 10', text)
+        self.assertIn('mml_requests_total{view="profiles:profile"} 1', text)
+        self.assertIn('mml_request_seconds_bucket{view="media_list:film-list",le="+Inf"} 2', text)
+        self.assertIn('mml_request_seconds_count{view="profiles:profile"} 1', text)
+
+    def test_render_time_recorded(self):
+        self.client.get(reverse('media_list:film-list'))
+
+        self.assertGreater(metrics._views['media_list:film-list'].render_seconds, 0)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
@@ -0,0 +1,139 @@
+from itertools import count
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.views import View
+
+from accounts import user_cache
+from accounts.models import User
+from media.models import Media, Film
+from media_list.models import ListEntry
+from utils import page_cache
+from utils.db_router import ReplicaReadMixin
+
+
+class ReplicaCachedView(ReplicaReadMixin, page_cache.PublicPageCacheMixin, View):
+    renders = count()
+
+    def get_cache_namespaces(self):
+        return ['test']
+
+    def get(self, request):
+        return HttpResponse(str(next(self.renders)))
+
+
+class PageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear_local()
+        self.user = User.objects.create_user(username="john_smith", password="password")
+        self.film = Media.create_film(title="Film", release_status=Film.RELEASED)
+        self.list_url = reverse('media_list:film-list', kwargs={'username': self.user.username})
+        self.profile_url = reverse('profiles:profile', kwargs={'username': self.user.username})
+
+    def test_bump_versions(self):
+        version, = page_cache.get_versions(['test'])
+        page_cache.bump_versions(['test'])
+
+        self.assertEqual(page_cache.get_versions(['test']), [version + 1])
+
+    def test_bump_missing_version(self):
+        page_cache.bump_versions(['missing'])
+
+        self.assertEqual(len(page_cache.get_versions(['missing'])), 1)
+
+    def test_anonymous_page_cached(self):
+        self.client.get(self.list_url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "john_smith")
+
+    def test_logged_in_page_not_cached(self):
+        self.client.login(username="john_smith", password="password")
+        self.client.get(self.profile_url)
+
+        with self.assertNumQueries(4):
+            # Session, user, ETag and list stats
+            self.client.get(self.profile_url)
+
+    def test_list_entry_invalidates_user_pages(self):
+        self.client.get(self.list_url)
+        self.client.get(self.profile_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            ListEntry.objects.create(user=self.user, media=self.film, score=7)
+
+        self.assertContains(self.client.get(self.list_url), "Film")
+        self.assertContains(self.client.get(self.profile_url), "7.0")
+
+    def test_media_invalidates_list_pages(self):
+        ListEntry.objects.create(user=self.user, media=self.film)
+        self.client.get(self.list_url)
+        self.film.title = "Renamed film"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.save()
+
+        self.assertContains(self.client.get(self.list_url), "Renamed film")
+
+    def test_subtype_invalidates_list_pages(self):
+        ListEntry.objects.create(user=self.user, media=self.film)
+        self.client.get(self.list_url)
+        self.film.film.runtime = 95
+        with self.captureOnCommitCallbacks(execute=True):
+            self.film.film.save()
+
+        self.assertContains(self.client.get(self.list_url), "/ 95")
+
+    def test_versions_bumped_on_commit(self):
+        version, = page_cache.get_versions([page_cache.MEDIA])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.film.save()
+
+            self.assertEqual(page_cache.get_versions([page_cache.MEDIA]), [version])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(page_cache.get_versions([page_cache.MEDIA]), [version + 1])
+
+    def test_user_invalidates_search(self):
+        url = reverse('search:users')
+        self.client.get(url, {'query': "smith"})
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="jane_smith", password="password")
+
+        self.assertContains(self.client.get(url, {'query': "smith"}), "jane_smith")
+
+    def test_unknown_user_not_cached(self):
+        url = reverse('profiles:profile', kwargs={'username': "nobody"})
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual([key for key in cache._cache if ':page:' in key], [])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaPageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return ReplicaCachedView.as_view()(request).content
+
+    def test_replica_page_cached(self):
+        self.assertEqual(self.get(), self.get())
+
+    def test_replica_page_not_cached_after_bump(self):
+        page_cache.bump_versions(['test'])
+
+        self.assertNotEqual(self.get(), self.get())
+        self.assertTrue(page_cache.recently_bumped(['test']))
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_replica_page_cached_after_lag(self):
+        page_cache.bump_versions(['test'])
+
+        self.assertEqual(self.get(), self.get())
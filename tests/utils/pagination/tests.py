@@ -0,0 +1,82 @@
+import base64
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from utils.pagination import KeysetPaginator, InvalidCursor
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"user{i}", first_name=name)
+                      for i, name in enumerate(["Cal", "Ada", "Bea", "Ada", "Dan"])]
+        self.queryset = User.objects.all()
+
+    def test_first_page(self):
+        page = KeysetPaginator(self.queryset, ['first_name', 'pk'], 2).get_page()
+
+        self.assertEqual(page.object_list, [self.users[1], self.users[3]])
+        self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_walk_forwards_and_backwards(self):
+        paginator = KeysetPaginator(self.queryset, ['first_name', 'pk'], 2)
+
+        page1 = paginator.get_page()
+        page2 = paginator.get_page(page1.next_cursor)
+        page3 = paginator.get_page(page2.next_cursor)
+        back = paginator.get_page(page3.previous_cursor)
+
+        self.assertEqual(page2.object_list, [self.users[2], self.users[0]])
+        self.assertEqual(page3.object_list, [self.users[4]])
+        self.assertFalse(page3.has_next())
+        self.assertEqual(back.object_list, page2.object_list)
+        self.assertTrue(back.has_previous())
+        self.assertEqual(paginator.get_page(back.previous_cursor).object_list, page1.object_list)
+
+    def test_descending(self):
+        paginator = KeysetPaginator(self.queryset, ['-first_name', '-pk'], 3)
+
+        page1 = paginator.get_page()
+        page2 = paginator.get_page(page1.next_cursor)
+
+        self.assertEqual(page1.object_list, [self.users[4], self.users[0], self.users[2]])
+        self.assertEqual(page2.object_list, [self.users[3], self.users[1]])
+
+    def test_deep_page_single_query(self):
+        paginator = KeysetPaginator(self.queryset, ['first_name', 'pk'], 1)
+        cursor = paginator.get_page(paginator.get_page().next_cursor).next_cursor
+
+        with self.assertNumQueries(1):
+            paginator.get_page(cursor)
+
+    def test_datetime_keys_keep_microseconds(self):
+        now = timezone.now().replace(microsecond=123456)
+        User.objects.update(last_login=now)
+        paginator = KeysetPaginator(self.queryset, ['-last_login', 'pk'], 2)
+
+        page1 = paginator.get_page()
+        page2 = paginator.get_page(page1.next_cursor)
+
+        self.assertEqual(page1.object_list + page2.object_list, self.users[:4])
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(self.queryset, ['first_name', 'pk'], 2)
+
+        for cursor in ["not a cursor", "W10", "WyJ4IixbMSwyXV0"]:
+            with self.assertRaises(InvalidCursor):
+                paginator.get_page(cursor)
+
+    def test_tampered_cursor_values(self):
+        paginator = KeysetPaginator(self.queryset, ['-last_login', 'pk'], 2)
+
+        for values in [["not a date", 1], ["2020-01-01T00:00:00+00:00", "x"], ["2020-01-01T00:00:00+00:00", 2 ** 70],
+                       [None, 1], [[], 1]]:
+            with self.subTest(values), self.assertRaises(InvalidCursor):
+                paginator.get_page(self.encode(["n", values]))
+
+    @staticmethod
+    def encode(payload) -> str:
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
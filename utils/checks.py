@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.checks import Error, register, Tags
+
+# Caches which only live in one process, so each worker would cache and invalidate pages on its own
+PER_PROCESS_CACHE_BACKENDS = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+def _uses_per_process_cache() -> bool:
+    return settings.CACHES['default']['BACKEND'] in PER_PROCESS_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Page and user caches are invalidated by whichever worker saves a change, so must be shared in production"""
+    if not _uses_per_process_cache():
+        return []
+    return [Error(
+        "The local memory cache isn't shared between workers, so they would serve stale pages",
+        hint="Set CACHE_BACKEND to 'redis' or 'memcached'",
+        id='utils.E001'
+    )]
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_cache(app_configs, **kwargs):
+    """Replica pins and recently bumped page namespaces are kept in the cache, so every worker has to see them"""
+    if not settings.DATABASE_REPLICAS or not _uses_per_process_cache():
+        return []
+    return [Error(
+        "Read replicas need a shared cache, as the local memory cache would only pin users to the primary in the "
+        "worker which saved their change",
+        hint="Set CACHE_BACKEND to 'redis', 'memcached' or 'file', or unset POSTGRES_REPLICA_HOST",
+        id='utils.E002'
+    )]
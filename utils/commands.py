@@ -0,0 +1,37 @@
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.core.management import BaseCommand, CommandError
+
+from utils.data_files import FORMATS, detect_format, read_rows
+
+
+class RowsImportCommand(BaseCommand):
+    """
+    A command that reads rows from a CSV or JSON lines file, or stdin, taking the path and --format and --batch-size
+    options. Subclasses add their own arguments before calling add_arguments, then read the rows with open_rows
+    """
+    default_batch_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="The file to import, or - to read from stdin")
+        parser.add_argument('--format', choices=FORMATS, dest='file_format',
+                            help="The format of the input, detected from the file extension if not given")
+        parser.add_argument('--batch-size', type=int, default=self.default_batch_size)
+
+    @contextmanager
+    def open_rows(self, path: str, file_format: Optional[str]) -> Iterator[Iterator[dict]]:
+        if file_format is None:
+            if path == '-':
+                raise CommandError("--format is required when reading from stdin")
+            try:
+                file_format = detect_format(path)
+            except ValueError as e:
+                raise CommandError(e)
+
+        if path == '-':
+            yield read_rows(sys.stdin, file_format)
+        else:
+            with open(path, newline='', encoding='utf-8') as file:
+                yield read_rows(file, file_format)
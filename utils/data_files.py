@@ -0,0 +1,52 @@
+import csv
+import json
+import os.path
+from typing import Iterable, Iterator, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+FORMATS = ['csv', 'jsonl']
+
+
+def detect_format(filename: str) -> str:
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot detect the format of {filename!r}, expected one of {', '.join(FORMATS)}")
+    return extension
+
+
+def read_rows(file, file_format: str):
+    """Lazily reads dicts from a text file of CSV (with a header row) or JSON lines, CSV blanks are read as None"""
+    if file_format == 'csv':
+        for row in csv.DictReader(file):
+            yield {key: value if value != "" else None for key, value in row.items()}
+    elif file_format == 'jsonl':
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format {file_format!r}, expected one of {', '.join(FORMATS)}")
+
+
+class _Echo:
+    """A file-like object whose write returns what it was given, so csv.writer can produce strings one row at a time"""
+
+    def write(self, value):
+        return value
+
+
+def write_rows(rows: Iterable[dict], fields: Sequence[str], file_format: str) -> Iterator[str]:
+    """
+    Lazily serialises dicts as CSV (with a header row) or JSON lines, yielding one line at a time so that output can
+    be streamed. None is written as a CSV blank, matching read_rows
+    """
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([row[field] for field in fields])
+    elif file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps({field: row[field] for field in fields}, cls=DjangoJSONEncoder) + "\n"
+    else:
+        raise ValueError(f"Unsupported format {file_format!r}, expected one of {', '.join(FORMATS)}")
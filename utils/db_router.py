@@ -0,0 +1,110 @@
+"""
+Read replica routing. Writes always go to the default (primary) database, and so do reads unless they're made inside
+replica_reads(), which views opt into with ReplicaReadMixin. A user who has just changed their list is pinned to the
+primary for REPLICA_PIN_SECONDS, so they read their own writes however far the replicas lag
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+_read_alias: ContextVar[Optional[str]] = ContextVar('read_alias', default=None)
+# Always read from the primary, as a stale session or permission would log people out or let them do what they no
+# longer may. Users themselves (accounts.User) can be read from a replica: the viewer is loaded from the primary before
+# replica_reads() starts and accounts.user_cache reads from the primary, so only search results may lag
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'admin', 'contenttypes'}
+
+
+def _pin_key(user_id) -> str:
+    return f"db-pin:user:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """Sends the user's reads to the primary for a while, so that their next pages show their own changes"""
+    if settings.DATABASE_REPLICAS and user_id is not None:
+        cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id) -> bool:
+    return user_id is not None and cache.get(_pin_key(user_id), False)
+
+
+@contextmanager
+def replica_reads(user_id=None):
+    """Routes reads made in the block to a replica, unless there are none or user_id is pinned to the primary"""
+    if not settings.DATABASE_REPLICAS or is_pinned(user_id):
+        yield None
+        return
+    token = _read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+    try:
+        yield _read_alias.get()
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # A write means later reads in the same block may depend on it, which only the primary is sure to have
+        _read_alias.set(None)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaReadMixin:
+    """
+    Serves GET requests, including rendering their templates, from a replica. The replica's alias, or None if reads
+    went to the primary, is kept in read_alias
+    """
+    read_alias = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch_from_replica(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        # The viewer is loaded from the primary first, both to check their pin and so the session is never stale
+        with replica_reads(request.user.pk) as alias:
+            self.read_alias = alias
+            return self._render_from(alias, super().dispatch(request, *args, **kwargs))
+
+    async def _adispatch_from_replica(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super().dispatch(request, *args, **kwargs)
+        # Reading request.user may load it from the session, which can only be done synchronously
+        user_id = await sync_to_async(lambda: request.user.pk)()
+        with replica_reads(user_id) as alias:
+            self.read_alias = alias
+            return self._render_from(alias, await super().dispatch(request, *args, **kwargs))
+
+    @staticmethod
+    def _render_from(alias: Optional[str], response):
+        """
+        Makes a template response read from alias when the handler renders it, after the view has returned and so
+        outside replica_reads(), which leaves render timing and callbacks to the usual template response hooks
+        """
+        if alias is None or not hasattr(response, 'render') or response.is_rendered:
+            return response
+        def render_from_alias():
+            # Back to the class's render, as a cached response is pickled from inside it
+            del response.render
+            token = _read_alias.set(alias)
+            try:
+                return response.render()
+            finally:
+                _read_alias.reset(token)
+        response.render = render_from_alias
+        return response
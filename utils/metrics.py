@@ -0,0 +1,141 @@
+"""
+Opt-in request instrumentation, enabled with METRICS_ENABLED=1. MetricsMiddleware records the SQL query count, SQL
+time, template render time and wall time of every request, adds them to the response as a Server-Timing header, and
+totals them per resolved view name for the Prometheus text endpoint at /metrics/. Totals are kept per process, so
+with several workers each scrape sees one worker's share
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, Http404
+
+# Upper bounds, in seconds, of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.start = time.perf_counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_seconds += time.perf_counter() - start
+
+    def server_timing(self, wall_seconds) -> str:
+        return ", ".join([
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f"render;dur={self.render_seconds * 1000:.1f}",
+            f"total;dur={wall_seconds * 1000:.1f}"
+        ])
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar('request_metrics', default=None)
+_views: Dict[str, ViewMetrics] = {}
+_views_lock = threading.Lock()
+
+
+def record(view_name: str, metrics: RequestMetrics, wall_seconds: float):
+    with _views_lock:
+        view = _views.setdefault(view_name, ViewMetrics())
+        view.requests += 1
+        view.queries += metrics.queries
+        view.sql_seconds += metrics.sql_seconds
+        view.render_seconds += metrics.render_seconds
+        view.wall_seconds += wall_seconds
+        view.buckets[bisect_left(DURATION_BUCKETS, wall_seconds)] += 1
+
+
+def reset():
+    with _views_lock:
+        _views.clear()
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        wall_seconds = time.perf_counter() - metrics.start
+        match = getattr(request, 'resolver_match', None)
+        record(match.view_name if match else UNRESOLVED_VIEW, metrics, wall_seconds)
+        response['Server-Timing'] = metrics.server_timing(wall_seconds)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called just before the response is rendered, so the render time is from here to the post render callback
+        metrics, start = _current.get(), time.perf_counter()
+        if metrics is not None and not response.is_rendered:
+            def add_render_time(rendered):
+                metrics.render_seconds += time.perf_counter() - start
+            response.add_post_render_callback(add_render_time)
+        return response
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text() -> str:
+    with _views_lock:
+        views = {name: vars(view).copy() for name, view in sorted(_views.items())}
+    counters = [
+        ('mml_requests_total', "Requests handled", 'requests'),
+        ('mml_db_queries_total', "SQL queries run", 'queries'),
+        ('mml_db_seconds_total', "Time spent running SQL queries", 'sql_seconds'),
+        ('mml_render_seconds_total', "Time spent rendering templates", 'render_seconds'),
+    ]
+    lines = []
+    for metric, description, field in counters:
+        lines += [f"# HELP {metric} {description}, by view", f"# TYPE {metric} counter"]
+        lines += [f'{metric}{{view="{_escape_label(name)}"}} {view[field]}' for name, view in views.items()]
+
+    lines += ["# HELP mml_request_seconds Request wall time, by view", "# TYPE mml_request_seconds histogram"]
+    for name, view in views.items():
+        label = f'view="{_escape_label(name)}"'
+        cumulative = 0
+        for bound, count in zip([*DURATION_BUCKETS, '+Inf'], view['buckets']):
+            cumulative += count
+            lines.append(f'mml_request_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f"mml_request_seconds_sum{{{label}}} {view['wall_seconds']}")
+        lines.append(f"mml_request_seconds_count{{{label}}} {view['requests']}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404("Metrics are disabled")
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,148 @@
+"""
+Full response caching for public pages. Responses to anonymous GET requests are cached under a key built from the
+request path and the current version of each namespace the page depends on, such as 'user:<pk>' for a user's profile
+and lists. Bumping a namespace's version, done by signal receivers in utils.signals when rows change, orphans every
+page cached under the old version, so there's no need to track which keys were set
+"""
+import hashlib
+import time
+from typing import Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from accounts import user_cache
+from accounts.models import User
+
+USERS = 'users'
+MEDIA = 'media'
+
+
+def user_namespace(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def _version_key(namespace: str) -> str:
+    return f"page-version:{namespace}"
+
+
+def user_page_namespaces(username: str, *namespaces: str) -> Optional[List[str]]:
+    """The namespaces of a page about the user with username, or None if there's no such user"""
+    try:
+        user = user_cache.get_user(username)
+    except User.DoesNotExist:
+        return None
+    return [user_namespace(user.pk), *namespaces]
+
+
+def get_versions(namespaces: List[str]) -> List[int]:
+    """
+    Gets the current version of each namespace. A version missing from the cache, never set or evicted, starts from
+    the clock so that it can never match a version that pages were cached under before
+    """
+    keys = [_version_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bumped_key(namespace: str) -> str:
+    return f"page-bumped:{namespace}"
+
+
+def bump_versions(namespaces: Iterable[str]):
+    namespaces = list(namespaces)
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), time.time_ns(), None)
+    if settings.DATABASE_REPLICAS:
+        # Replicas may not have the change yet, see recently_bumped()
+        cache.set_many({_bumped_key(namespace): True for namespace in namespaces}, settings.REPLICA_PIN_SECONDS)
+
+
+def recently_bumped(namespaces: List[str]) -> bool:
+    """
+    Whether any of the namespaces was bumped within REPLICA_PIN_SECONDS, the time replicas are allowed to lag, in which
+    case a page rendered from a replica may not show the change yet
+    """
+    return bool(cache.get_many([_bumped_key(namespace) for namespace in namespaces]))
+
+
+class PublicPageCacheMixin:
+    """
+    Caches whole responses to anonymous GET requests for views whose get_cache_namespaces() returns a list. Requests
+    from logged-in users are never cached, as every page shows the viewer's own navigation. Pages read from a replica,
+    which ReplicaReadMixin records in read_alias, aren't cached while their namespaces were only just bumped, as the
+    replica may still be behind and the stale page would then outlive its lag by cache_timeout
+    """
+    cache_timeout = 60 * 10
+    read_alias = None
+
+    def get_cache_namespaces(self) -> Optional[List[str]]:
+        """The namespaces whose versions the cached page depends on, or None to not cache the page"""
+        return []
+
+    def get_page_cache_key(self, namespaces: List[str]) -> str:
+        versions = ".".join(str(version) for version in get_versions(namespaces))
+        path = hashlib.md5(self.request.get_full_path().encode()).hexdigest()
+        return f"page:{path}:{versions}"
+
+    def is_cacheable_request(self, request) -> bool:
+        # Pending messages are shown once, so neither serve nor store a page while there are any
+        return request.method == 'GET' and not request.user.is_authenticated and not len(get_messages(request))
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch_cached(request, *args, **kwargs)
+        cache_key, response = self._get_cached_page(request)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if cache_key is not None:
+            self._cache_page(request, cache_key, response)
+        return response
+
+    async def _adispatch_cached(self, request, *args, **kwargs):
+        cache_key, response = await sync_to_async(self._get_cached_page)(request)
+        if response is not None:
+            return response
+        response = await super().dispatch(request, *args, **kwargs)
+        if cache_key is not None:
+            self._cache_page(request, cache_key, response)
+        return response
+
+    def _get_cached_page(self, request) -> (Optional[str], Optional[HttpResponse]):
+        """The key to cache the response under, or None if it mustn't be cached, and the cached response if any"""
+        if not self.is_cacheable_request(request):
+            return None, None
+        namespaces = self.get_cache_namespaces()
+        if namespaces is None:
+            return None, None
+
+        self.cache_namespaces = namespaces
+        cache_key = self.get_page_cache_key(namespaces)
+        response = cache.get(cache_key)
+        if response is not None:
+            return cache_key, get_conditional_response(request, etag=response.get('ETag'), response=response)
+        return cache_key, None
+
+    def _cache_page(self, request, cache_key: str, response: HttpResponse):
+        if response.status_code == 200 and not response.cookies and not request.META.get('CSRF_COOKIE_USED'):
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(lambda rendered: self._store_page(cache_key, rendered))
+            else:
+                self._store_page(cache_key, response)
+
+    def _store_page(self, cache_key: str, response: HttpResponse):
+        # Checked once rendered, as templates read from the replica too
+        if self.read_alias is None or not recently_bumped(self.cache_namespaces):
+            cache.set(cache_key, response, self.cache_timeout)
@@ -0,0 +1,167 @@
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+from typing import List, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Q, QuerySet
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps the microseconds of datetimes, which DjangoJSONEncoder drops, so they can be compared exactly"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPage:
+    def __init__(self, object_list: List, *, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}[{len(self)} objects]>"
+
+
+class KeysetPaginator:
+    """
+    Paginates a QuerySet by the values of its sort keys instead of by OFFSET, so every page costs the same as the first
+    and no COUNT(*) is needed. ordering holds model field or annotation names, prefixed with '-' for descending, whose
+    values must never be null, and must end with a unique key such as 'pk' so that every row has a distinct position.
+    Pages are addressed by opaque cursors holding the sort key values of the first or last row of a neighbouring page
+    """
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, queryset: QuerySet, ordering: Sequence[str], per_page: int):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+
+    def get_page(self, cursor: str = None) -> KeysetPage:
+        queryset, values, backwards = self._get_page_queryset(cursor)
+        return self._make_page(list(queryset), values, backwards)
+
+    async def aget_page(self, cursor: str = None) -> KeysetPage:
+        queryset, values, backwards = self._get_page_queryset(cursor)
+        return self._make_page([row async for row in queryset], values, backwards)
+
+    def _get_page_queryset(self, cursor: Optional[str]) -> (QuerySet, Optional[List], bool):
+        """The query for the page after or before cursor, with one extra row to tell whether there are more"""
+        direction, values = self.decode_cursor(cursor) if cursor else (self.NEXT, None)
+        if values is not None:
+            values = self.clean_values(values)
+        backwards = direction == self.PREVIOUS
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._get_position_filter(values, backwards))
+        ordering = [self._invert(key) for key in self.ordering] if backwards else self.ordering
+        return queryset.order_by(*ordering)[:self.per_page + 1], values, backwards
+
+    def _make_page(self, rows: List, values: Optional[List], backwards: bool) -> KeysetPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        has_next = has_more if not backwards else True
+        has_previous = has_more if backwards else values is not None
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(self.NEXT, rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode_cursor(self.PREVIOUS, rows[0]) if has_previous and rows else None
+        )
+
+    def encode_cursor(self, direction, row) -> str:
+        values = [getattr(row, key.lstrip('-')) for key in self.ordering]
+        payload = json.dumps([direction, values], cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> (str, List):
+        try:
+            payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, values = json.loads(payload)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+            raise InvalidCursor(f"Invalid cursor {cursor!r}") from e
+        if direction not in (self.NEXT, self.PREVIOUS) or not isinstance(values, list) \
+                or len(values) != len(self.ordering):
+            raise InvalidCursor(f"Invalid cursor {cursor!r}")
+        return direction, values
+
+    def clean_values(self, values: List) -> List:
+        """
+        Converts a decoded cursor's values to the types of their sort keys, raising InvalidCursor for a value a tampered
+        cursor has given the wrong type or an out of range value, which would otherwise only fail in the query
+        """
+        cleaned = []
+        for key, value in zip(self.ordering, values):
+            field = self._get_field(key.lstrip('-'))
+            try:
+                value = field.to_python(value)
+                if value is None:
+                    raise ValidationError("Sort keys are never null")
+                field.run_validators(value)
+            except (ValidationError, ValueError, TypeError) as e:
+                raise InvalidCursor(f"Invalid {key.lstrip('-')} {value!r} in cursor") from e
+            cleaned.append(value)
+        return cleaned
+
+    def _get_field(self, name: str) -> Field:
+        annotations = self.queryset.query.annotations
+        if name in annotations:
+            return annotations[name].output_field
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _get_position_filter(self, values, backwards) -> Q:
+        """Builds (a > x) OR (a = x AND b > y) OR ..., flipping each comparison for descending or backwards keys"""
+        conditions = []
+        for i, key in enumerate(self.ordering):
+            equal = {self.ordering[j].lstrip('-'): values[j] for j in range(i)}
+            lookup = 'lt' if key.startswith('-') != backwards else 'gt'
+            conditions.append(Q(**equal, **{f"{key.lstrip('-')}__{lookup}": values[i]}))
+        return reduce(or_, conditions)
+
+    @staticmethod
+    def _invert(key: str) -> str:
+        return key[1:] if key.startswith('-') else f"-{key}"
+
+
+def approximate_count(queryset: QuerySet) -> int:
+    """Estimates the number of rows in queryset from the query planner's statistics, without running a COUNT(*)"""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+async def aapproximate_count(queryset: QuerySet) -> int:
+    plan = json.loads(await queryset.order_by().aexplain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,52 @@
+from typing import List
+
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from media.models import Media, Book, Film, Series
+from media_list.models import ListEntry
+from utils import page_cache, db_router
+
+
+def _bump_on_commit(namespaces: List[str]):
+    """
+    Bumps versions once the change is committed. Bumping before would let a concurrent request render the old rows and
+    cache them under the new version
+    """
+    transaction.on_commit(lambda: page_cache.bump_versions(namespaces))
+
+
+@receiver([post_save, post_delete], sender=User)
+def bump_user_pages(sender, instance: User, **kwargs):
+    _bump_on_commit([page_cache.user_namespace(instance.pk), page_cache.USERS])
+
+
+@receiver([post_save, post_delete], sender=ListEntry)
+def bump_list_pages(sender, instance: ListEntry, **kwargs):
+    _bump_on_commit([page_cache.user_namespace(instance.user_id)])
+
+
+@receiver([post_save, post_delete], sender=Media)
+@receiver([post_save, post_delete], sender=Film)
+@receiver([post_save, post_delete], sender=Series)
+@receiver([post_save, post_delete], sender=Book)
+def bump_media_pages(sender, instance, **kwargs):
+    """
+    Every user's lists show media titles, and film runtimes, series episodes and book chapters, so a change to any of
+    them orphans all cached list pages
+    """
+    _bump_on_commit([page_cache.MEDIA])
+
+
+@receiver([post_save, post_delete], sender=ListEntry)
+def pin_list_owner(sender, instance: ListEntry, **kwargs):
+    db_router.pin_to_primary(instance.user_id)
+
+
+@receiver(user_logged_in)
+def pin_logged_in_user(sender, user, **kwargs):
+    """Newly registered users may not have reached the replicas yet"""
+    db_router.pin_to_primary(user.pk)
@@ -0,0 +1,28 @@
+from django import template
+import urllib.parse
+
+register = template.Library()
+
+
+@register.inclusion_tag("components/cursor-pagination.html", takes_context=True)
+def cursor_pagination(context):
+    path, params = context['request'].path, context['request'].GET.copy()
+    params.pop("cursor", None)
+    full_path = f"{path}?{urllib.parse.urlencode(params)}"
+
+    return {
+        'page_obj': context['page_obj'],
+        'full_path': full_path
+    }
+
+
+@register.simple_tag(takes_context=True)
+def sort_url(context, sort: str):
+    """Links to the first page of the list sorted by sort, reversing the order if it is already sorted by sort"""
+    path, params = context['request'].path, context['request'].GET.copy()
+    params.pop("cursor", None)
+    params.pop("order", None)
+    params['sort'] = sort
+    if context.get('sort') == sort:
+        params['order'] = 'asc' if context.get('order') == 'desc' else 'desc'
+    return f"{path}?{urllib.parse.urlencode(params)}"
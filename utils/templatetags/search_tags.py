@@ -1,6 +1,8 @@
 from django import template
 import urllib.parse
 
+from utils.pagination import KeysetPage
+
 register = template.Library()
 
 
@@ -9,9 +11,11 @@ def pagination(context):
     path, params = context['request'].path, context['request'].GET.copy()
     page_obj = context['page_obj']
     params.pop("page", None)
+    params.pop("cursor", None)
     full_path = f"{path}?{urllib.parse.urlencode(params)}"
 
     return {
         'page_obj': page_obj,
-        'full_path': full_path
+        'full_path': full_path,
+        'cursor_mode': isinstance(page_obj, KeysetPage)
     }
@@ -0,0 +1,40 @@
+import os
+import tempfile
+from typing import Dict
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    A TestCase mixin for catching N+1 query regressions. Each view, by resolved view name, is given a maximum number
+    of queries in query_budgets, and get_within_budget fails the test when a request to it makes more
+    """
+    query_budgets: Dict[str, int] = {}
+
+    def get_within_budget(self, path, data=None, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, data, **extra)
+            if response.streaming:
+                # Streaming responses query as their content is read, so read it while still counting
+                response.streaming_content = [b"".join(response.streaming_content)]
+        view_name = response.resolver_match.view_name
+        if view_name not in self.query_budgets:
+            self.fail(f"No query budget declared for {view_name}")
+        budget = self.query_budgets[view_name]
+        if len(queries) > budget:
+            executed = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(queries, start=1))
+            self.fail(f"{view_name} made {len(queries)} queries, over its budget of {budget}:\n{executed}")
+        return response
+
+
+class TempFileMixin:
+    """A TestCase mixin for writing input files for commands, which are removed after the test"""
+
+    def write_file(self, suffix: str, content: str) -> str:
+        file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        file.write(content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
@@ -1,13 +1,23 @@
+import hashlib
+from datetime import datetime
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.shortcuts import get_object_or_404
+from django.http import Http404
+from django.utils.cache import get_conditional_response
 from django.views.generic import TemplateView
 
+from accounts import user_cache
 from accounts.models import User
 
 
 def get_user_from_url(request, **kwargs):
     if 'username' in kwargs:
-        return get_object_or_404(User, username=kwargs['username'])
+        try:
+            return user_cache.get_user(kwargs['username'])
+        except User.DoesNotExist:
+            raise Http404("No User matches the given query.")
     else:
         if request.user.is_authenticated:
             return request.user
@@ -16,6 +26,55 @@ def get_user_from_url(request, **kwargs):
             raise PermissionError
 
 
+def find_user_from_url(request, **kwargs) -> Optional[User]:
+    """Like get_user_from_url, but returns None rather than raising or adding a message when there's no user"""
+    if 'username' in kwargs:
+        try:
+            return user_cache.get_user(kwargs['username'])
+        except User.DoesNotExist:
+            return None
+    return request.user if request.user.is_authenticated else None
+
+
+async def aget_request_user(request):
+    """
+    Loads request.user, which the authentication middleware leaves to be loaded from the session on first use, in a
+    thread. Async views must call this before reading request.user, after which it can be used freely
+    """
+    def load_user():
+        request.user.is_authenticated
+        return request.user
+    return await sync_to_async(load_user)()
+
+
+async def aget_user_from_url(request, **kwargs):
+    """get_user_from_url for async views"""
+    if 'username' in kwargs:
+        try:
+            return await user_cache.aget_user(kwargs['username'])
+        except User.DoesNotExist:
+            raise Http404("No User matches the given query.")
+    user = await aget_request_user(request)
+    if user.is_authenticated:
+        return user
+    messages.add_message(request, messages.ERROR, "!danger You must be logged in to view your profile.")
+    raise PermissionError
+
+
+async def afind_user_from_url(request, **kwargs) -> Optional[User]:
+    if 'username' in kwargs:
+        try:
+            return await user_cache.aget_user(kwargs['username'])
+        except User.DoesNotExist:
+            return None
+    user = await aget_request_user(request)
+    return user if user.is_authenticated else None
+
+
+def has_pending_messages(request) -> bool:
+    return bool(len(messages.get_messages(request)))
+
+
 class BaseTemplateView(TemplateView):
     page_title = "Untitled page"
     template_name = "layout.html"
@@ -24,3 +83,60 @@ class BaseTemplateView(TemplateView):
         context = super().get_context_data(**kwargs)
         context['page_title'] = self.page_title
         return context
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET requests with 304 Not Modified, before any querying or rendering of the page itself, when the client's
+    copy is still current. The ETag comes from get_page_state(), which should be a single cheap query. No Last-Modified
+    is sent, as deleting a row can leave the latest change time as it was, or even move it backwards
+    """
+
+    def get_page_state(self) -> Optional[Tuple[Optional[datetime], int]]:
+        """When the page's content last changed and how many rows it's built from, or None to skip conditional GET"""
+        return None
+
+    async def aget_page_state(self) -> Optional[Tuple[Optional[datetime], int]]:
+        """get_page_state for async views, which by default runs it in a thread"""
+        return await sync_to_async(self.get_page_state)()
+
+    def get_etag(self, last_modified: Optional[datetime], count: int) -> str:
+        # Pages show the viewer's own navigation, so each viewer gets their own ETag
+        state = f"{self.request.user.pk}:{last_modified.isoformat() if last_modified else ''}:{count}"
+        return f'"{hashlib.md5(state.encode()).hexdigest()}"'
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch_conditional(request, *args, **kwargs)
+        # Pending messages are shown once, so a page showing them is never answered from the client's cache
+        if request.method not in ('GET', 'HEAD') or has_pending_messages(request):
+            return super().dispatch(request, *args, **kwargs)
+        state = self.get_page_state()
+        if state is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag = self.get_etag(*state)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        return self._add_etag(super().dispatch(request, *args, **kwargs), etag)
+
+    async def _adispatch_conditional(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or await sync_to_async(has_pending_messages)(request):
+            return await super().dispatch(request, *args, **kwargs)
+        state = await self.aget_page_state()
+        if state is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        await aget_request_user(request)
+        etag = self.get_etag(*state)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+        return self._add_etag(await super().dispatch(request, *args, **kwargs), etag)
+
+    @staticmethod
+    def _add_etag(response, etag: str):
+        if response.status_code == 200:
+            response.headers.setdefault('ETag', etag)
+        return response